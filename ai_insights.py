@@ -1,17 +1,37 @@
 """
 AI Insights Generator - Fixed for Python 3.14 compatibility
+Calls the model for many contractors at once, paced by token buckets sized to the deployment's
+requests-per-minute and tokens-per-minute quotas, while a single writer commits insights in batches
 """
+import argparse
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-import sqlite3
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from db import DB_FILE, connection
+from ratelimit import RateLimiter
 
 load_dotenv()
 
+# Deployment quotas; set them in .env to match the Azure deployment's limits
+DEFAULT_RPM = int(os.getenv('OPENAI_RPM', 900))
+DEFAULT_TPM = int(os.getenv('OPENAI_TPM', 150000))
+DEFAULT_CONCURRENCY = 16
+MAX_TOKENS = 200
+CHARS_PER_TOKEN = 4  # rough prompt size estimate, as the service itself makes before counting
+WRITE_BATCH_SIZE = 50
+WRITE_INTERVAL = 2.0  # seconds; commit at least this often so progress survives a crash
+MAX_RETRIES = 3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 1.0  # seconds, doubled each attempt when the service sends no Retry-After
+
 class InsightsGenerator:
-    def __init__(self, db_name='contractors.db'):
+    def __init__(self, db_name=DB_FILE, concurrency=DEFAULT_CONCURRENCY, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM):
         self.db_name = db_name
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rpm, tpm)
         
         # Get API key
         self.api_key = os.getenv('OPENAI_API_KEY')
@@ -26,9 +46,17 @@ class InsightsGenerator:
             "Content-Type": "application/json",
             "api-key": self.api_key  # Azure uses 'api-key' not 'Authorization'
         }
+        
+        # One keep-alive connection per worker. Retries happen in generate_insight, not in the adapter,
+        # so every attempt is charged to the rate limiter
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
-    def generate_insight(self, contractor_data):
-        """Generate AI insight using direct API call"""
+    def build_payload(self, contractor_data):
+        """Chat completion request for one contractor"""
         
         # Prepare contractor context
         context = f"""
@@ -55,129 +83,186 @@ Contractor Information:
 
 Generate a professional, actionable insight for the sales team:"""
         
-        # Prepare API request
-        payload = {
+        return {
             "model": "gpt-3.5-turbo",
             "messages": [
                 {"role": "system", "content": "You are a B2B sales intelligence assistant specializing in the roofing industry."},
                 {"role": "user", "content": prompt}
             ],
-            "max_tokens": 200,
+            "max_tokens": MAX_TOKENS,
             "temperature": 0.7
         }
-        
+    
+    def estimate_tokens(self, payload):
+        # The TPM quota is charged up front for the prompt plus max_tokens, whatever the reply uses
+        prompt_chars = sum(len(message['content']) for message in payload['messages'])
+        return prompt_chars // CHARS_PER_TOKEN + payload['max_tokens']
+    
+    def retry_delay(self, response, attempt):
+        """The service's Retry-After if it sent one, otherwise exponential backoff"""
         try:
-            # Make API call using requests
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
-            
-            # Check if request was successful
-            if response.status_code == 200:
-                data = response.json()
-                insight = data['choices'][0]['message']['content'].strip()
-                return insight
-            else:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return RETRY_BACKOFF * 2 ** attempt
+    
+    def generate_insight(self, contractor_data):
+        """
+        Generate AI insight using direct API call, waiting for quota before every attempt. 429s (quota
+        briefly exceeded anyway, e.g. by another client of the deployment) and 5xx are retried after
+        the service's Retry-After. Safe to call from many threads.
+        """
+        payload = self.build_payload(contractor_data)
+        tokens = self.estimate_tokens(payload)
+        
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire(tokens)
+            try:
+                # Make API call over the pooled session
+                response = self.session.post(
+                    self.api_url,
+                    json=payload,
+                    timeout=30
+                )
+                
+                # Check if request was successful
+                if response.status_code == 200:
+                    data = response.json()
+                    insight = data['choices'][0]['message']['content'].strip()
+                    return insight
+                if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    time.sleep(self.retry_delay(response, attempt))
+                    continue
                 print(f"  ✗ API Error {response.status_code}: {response.text}")
                 return None
                 
-        except requests.exceptions.Timeout:
-            print(f"  ✗ Request timeout")
-            return None
-        except Exception as e:
-            print(f"  ✗ Error generating insight: {e}")
-            return None
+            except requests.exceptions.Timeout:
+                print(f"  ✗ Request timeout")
+                return None
+            except Exception as e:
+                print(f"  ✗ Error generating insight: {e}")
+                return None
     
-    def process_all_contractors(self):
-        """Generate insights for all contractors in database"""
-        conn = sqlite3.connect(self.db_name)
+    def pending_contractors(self, conn):
+        """Contractors without insights, with their certifications and services, in three queries"""
         cursor = conn.cursor()
-        
-        # Get contractors without insights
+        columns = ['id', 'name', 'rating', 'address', 'phone', 'website', 'description', 'reviews_count']
         cursor.execute('''
-            SELECT c.id, c.name, c.rating, c.address, c.phone, c.website, c.description
+            SELECT c.id, c.name, c.rating, c.address, c.phone, c.website, c.description, c.reviews_count
             FROM contractors c
-            LEFT JOIN insights i ON c.id = i.contractor_id
-            WHERE i.id IS NULL
+            WHERE NOT EXISTS (SELECT 1 FROM insights i WHERE i.contractor_id = c.id)
+            ORDER BY c.id
         ''')
+        contractors = {row[0]: dict(zip(columns, row), certifications=[], services=[]) for row in cursor.fetchall()}
         
-        contractors = cursor.fetchall()
-        columns = ['id', 'name', 'rating', 'address', 'phone', 'website', 'description']
-        
-        if len(contractors) == 0:
-            print("\n✓ All contractors already have insights!")
-            conn.close()
-            return
-        
-        print(f"\n{'='*80}")
-        print(f"Generating insights for {len(contractors)} contractors...")
-        print(f"{'='*80}\n")
-        
-        success_count = 0
-        failed_count = 0
-        
-        for idx, contractor_row in enumerate(contractors, 1):
-            contractor = dict(zip(columns, contractor_row))
-            
-            # Get certifications
-            cursor.execute('SELECT certification_name FROM certifications WHERE contractor_id = ?', 
-                          (contractor['id'],))
-            contractor['certifications'] = [row[0] for row in cursor.fetchall()]
-            
-            # Get services
-            cursor.execute('SELECT service_name FROM services WHERE contractor_id = ?', 
-                          (contractor['id'],))
-            contractor['services'] = [row[0] for row in cursor.fetchall()]
-            
-            # Set reviews_count to None (column doesn't exist in database)
-            contractor['reviews_count'] = None
+        for field, view, name_column in (('certifications', 'certifications', 'certification_name'),
+                                         ('services', 'services', 'service_name')):
+            cursor.execute(f'''
+                SELECT v.contractor_id, v.{name_column} FROM {view} v
+                WHERE NOT EXISTS (SELECT 1 FROM insights i WHERE i.contractor_id = v.contractor_id)
+            ''')
+            for contractor_id, name in cursor.fetchall():
+                if contractor_id in contractors:
+                    contractors[contractor_id][field].append(name)
+        return list(contractors.values())
+    
+    def write_insights(self, conn, insights):
+        """The single writer: one transaction per batch instead of a commit per contractor"""
+        with conn:
+            conn.executemany('''
+                INSERT INTO insights (contractor_id, insight_text)
+                VALUES (?, ?)
+            ''', insights)
+    
+    def process_all_contractors(self):
+        """Generate insights for all contractors in database, concurrency requests at a time"""
+        with connection(self.db_name) as conn:
+            contractors = self.pending_contractors(conn)
             
-            # Generate insight
-            print(f"[{idx}/{len(contractors)}] Processing: {contractor['name'][:50]}...", end=" ")
+            if len(contractors) == 0:
+                print("\n✓ All contractors already have insights!")
+                return
             
-            insight = self.generate_insight(contractor)
+            print(f"\n{'='*80}")
+            print(f"Generating insights for {len(contractors)} contractors "
+                  f"({self.concurrency} at a time, {self.limiter.requests.rate * 60:.0f} RPM / "
+                  f"{self.limiter.tokens.rate * 60:.0f} TPM)...")
+            print(f"{'='*80}\n")
             
-            if insight:
-                # Save insight to database
-                cursor.execute('''
-                    INSERT INTO insights (contractor_id, insight_text)
-                    VALUES (?, ?)
-                ''', (contractor['id'], insight))
-                conn.commit()
-                print(f"✓")
-                success_count += 1
-            else:
-                print(f"✗ Failed")
-                failed_count += 1
+            success_count = 0
+            failed_count = 0
+            pending = []
+            last_write = time.monotonic()
+            start = time.perf_counter()
             
-            # Small delay to avoid rate limits
-            import time
-            time.sleep(0.5)
-        
-        conn.close()
+            executor = ThreadPoolExecutor(max_workers=self.concurrency)
+            futures = {executor.submit(self.generate_insight, contractor): contractor for contractor in contractors}
+            handled = set()
+            try:
+                # Workers only call the API; this thread alone writes, so they never contend for the database
+                for idx, future in enumerate(as_completed(futures), 1):
+                    handled.add(future)
+                    contractor = futures[future]
+                    insight = future.result()
+                    
+                    if insight:
+                        pending.append((contractor['id'], insight))
+                        print(f"[{idx}/{len(contractors)}] {contractor['name'][:50]} ✓")
+                        success_count += 1
+                    else:
+                        print(f"[{idx}/{len(contractors)}] {contractor['name'][:50]} ✗ Failed")
+                        failed_count += 1
+                    
+                    if len(pending) >= WRITE_BATCH_SIZE or (pending and time.monotonic() - last_write >= WRITE_INTERVAL):
+                        self.write_insights(conn, pending)
+                        pending = []
+                        last_write = time.monotonic()
+            except KeyboardInterrupt:
+                print("\n✓ Stopping; finishing the requests in flight and saving the insights already generated")
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future, contractor in futures.items():
+                    if future in handled or future.cancelled():
+                        continue
+                    insight = future.result()
+                    if insight:
+                        pending.append((contractor['id'], insight))
+                        success_count += 1
+                    else:
+                        failed_count += 1
+            finally:
+                if pending:
+                    self.write_insights(conn, pending)
+                executor.shutdown(wait=True)
+                self.session.close()
+            elapsed = time.perf_counter() - start
         
+        stats = self.limiter.stats
         print(f"\n{'='*80}")
         print(f"COMPLETE!")
         print(f"{'='*80}")
         print(f"✓ Successfully generated: {success_count}")
         print(f"✗ Failed: {failed_count}")
         print(f"Total: {len(contractors)}")
+        print(f"Throughput: {(success_count + failed_count) / elapsed * 60:,.0f} contractors/min in {elapsed:.1f}s "
+              f"({stats['waited_seconds']:.1f}s waiting for quota across workers)")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate AI insights for contractors without one")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight at once")
+    parser.add_argument('--rpm', type=int, default=DEFAULT_RPM, help="Deployment requests-per-minute quota (OPENAI_RPM)")
+    parser.add_argument('--tpm', type=int, default=DEFAULT_TPM, help="Deployment tokens-per-minute quota (OPENAI_TPM)")
+    args = parser.parse_args()
+    
     print("\n" + "="*80)
     print("AI INSIGHTS GENERATOR")
     print("="*80)
     
     try:
-        generator = InsightsGenerator()
+        generator = InsightsGenerator(concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm)
         generator.process_all_contractors()
         
         print("\n✅ All insights generated successfully!")
         print("\nYou can now run: python3 evaluate_insights.py")
-        
+    
     except ValueError as e:
         print(f"\n✗ Error: {e}")
         print("\nPlease create a .env file with your OPENAI_API_KEY")
@@ -187,4 +272,4 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n✗ Unexpected error: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
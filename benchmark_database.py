@@ -0,0 +1,225 @@
+"""
+Database Benchmark
+Builds seeded synthetic contractors databases (10k/100k/1M by default, see synthetic_data.py), then times
+the ETL load and an unchanged reload, every dashboard.py route including the CSV and snapshot exports,
+and InsightEvaluator.generate_report. Results go to a JSON file; --compare prints the change against
+the results of another branch and can fail the run on regressions.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import dashboard
+from db import close_all, connection
+from database import ContractorDatabase
+from checkpoint import iter_records
+from evaluate_insights import InsightEvaluator
+from synthetic_data import BATCH_SIZE, SIZES, build_database
+
+RESULTS_FILE = 'database_benchmark.json'
+PRIORITY_IDS = 100  # contractors ticked as priorities for /export/priorities
+# Timings this close together are noise at millisecond scale, whatever their ratio
+MIN_REGRESSION_SECONDS = 0.005
+
+# name -> dashboard URL; {zip} and {ids} are filled in from the generated data
+ROUTES = [
+    ('index', '/'),
+    ('contractors', '/api/contractors'),
+    ('search', '/api/search?q=roofing'),
+    ('search_prefix', '/api/search?q=master%20eli'),
+    ('search_rare', '/api/search?q=underlayment%20storm'),
+    ('near', '/api/contractors/near?zip={zip}&radius=25'),
+    ('near_wide', '/api/contractors/near?zip={zip}&radius=250&limit=1000'),
+    ('export_csv', '/export/csv'),
+    ('export_priorities', '/export/priorities?ids={ids}'),
+    ('export_report', '/export/report'),
+    ('export_snapshot', '/export/snapshot'),
+]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(function, repeat):
+    """(seconds per run, last result); output is swallowed so it does not drown the report"""
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = function()
+            seconds.append(time.perf_counter() - start)
+    return seconds, result
+
+
+def summary(seconds):
+    return {'runs': seconds, 'min': min(seconds), 'median': statistics.median(seconds)}
+
+
+def route_parameters(db_name):
+    """The busiest contractor zip (for the radius queries) and the top-rated ids (for priorities)"""
+    with connection(db_name) as conn:
+        zip_code = conn.execute('''
+            SELECT zip FROM contractors WHERE zip IS NOT NULL GROUP BY zip ORDER BY COUNT(*) DESC, zip LIMIT 1
+        ''').fetchone()[0]
+        ids = [row[0] for row in conn.execute('SELECT id FROM contractors ORDER BY rating DESC, id LIMIT ?',
+                                              (PRIORITY_IDS,))]
+    return {'zip': zip_code, 'ids': ','.join(map(str, ids))}
+
+
+def time_routes(db_name, repeat):
+    dashboard.DB_FILE = db_name
+    dashboard.contractor_database.cache_clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        # As at dashboard startup, so the migration check is not timed as part of the first request
+        dashboard.contractor_database(db_name)
+    client = dashboard.app.test_client()
+    parameters = route_parameters(db_name)
+    routes = {}
+    for name, url in ROUTES:
+        url = url.format(**parameters)
+        seconds, response = timed(lambda: client.get(url), repeat)
+        body = response.get_data()
+        if response.status_code == 501:
+            # /export/snapshot without pyarrow
+            routes[name] = {'url': url, 'status': 501, 'skipped': True}
+            continue
+        routes[name] = {'url': url, 'status': response.status_code, 'bytes': len(body), **summary(seconds)}
+    return routes
+
+
+def run_case(count, seed, repeat, workdir):
+    db_name = os.path.join(workdir, f"contractors_{count}.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        built = build_database(db_name, count, seed)
+
+    # Every record again, unchanged: the cost of a routine re-scrape
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = ContractorDatabase(db_name)
+    reload_seconds, _ = timed(lambda: db.bulk_load(iter_records(built['records_file']), batch_size=BATCH_SIZE), 1)
+    os.remove(built['records_file'])
+
+    routes = time_routes(db_name, repeat)
+
+    # generate_report writes evaluation_report.json into the working directory
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        report_seconds, _ = timed(lambda: InsightEvaluator(db_name).generate_report(), repeat)
+    finally:
+        os.chdir(cwd)
+
+    with connection(db_name) as conn:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        integrity = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        contractors = conn.execute('SELECT COUNT(*) FROM contractors').fetchone()[0]
+    close_all()
+    case = {
+        'contractors': contractors,
+        'insights': built['insights'],
+        'db_bytes': os.path.getsize(db_name),
+        'consistent': integrity == 'ok' and contractors == count,
+        'generate_seconds': built['generate_seconds'],
+        'load_seconds': built['load_seconds'],
+        'load_rows_per_sec': count / built['load_seconds'] if built['load_seconds'] else 0,
+        'reload_seconds': reload_seconds[0],
+        'routes': routes,
+        'generate_report': summary(report_seconds),
+    }
+    os.remove(db_name)
+    return case
+
+
+def timings(case):
+    """metric -> seconds, the numbers compared between runs"""
+    result = {'load': case['load_seconds'], 'reload': case['reload_seconds'],
+              'generate_report': case['generate_report']['median']}
+    result.update((f"route {name}", route['median']) for name, route in case['routes'].items() if 'median' in route)
+    return result
+
+
+def compare(results, baseline_file, max_slowdown=None):
+    """Print current vs baseline per size and metric; returns the metrics slower than max_slowdown allows"""
+    with open(baseline_file, 'r') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_file} (commit {baseline.get('commit') or 'unknown'}):")
+    before_by_size = {case['contractors']: timings(case) for case in baseline['results']}
+    regressions = []
+    for case in results:
+        before = before_by_size.get(case['contractors'])
+        if not before:
+            print(f"  {case['contractors']:,} contractors: not in the baseline")
+            continue
+        print(f"\n  {case['contractors']:,} contractors")
+        for metric, seconds in timings(case).items():
+            if metric not in before:
+                continue
+            ratio = seconds / before[metric] if before[metric] else float('inf')
+            flag = ''
+            if max_slowdown and ratio > max_slowdown and seconds - before[metric] > MIN_REGRESSION_SECONDS:
+                flag = '  ✗'
+                regressions.append(f"{case['contractors']:,} {metric}")
+            print(f"    {metric:28s} {before[metric] * 1000:10.1f} ms -> {seconds * 1000:10.1f} ms  {ratio:5.2f}x{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ETL, dashboard routes and exports on synthetic databases")
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES), help=f"Contractor counts or {', '.join(SIZES)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per route; the median is compared")
+    parser.add_argument('--output', default=RESULTS_FILE)
+    parser.add_argument('--compare', metavar='FILE', help="Results JSON from another branch to compare against")
+    parser.add_argument('--max-slowdown', type=float, help="With --compare, exit non-zero if any timing grows past "
+                                                           "this factor (e.g. 1.25)")
+    args = parser.parse_args()
+    sizes = [SIZES.get(size.lower()) or int(size) for size in args.sizes]
+
+    print("\n" + "="*80)
+    print(f"DATABASE BENCHMARK - seed {args.seed}, {args.repeat} runs per route")
+    print("="*80)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in sizes:
+            case = run_case(count, args.seed, args.repeat, workdir)
+            results.append(case)
+            print(f"\n{count:,} contractors, {case['insights']:,} insights, {case['db_bytes'] / 2**20:,.1f} MiB"
+                  f"{'' if case['consistent'] else ' - INCONSISTENT'}")
+            print(f"  load {case['load_seconds']:.2f}s ({case['load_rows_per_sec']:,.0f} contractors/sec), "
+                  f"unchanged reload {case['reload_seconds']:.2f}s")
+            for name, route in case['routes'].items():
+                if route.get('skipped'):
+                    print(f"  {route['url'][:48]:48s}  skipped (status {route['status']})")
+                else:
+                    status = '' if route['status'] == 200 else f"  status {route['status']}"
+                    print(f"  {route['url'][:48]:48s} {route['median'] * 1000:10.1f} ms  {route['bytes']:>12,} bytes{status}")
+            print(f"  generate_report {case['generate_report']['median']:.2f}s")
+
+    with open(args.output, 'w') as f:
+        json.dump({'commit': git_commit(), 'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                   'seed': args.seed, 'repeat': args.repeat, 'results': results}, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+    regressions = compare(results, args.compare, args.max_slowdown) if args.compare else []
+    failures = [f"{case['contractors']:,}" for case in results if not case['consistent']]
+    if failures:
+        print(f"\n✗ Inconsistent database after the run: {', '.join(failures)} contractors")
+    if regressions:
+        print(f"\n✗ Slower than {args.max_slowdown}x the baseline: {', '.join(regressions)}")
+    if failures or regressions:
+        sys.exit(1)
+    print("\n✓ Benchmark complete")
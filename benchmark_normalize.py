@@ -0,0 +1,147 @@
+"""
+Normalization Micro-benchmark
+Times the per-row cleaning the ETL used to do inside its insert path against the batch
+normalization stage (in-process and across a process pool) on synthetic scraper records
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from database import DEFAULT_BATCH_SIZE, chunked
+from normalize import NON_DIGITS, normalize_batch, normalize_batches
+
+GOLDEN_FILE = 'page_source_golden.json'
+RESULTS_FILE = 'normalize_benchmark.json'
+
+# Formatting variants seen in scraped cards and hand-made inputs
+RATING_FORMATS = ('{}', '{}★', '{} ★', '', None)
+PHONE_FORMATS = ('({0}) {1}-{2}', '{0}-{1}-{2}', '+1 {0} {1} {2}', '{0}{1}{2}', '{0}.{1}.{2} x12', None)
+ADDRESS_FORMATS = ('{city}, {state} - {miles} mi', '{number} Main St, {city}, {state} {zip}', '')
+# reviews_count as JSON numbers (int or float) and as text; each must read back as the same count
+REVIEWS_FORMATS = (int, float, '{}', '{:.1f}', '{:,} reviews', '({:,})')
+
+
+def legacy_clean_rating(rating):
+    """ContractorDatabase.clean_rating before the normalization stage, kept as the baseline"""
+    try:
+        if rating:
+            return float(str(rating).replace('★', '').strip())
+    except:
+        pass
+    return 0.0
+
+
+def legacy_clean_phone(phone):
+    """ContractorDatabase.clean_phone before the normalization stage, kept as the baseline"""
+    if not phone:
+        return None
+    digits = re.sub(r'\D', '', str(phone))
+    if len(digits) == 10:
+        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+    return phone
+
+
+def synthesize_records(golden, count, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for index in range(count):
+        record = dict(golden[index % len(golden)])
+        city, state = record['address'].split(' - ')[0].split(', ')
+        digits = NON_DIGITS.sub('', record['phone'])
+        rating = rng.choice(RATING_FORMATS)
+        phone = rng.choice(PHONE_FORMATS)
+        reviews_count = rng.choice((record['reviews_count'], rng.randint(1000, 20000)))
+        reviews = rng.choice(REVIEWS_FORMATS)
+        record.update({
+            'name': f"{record['name']} {index}",
+            'rating': rating.format(round(rng.uniform(1, 5), 1)) if rating is not None else None,
+            'phone': phone.format(digits[:3], digits[3:6], digits[6:]) if phone else None,
+            'reviews_count': reviews.format(reviews_count) if isinstance(reviews, str) else reviews(reviews_count),
+            'expected_reviews_count': reviews_count,
+            'address': rng.choice(ADDRESS_FORMATS).format(city=city, state=state, miles=round(rng.uniform(1, 30), 1),
+                                                          number=rng.randint(1, 9999), zip=f"{rng.randint(0, 99999):05d}"),
+        })
+        records.append(record)
+    return records
+
+
+def per_row(records):
+    return [(legacy_clean_rating(record.get('rating')), legacy_clean_phone(record.get('phone'))) for record in records]
+
+
+def batched(records, batch_size):
+    return [record for batch in chunked(records, batch_size) for record in normalize_batch(batch)]
+
+
+def pooled(records, batch_size, workers):
+    return [record for batch in normalize_batches(chunked(records, batch_size), workers) for record in batch]
+
+
+def check_against_legacy(legacy, normalized):
+    """
+    Ratings must be unchanged, every phone the old code formatted must hold the same digits, and
+    every reviews_count format must read back as the count it was written from
+    """
+    for (rating, phone), record in zip(legacy, normalized):
+        if rating != record['rating']:
+            return False
+        if phone and phone.startswith('(') and NON_DIGITS.sub('', phone) != record['phone'][2:]:
+            return False
+        if record['reviews_count'] != record['expected_reviews_count']:
+            return False
+    return True
+
+
+def run_benchmark(records, batch_size, workers, repeat):
+    """Legacy per-row only cleans rating and phone; the batch cases also parse every address"""
+    cases = [('per-row (legacy)', per_row), ('batch', lambda copies: batched(copies, batch_size))]
+    cases += [(f"pool x{count}", lambda copies, count=count: pooled(copies, batch_size, count)) for count in workers]
+
+    results = []
+    outputs = {}
+    for name, run in cases:
+        best = None
+        for _ in range(repeat):
+            copies = [dict(record) for record in records]  # batch normalization works in place
+            start = time.perf_counter()
+            outputs[name] = run(copies)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({'case': name, 'seconds': best, 'records_per_sec': len(records) / best if best else 0})
+        print(f"{name:18s} {best:9.3f} {len(records) / best:14,.0f}")
+    return results, outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-row vs batch normalization")
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', nargs='*', type=int, default=[2, 4], help="Process pool sizes to try")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the fastest is reported")
+    parser.add_argument('--output', default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        records = synthesize_records(json.load(f), args.records)
+
+    print("\n" + "="*80)
+    print(f"NORMALIZATION BENCHMARK - {len(records):,} records, batches of {args.batch_size}")
+    print("="*80)
+    print(f"\n{'case':18s} {'seconds':>9s} {'records/sec':>14s}")
+
+    results, outputs = run_benchmark(records, args.batch_size, args.workers, args.repeat)
+
+    with open(args.output, 'w') as f:
+        json.dump({'records': len(records), 'batch_size': args.batch_size, 'results': results}, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+    batch = outputs['batch']
+    failures = [name for name, output in outputs.items() if name.startswith('pool') and output != batch]
+    if not check_against_legacy(outputs['per-row (legacy)'], batch):
+        failures.append('batch vs legacy')
+    if failures:
+        print(f"\n✗ Normalized output diverged: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n✓ Batch and pooled output agree, and with the legacy ratings, phone digits and review counts")
@@ -0,0 +1,227 @@
+"""
+Entity Resolution Benchmark
+Builds synthetic contractors databases with known duplicates (re-scrapes from neighbouring zipcodes,
+name and website formatting variants, shared call-centre phones), then times finding and merging
+them and scores the clusters against the ground truth
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from db import close_all, connection
+from database import SEARCH_DOCUMENT_SQL, SEARCH_INSERT_SQL, ContractorDatabase
+from resolve import RESOLVE_COLUMNS, find_duplicates
+from synthetic_data import CERTIFICATIONS, SUFFIXES, contractor_name
+
+RESULTS_FILE = 'resolve_benchmark.json'
+
+STATES = ['NJ', 'NY', 'PA', 'CT', 'MA', 'MD', 'VA', 'NC', 'SC', 'GA', 'FL', 'TX', 'OH', 'MI', 'IL', 'CO', 'AZ',
+          'CA', 'WA', 'MN']
+CITIES = ['Springfield', 'Franklin', 'Greenville', 'Bristol', 'Clinton', 'Fairview', 'Salem', 'Madison',
+          'Georgetown', 'Arlington', 'Ashland', 'Dover', 'Oxford', 'Jackson', 'Burlington', 'Manchester',
+          'Milton', 'Newport', 'Auburn', 'Dayton', 'Lexington', 'Milford', 'Riverside', 'Winchester', 'Hudson',
+          'Kingston', 'Mount Vernon', 'Centerville', 'Oakland', 'Marion']
+CERTIFICATION_NAMES = [name for name, _ in CERTIFICATIONS]
+CALL_CENTRE_SHARE = 0.005  # entities answering on a phone shared by ~100 unrelated contractors
+# Entities with a sister branch: the same name and phone under its own data-layer id. An id-less
+# re-scrape of either one matches both, which must not merge the two branches.
+BRANCH_SHARE = 0.01
+
+
+def synthesize_entities(count, rng):
+    call_centres = [f"+1800{rng.randint(0, 9999999):07d}" for _ in range(max(1, int(count * CALL_CENTRE_SHARE / 100)))]
+    entities = []
+    for entity in range(count):
+        name, _ = contractor_name(rng)
+        slug = ''.join(ch for ch in name.lower() if ch.isalnum())
+        website = rng.random()
+        entities.append({
+            'name': name + rng.choice(SUFFIXES),
+            'state': rng.choice(STATES),
+            'city': rng.choice(CITIES),
+            'phone': rng.choice(call_centres) if rng.random() < CALL_CENTRE_SHARE else f"+1{rng.randint(2000000000, 9999999999)}",
+            'website': (f"https://{slug}{entity}.com" if website < 0.6 else
+                        f"https://www.gaf.com/en-us/roofing-contractors/{slug}-{entity}" if website < 0.8 else None),
+            'source_id': str(1000000 + entity) if rng.random() < 0.7 else None,
+            'rating': round(rng.uniform(3, 5), 1),
+        })
+    for index in rng.sample(range(count), int(count * BRANCH_SHARE)):
+        entities[index]['source_id'] = str(1000000 + index)
+        entities.append(dict(entities[index], source_id=str(2000000 + len(entities)), website=None))
+    return entities
+
+
+def variant(entity, rng):
+    """The same contractor as another scrape would store it"""
+    record = dict(entity)
+    name = record['name']
+    roll = rng.random()
+    if roll < 0.2:
+        name = name.upper()
+    elif roll < 0.4:
+        name = name + ' LLC' if not name.endswith(('LLC', 'Inc', 'Inc.', 'Co')) else name.rsplit(' ', 1)[0]
+    elif roll < 0.5:
+        name = name.replace(' & ', ' and ')
+    record['name'] = name
+    if rng.random() < 0.3:
+        record['source_id'] = None  # e.g. extracted without the data layer
+    if rng.random() < 0.2:
+        record['phone'] = None
+    if record['website'] and rng.random() < 0.5:
+        record['website'] = record['website'].replace('https://', 'http://www.', 1)
+    record['rating'] = round(min(5.0, record['rating'] + rng.choice([0, 0, 0.1, -0.1])), 1)
+    return record
+
+
+def synthesize_rows(rows, duplicate_rate, seed):
+    """(entity index, record) per row; about duplicate_rate of the rows repeat an earlier entity"""
+    rng = random.Random(seed)
+    entities = synthesize_entities(int(rows * (1 - duplicate_rate)), rng)
+    result = [(index, entity) for index, entity in enumerate(entities)]
+    while len(result) < rows:
+        index = rng.randrange(len(entities))
+        result.append((index, variant(entities[index], rng)))
+    rng.shuffle(result)
+    return result
+
+
+def build_database(db_name, rows, rng):
+    """
+    Write the rows straight into a migrated database; ids follow row order. The search distance in
+    the address comes from the position, so no two rows collide on UNIQUE(name, address).
+    """
+    ContractorDatabase(db_name)
+    with connection(db_name) as conn:
+        with conn:
+            conn.execute('UPDATE search_sync SET deferred = 1')
+            conn.executemany('''
+                INSERT INTO contractors (name, rating, address, phone, website, description, city, state, zip,
+                                         source_id, updated_at)
+                VALUES (?, ?, ?, ?, ?, NULL, ?, ?, NULL, ?, ?)
+            ''', [(record['name'], record['rating'], f"{record['city']}, {record['state']} - {position / 100:.2f} mi",
+                   record['phone'], record['website'], record['city'], record['state'], record['source_id'],
+                   f"2026-01-{1 + position % 28:02d}") for position, (_, record) in enumerate(rows)])
+            conn.executemany('INSERT INTO certification_names (name) VALUES (?)', [(name,) for name in CERTIFICATION_NAMES])
+            conn.executemany('INSERT OR IGNORE INTO contractor_certifications (contractor_id, certification_id) VALUES (?, ?)',
+                             [(position + 1, rng.randint(1, len(CERTIFICATION_NAMES)))
+                              for position in range(len(rows)) for _ in range(rng.randint(0, 2))])
+            conn.executemany("INSERT INTO insights (contractor_id, insight_text) VALUES (?, 'Synthetic insight')",
+                             [(position + 1,) for position in range(len(rows)) if rng.random() < 0.1])
+            conn.execute(SEARCH_INSERT_SQL + SEARCH_DOCUMENT_SQL)
+            conn.execute('UPDATE search_sync SET deferred = 0')
+
+
+def pair_count(sizes):
+    return sum(size * (size - 1) // 2 for size in sizes)
+
+
+def score(clusters, rows):
+    """Pairwise precision and recall of the clusters against the entity each row came from"""
+    entity_of = {position + 1: entity for position, (entity, _) in enumerate(rows)}
+    predicted = pair_count(len(duplicates) + 1 for _, duplicates in clusters)
+    correct = pair_count(size for (_, _), size in Counter(
+        (canonical, entity_of[member]) for canonical, duplicates in clusters
+        for member in [canonical] + duplicates).items())
+    actual = pair_count(Counter(entity for entity, _ in rows).values())
+    return {
+        'precision': correct / predicted if predicted else 1.0,
+        'recall': correct / actual if actual else 1.0,
+    }
+
+
+def joined_ids(clusters, rows):
+    """Clusters holding two different data-layer ids: always a wrong merge, whatever precision says"""
+    source_of = {position + 1: record['source_id'] for position, (_, record) in enumerate(rows)}
+    return sum(1 for canonical, duplicates in clusters
+               if len({source_of[member] for member in [canonical] + duplicates} - {None}) > 1)
+
+
+def run_case(rows, duplicate_rate, seed, workdir):
+    synthetic = synthesize_rows(rows, duplicate_rate, seed)
+    db_name = os.path.join(workdir, f"resolve_{rows}.db")
+    start = time.perf_counter()
+    build_database(db_name, synthetic, random.Random(seed))
+    build_seconds = time.perf_counter() - start
+
+    db = ContractorDatabase(db_name)
+    start = time.perf_counter()
+    with connection(db_name) as conn:
+        clusters, stats = find_duplicates(conn.execute(f"SELECT {', '.join(RESOLVE_COLUMNS)} FROM contractors"))
+    find_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = db.merge_duplicates(clusters)
+    merge_seconds = time.perf_counter() - start
+
+    with connection(db_name) as conn:
+        remaining = conn.execute('SELECT COUNT(*) FROM contractors').fetchone()[0]
+        integrity = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        stats_total = conn.execute('SELECT total FROM stats').fetchone()[0]
+    close_all()
+    os.remove(db_name)
+
+    case = {
+        'rows': rows,
+        'build_seconds': build_seconds,
+        'find_seconds': find_seconds,
+        'merge_seconds': merge_seconds,
+        'rows_per_sec': rows / find_seconds if find_seconds else 0,
+        'comparisons': stats['comparisons'],
+        'all_pairs': rows * (rows - 1) // 2,
+        'skipped_blocks': stats['skipped_blocks'],
+        'matches': stats['matches'],
+        'conflicts': stats['conflicts'],
+        'joined_ids': joined_ids(clusters, synthetic),
+        'merged': merged,
+        'remaining': remaining,
+        'consistent': integrity == 'ok' and stats_total == remaining,
+    }
+    case.update(score(clusters, synthetic))
+    return case
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark entity resolution on synthetic contractors")
+    parser.add_argument('--rows', nargs='+', type=int, default=[50000, 500000])
+    parser.add_argument('--duplicate-rate', type=float, default=0.1, help="Share of rows that repeat a contractor")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-precision', type=float, default=0.99)
+    parser.add_argument('--min-recall', type=float, default=0.9)
+    parser.add_argument('--output', default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print(f"ENTITY RESOLUTION BENCHMARK - {args.duplicate_rate:.0%} duplicate rows")
+    print("="*80)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            case = run_case(rows, args.duplicate_rate, args.seed, workdir)
+            results.append(case)
+            print(f"\n{rows:,} rows: find {case['find_seconds']:.2f}s ({case['rows_per_sec']:,.0f} rows/sec), "
+                  f"merge {case['merge_seconds']:.2f}s")
+            print(f"  {case['comparisons']:,} comparisons instead of {case['all_pairs']:,} "
+                  f"({case['skipped_blocks']} oversized blocks skipped)")
+            print(f"  precision {case['precision']:.4f}, recall {case['recall']:.4f}, "
+                  f"{case['merged']:,} merged, {case['remaining']:,} left, "
+                  f"{'consistent' if case['consistent'] else 'INCONSISTENT'}")
+            print(f"  {case['conflicts']:,} matches refused for joining two contractor ids, "
+                  f"{case['joined_ids']} clusters with two ids")
+
+    with open(args.output, 'w') as f:
+        json.dump({'duplicate_rate': args.duplicate_rate, 'seed': args.seed, 'results': results}, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+    failures = [f"{case['rows']} rows" for case in results
+                if case['precision'] < args.min_precision or case['recall'] < args.min_recall or not case['consistent']
+                or case['joined_ids']]
+    if failures:
+        print(f"\n✗ Below precision {args.min_precision} / recall {args.min_recall}, inconsistent, "
+              f"or merged different contractor ids: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n✓ All sizes meet the precision and recall thresholds")
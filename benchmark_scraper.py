@@ -0,0 +1,208 @@
+"""
+Scraper Benchmark and Regression Harness
+Serves the recorded page fixtures (plus synthetic variants with 10x/100x the cards per page)
+from a local server, times each extraction strategy, and checks the records against a golden output
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import re
+import resource
+import sys
+import time
+from contextlib import redirect_stdout
+from fixture_server import FixtureServer
+
+FIXTURES = ['page_source.html', 'page_source_debug.html']
+GOLDEN_FILE = 'page_source_golden.json'
+RESULTS_FILE = 'scraper_benchmark.json'
+
+# parse: in-memory HTML; http: pooled fetch + parse; html/js/webdriver: headless Chrome + that extraction mode
+STRATEGIES = ('parse', 'http')
+BROWSER_STRATEGIES = ('html', 'js', 'webdriver')
+
+CARD_PATTERN = re.compile(r'<article class="certification-card">.*?</article>', re.S)
+CONTRACTOR_ID_PATTERN = re.compile(r'(contractor_id&quot;:&quot;)\d+(&quot;)')
+
+
+def synthetic_id(page, index):
+    return f"9{page:03d}{index:05d}"
+
+
+def synthesize_pages(base_html, factor, pages):
+    """
+    Multi-page variant of a recorded page with `factor` times as many cards per page.
+    Cards are cloned in order and given unique contractor_ids so none of them dedup away.
+    """
+    cards = CARD_PATTERN.findall(base_html)
+    first = base_html.index(cards[0])
+    last = base_html.rindex(cards[-1]) + len(cards[-1])
+    prefix, suffix = base_html[:first], base_html[last:]
+
+    result = []
+    for page in range(1, pages + 1):
+        clones = []
+        for index in range(len(cards) * factor):
+            card = cards[index % len(cards)]
+            clones.append(CONTRACTOR_ID_PATTERN.sub(rf"\g<1>{synthetic_id(page, index)}\g<2>", card))
+        result.append(prefix + '\n'.join(clones) + suffix)
+    return result
+
+
+def expected_synthetic(golden, factor, pages):
+    """What synthesize_pages() should extract to, derived from the golden records"""
+    expected = []
+    for page in range(1, pages + 1):
+        for index in range(len(golden) * factor):
+            record = dict(golden[index % len(golden)])
+            record['contractor_id'] = synthetic_id(page, index)
+            expected.append(record)
+    return expected
+
+
+def run_case(strategy, url, page_count):
+    """Run one strategy in a fresh process so its peak RSS is its own"""
+    from scraper import ContractorScraper
+
+    stdout = io.StringIO()
+    start = time.perf_counter()
+
+    with redirect_stdout(stdout):
+        if strategy == 'parse':
+            from fetcher import HttpFetcher
+            with HttpFetcher() as fetcher:
+                pages = fetcher.fetch_many([f"{url}?page={page}" for page in range(1, page_count + 1)])
+            scraper = ContractorScraper()
+            start = time.perf_counter()
+            for html in pages:
+                scraper.extract_from_html(html)
+
+        elif strategy == 'http':
+            scraper = ContractorScraper(backend='http', base_url=url)
+            scraper.scrape_with_http()
+
+        else:
+            from browser import create_chrome
+            from scraper import CARD_SELECTOR
+            from waits import PageWaiter
+
+            scraper = ContractorScraper(extraction_mode=strategy)
+            driver = create_chrome(profile='lean', headless=True, user_data_dir='.chrome-profile/benchmark')
+            try:
+                waiter = PageWaiter(driver, CARD_SELECTOR)
+                start = time.perf_counter()
+                for page in range(1, page_count + 1):
+                    driver.get(f"{url}?page={page}")
+                    waiter.wait_for_cards(settle=0.2)
+                    scraper.extract_loaded_page(driver)
+            finally:
+                driver.quit()
+
+    seconds = time.perf_counter() - start
+    stats = scraper.extraction_stats
+    return {
+        'seconds': seconds,
+        'pages': stats['pages'],
+        'cards': stats['cards'],
+        'extract_seconds': stats['seconds'],
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'records': scraper.contractors
+    }
+
+
+def build_datasets(golden, factors, pages):
+    base_pages = []
+    for filename in FIXTURES:
+        with open(filename, 'r', encoding='utf-8') as f:
+            base_pages.append(f.read())
+
+    datasets = [('fixtures', base_pages, golden)]
+    for factor in factors:
+        datasets.append((
+            f"x{factor}",
+            synthesize_pages(base_pages[0], factor, pages),
+            expected_synthetic(golden, factor, pages) if golden is not None else None
+        ))
+    return datasets
+
+
+def update_golden():
+    from scraper import ContractorScraper
+
+    scraper = ContractorScraper()
+    with redirect_stdout(io.StringIO()):
+        for filename in FIXTURES:
+            scraper.extract_from_file(filename)
+    with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+        json.dump(scraper.contractors, f, indent=2, ensure_ascii=False)
+    print(f"✓ Golden output ({len(scraper.contractors)} records) saved to {GOLDEN_FILE}")
+
+
+def run_benchmark(strategies, factors, pages, latency):
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+
+    results = []
+    failures = []
+    context = multiprocessing.get_context('spawn')
+
+    for name, html_pages, expected in build_datasets(golden, factors, pages):
+        with FixtureServer(html_pages, latency=latency) as server:
+            for strategy in strategies:
+                with context.Pool(1) as pool:
+                    case = pool.apply(run_case, (strategy, server.url, len(html_pages)))
+
+                records = case.pop('records')
+                matches = records == expected
+                if not matches:
+                    failures.append(f"{name}/{strategy}")
+
+                case.update({
+                    'dataset': name,
+                    'strategy': strategy,
+                    'records': len(records),
+                    'pages_per_sec': case['pages'] / case['seconds'] if case['seconds'] else 0,
+                    'cards_per_sec': case['cards'] / case['extract_seconds'] if case['extract_seconds'] else 0,
+                    'matches_golden': matches
+                })
+                results.append(case)
+                print(f"{name:10s} {strategy:10s} {case['pages']:5d} {case['cards']:7d} "
+                      f"{case['pages_per_sec']:10.1f} {case['cards_per_sec']:11.1f} "
+                      f"{case['peak_rss_mb']:9.1f}   {'✓' if matches else '✗ DIVERGED'}")
+
+    return results, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scraper extraction strategies on recorded pages")
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES + BROWSER_STRATEGIES, default=list(STRATEGIES),
+                        help="Browser strategies (html, js, webdriver) need Chrome")
+    parser.add_argument('--factors', nargs='*', type=int, default=[10, 100],
+                        help="Synthetic variants with N times the cards per page")
+    parser.add_argument('--pages', type=int, default=5, help="Pages per synthetic variant")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds of server latency per request")
+    parser.add_argument('--update-golden', action='store_true', help=f"Rewrite {GOLDEN_FILE} from the fixtures")
+    parser.add_argument('--output', default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    if args.update_golden:
+        update_golden()
+        sys.exit(0)
+
+    print("\n" + "="*80)
+    print("SCRAPER BENCHMARK")
+    print("="*80)
+    print(f"\n{'dataset':10s} {'strategy':10s} {'pages':>5s} {'cards':>7s} "
+          f"{'pages/sec':>10s} {'cards/sec':>11s} {'peak MB':>9s}   golden")
+
+    results, failures = run_benchmark(args.strategies, args.factors, args.pages, args.latency)
+
+    with open(args.output, 'w') as f:
+        json.dump({'latency': args.latency, 'pages': args.pages, 'results': results}, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+    if failures:
+        print(f"\n✗ Extracted records diverged from {GOLDEN_FILE}: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n✓ All strategies match the golden output")
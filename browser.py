@@ -0,0 +1,203 @@
+"""
+Chrome Profiles for the Scraper
+"default" is the stock browser; "lean" is headless, reuses a user-data dir, and blocks images,
+fonts, media and third-party trackers through CDP so only the card markup is downloaded
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from selenium import webdriver
+from waits import PageWaiter, DEFAULT_TIMEOUT
+
+PROFILES = ('default', 'lean')
+PROFILE_DIR = '.chrome-profile'
+CACHE_STATES = ('cold', 'warm')  # first load in a fresh user-data dir, then a reload on the same dir
+
+# Passed to CDP Network.setBlockedURLs; '*' matches any run of characters
+BLOCKED_RESOURCE_PATTERNS = [
+    '*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*',
+    '*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*',
+    '*.mp4*', '*.webm*', '*.mp3*', '*.m3u8*',
+]
+
+# Analytics, ads and session-recording hosts seen on the GAF results page.
+# maps.googleapis.com is deliberately not blocked: the search may rely on it to resolve the postal code.
+BLOCKED_TRACKER_PATTERNS = [
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*',
+    '*connect.facebook.net*', '*snap.licdn.com*', '*bat.bing.com*', '*clarity.ms*',
+    '*hotjar.com*', '*hs-analytics.net*', '*hs-banner.com*', '*go-mpulse.net*',
+    '*js.monitor.azure.com*', '*invocacdn.com*', '*contobox.com*', '*mpeasylink.com*',
+    '*cdn.cookielaw.org*',
+]
+
+
+def create_chrome(profile='default', headless=False, user_data_dir=None, performance_log=False):
+    """
+    Launch Chrome with the given profile.
+    user_data_dir: the profile directory; lean falls back to PROFILE_DIR, default to a throwaway one.
+    performance_log records DevTools network events so bytes transferred can be measured.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown browser profile: {profile}")
+
+    options = webdriver.ChromeOptions()
+    if performance_log:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    if profile == 'lean' or user_data_dir:
+        # A reused profile keeps the HTTP cache and cookie consent between runs
+        options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir or PROFILE_DIR)}")
+
+    if profile == 'default' and not headless:
+        driver = webdriver.Chrome(options=options)
+        driver.maximize_window()
+        return driver
+
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+
+    if profile == 'lean':
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--mute-audio")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+
+    driver = webdriver.Chrome(options=options)
+
+    if profile == 'lean':
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {
+            'urls': BLOCKED_RESOURCE_PATTERNS + BLOCKED_TRACKER_PATTERNS
+        })
+
+    return driver
+
+
+def bytes_transferred(driver):
+    """Sum of encoded bytes for every finished request in the performance log since the last call"""
+    total = 0
+    requests = 0
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message.get('method') == 'Network.loadingFinished':
+            total += message['params'].get('encodedDataLength', 0)
+            requests += 1
+    return total, requests
+
+
+def _timed_load(profile, url, card_selector, timeout, headless, user_data_dir):
+    """Time from navigation until the cards have rendered and the network is idle, in a new browser"""
+    driver = create_chrome(profile=profile, headless=headless, user_data_dir=user_data_dir, performance_log=True)
+    try:
+        waiter = PageWaiter(driver, card_selector, timeout=timeout)
+        start = time.perf_counter()
+        driver.get(url)
+        cards = waiter.wait_for_cards()
+        cards_seconds = time.perf_counter() - start
+        waiter.wait_for_network_idle()
+        idle_seconds = time.perf_counter() - start
+        total_bytes, requests = bytes_transferred(driver)
+    finally:
+        driver.quit()
+
+    return {
+        'cards': cards,
+        'cards_seconds': cards_seconds,
+        'idle_seconds': idle_seconds,
+        'bytes': total_bytes,
+        'requests': requests
+    }
+
+
+def measure_page_load(profile, url, card_selector, timeout=DEFAULT_TIMEOUT, headless=None):
+    """
+    A cold load in a fresh user-data dir, then a warm one in a second browser on the same dir, so
+    neither profile benefits from a cache the other lacks. headless defaults to how the scraper runs
+    the profile: lean is always headless, default is the visible browser.
+    """
+    headless = profile == 'lean' if headless is None else headless
+    with tempfile.TemporaryDirectory(prefix='chrome-profile-') as user_data_dir:
+        return {state: _timed_load(profile, url, card_selector, timeout, headless, user_data_dir)
+                for state in CACHE_STATES}
+
+
+def _medians(samples):
+    return {key: statistics.median(sample[key] for sample in samples)
+            for key in ('cards_seconds', 'idle_seconds', 'bytes', 'requests')}
+
+
+def _savings(default, lean):
+    return {
+        'cards_seconds_pct': round(100 * (1 - lean['cards_seconds'] / default['cards_seconds']), 1)
+        if default['cards_seconds'] else 0,
+        'bytes_pct': round(100 * (1 - lean['bytes'] / default['bytes']), 1) if default['bytes'] else 0,
+    }
+
+
+def run_benchmark(url, card_selector, runs=3, timeout=DEFAULT_TIMEOUT, default_headless=False):
+    """
+    Compare page-load time and bytes transferred for each profile, cold and warm. The default profile
+    runs visible, as the scraper runs it, unless default_headless (e.g. on a machine without a display).
+    """
+    results = {}
+    for profile in PROFILES:
+        headless = default_headless if profile == 'default' else None
+        samples = []
+        for run in range(1, runs + 1):
+            sample = measure_page_load(profile, url, card_selector, timeout, headless)
+            samples.append(sample)
+            for state in CACHE_STATES:
+                print(f"   {profile:8s} {state} run {run}: cards in {sample[state]['cards_seconds']:.2f}s, idle in "
+                      f"{sample[state]['idle_seconds']:.2f}s, {sample[state]['bytes'] / 1024:.0f} KB over "
+                      f"{sample[state]['requests']} requests")
+
+        results[profile] = {state: _medians([sample[state] for sample in samples]) for state in CACHE_STATES}
+        results[profile]['runs'] = runs
+        results[profile]['headless'] = profile == 'lean' or bool(headless)
+
+    results['savings'] = {state: _savings(results['default'][state], results['lean'][state]) for state in CACHE_STATES}
+    return results
+
+
+if __name__ == "__main__":
+    from scraper import ContractorScraper, CARD_SELECTOR
+
+    parser = argparse.ArgumentParser(description="Benchmark the default and lean Chrome profiles")
+    parser.add_argument('--zipcode', default="10013")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--wait-timeout', type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument('--default-headless', action='store_true',
+                        help="Run the default profile headless too (no display); it is visible in the scraper")
+    parser.add_argument('--output', default='browser_benchmark.json')
+    args = parser.parse_args()
+
+    url = ContractorScraper(zipcode=args.zipcode).results_url()
+    print("\n" + "="*80)
+    print("BROWSER PROFILE BENCHMARK")
+    print("="*80)
+    print(f"URL: {url}\n")
+
+    results = run_benchmark(url, CARD_SELECTOR, runs=args.runs, timeout=args.wait_timeout,
+                            default_headless=args.default_headless)
+
+    print("\nMEDIANS:")
+    for profile in PROFILES:
+        for state in CACHE_STATES:
+            r = results[profile][state]
+            print(f"{profile:8s} {state}: cards {r['cards_seconds']:.2f}s, idle {r['idle_seconds']:.2f}s, "
+                  f"{r['bytes'] / 1024:.0f} KB, {r['requests']:.0f} requests")
+    print()
+    for state in CACHE_STATES:
+        savings = results['savings'][state]
+        print(f"Lean saves {savings['cards_seconds_pct']}% load time and {savings['bytes_pct']}% bytes ({state})")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
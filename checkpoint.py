@@ -0,0 +1,189 @@
+"""
+Streaming scraper output with page checkpoints
+Each accepted contractor is appended to a JSONL file as it is extracted, and after every
+completed page a checkpoint records where to resume if the run dies
+"""
+import json
+import os
+import time
+
+STREAM_FILE = 'contractors_raw.jsonl'
+READ_CHUNK_SIZE = 1 << 16
+
+
+def iter_jsonl(filename):
+    """Yield one contractor per line without loading the file"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_json_array(filename, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the elements of a top-level JSON array (e.g. contractors_raw.json) one at a time,
+    decoding from a buffer of roughly chunk_size characters rather than the whole file
+    """
+    decoder = json.JSONDecoder()
+    with open(filename, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{filename} does not contain a JSON array")
+        buffer = buffer[1:]
+
+        while True:
+            buffer = buffer.lstrip()
+            if buffer.startswith(','):
+                buffer = buffer[1:].lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # Usually an element cut off by the chunk boundary: read more and retry
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+def iter_records(filename):
+    """Contractors from a .jsonl stream or a JSON array file, read incrementally either way"""
+    if filename.endswith('.jsonl'):
+        return iter_jsonl(filename)
+    return iter_json_array(filename)
+
+
+def stream_complete(checkpoint_file, offset=None):
+    """
+    True once the writer's last checkpoint marks its run finished and, given the reader's offset,
+    the reader has got as far as the writer's final one
+    """
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return bool(checkpoint.get('complete')) and (offset is None or checkpoint.get('offset', 0) <= offset)
+
+
+def follow_jsonl(filename, batch_size, poll=1.0, idle_timeout=None, checkpoint_file=None):
+    """
+    Tail a JSONL stream that a scraper is still writing, yielding lists of up to batch_size new
+    records as complete lines appear. A trailing line without its newline is left for the next poll.
+    Stops once the writer's checkpoint says the run is complete and everything has been read,
+    or after idle_timeout seconds with no new records.
+    """
+    checkpoint_file = checkpoint_file or f"{filename}.checkpoint"
+    offset = 0
+    last_data = time.monotonic()
+
+    while True:
+        batch = []
+        if os.path.exists(filename):
+            if os.path.getsize(filename) < offset:
+                # A resumed scraper truncated back to its last checkpoint; its records are re-appended
+                print(f"⚠️  {filename} was truncated, re-reading from the new end")
+                offset = os.path.getsize(filename)
+
+            with open(filename, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    offset += len(line)
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError:
+                        print(f"⚠️  Skipping unreadable line ending at byte {offset}")
+                        continue
+                    if len(batch) >= batch_size:
+                        break
+
+        if batch:
+            last_data = time.monotonic()
+            yield batch
+            continue
+
+        if stream_complete(checkpoint_file, offset):
+            return
+        if idle_timeout is not None and time.monotonic() - last_data >= idle_timeout:
+            print(f"✓ No new records for {idle_timeout}s, stopped following {filename}")
+            return
+        time.sleep(poll)
+
+
+class ContractorStream:
+    def __init__(self, filename=STREAM_FILE, checkpoint_file=None):
+        self.filename = filename
+        self.checkpoint_file = checkpoint_file or f"{filename}.checkpoint"
+        self.count = 0
+        self.file = None
+
+    def load_checkpoint(self, zipcode):
+        """The last checkpoint for this zipcode if that run did not finish, else None"""
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('zipcode') != zipcode or checkpoint.get('complete'):
+            return None
+        return checkpoint
+
+    def open(self, checkpoint=None):
+        """
+        Start a fresh stream, or reopen it at the checkpoint offset when resuming.
+        Anything written after the last checkpoint belongs to a half-finished page and is discarded,
+        so records never appear twice.
+        """
+        if checkpoint and os.path.exists(self.filename):
+            self.file = open(self.filename, 'r+b')
+            self.file.truncate(checkpoint['offset'])
+            self.file.seek(checkpoint['offset'])
+            self.count = checkpoint['count']
+        else:
+            # The previous run's checkpoint (possibly marked complete) must not describe the new stream,
+            # or a follower would stop before reading it
+            try:
+                os.remove(self.checkpoint_file)
+            except FileNotFoundError:
+                pass
+            self.file = open(self.filename, 'wb')
+            self.count = 0
+        return self
+
+    def append(self, contractor):
+        self.file.write(json.dumps(contractor, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.count += 1
+
+    def save_checkpoint(self, zipcode, page, seen_ids, complete=False):
+        """Flush the stream to disk, then atomically record how far the run got"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        checkpoint = {
+            'zipcode': zipcode,
+            'last_completed_page': page,
+            'offset': self.file.tell(),
+            'count': self.count,
+            'seen_ids': sorted(seen_ids),
+            'complete': complete
+        }
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
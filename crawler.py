@@ -0,0 +1,266 @@
+"""
+Territory Crawl Coordinator
+Fans a list of zipcodes out across a pool of headless Chrome workers and merges the results
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from scraper import ContractorScraper, contractor_key, EXTRACTION_MODES, BACKENDS
+from waits import DEFAULT_TIMEOUT
+from browser import PROFILES, PROFILE_DIR
+from delta import FingerprintIndex, write_delta
+from tiling import TileScheduler, load_centroids, territory_zips
+
+# Rough resident size of one headless Chrome plus its chromedriver
+MEMORY_PER_BROWSER_MB = 600
+# Contractors each tile has found before, kept apart from the --delta state so tile yields are
+# measured whether or not deltas are written
+TILE_STATE_FILE = 'tile_fingerprints.json'
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo, or None where that is not available"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def default_worker_count(memory_per_browser_mb=MEMORY_PER_BROWSER_MB):
+    """One browser per core, capped by how many browsers fit in free memory"""
+    workers = os.cpu_count() or 1
+    memory_mb = available_memory_mb()
+    if memory_mb:
+        workers = min(workers, memory_mb // memory_per_browser_mb)
+    return max(1, workers)
+
+
+def _init_worker(verbose):
+    # Per-card progress from several browsers at once is unreadable; keep only the coordinator's output
+    if not verbose:
+        sys.stdout = open(os.devnull, 'w')
+
+
+def crawl_zipcode(zipcode, options):
+    """Worker: scrape one zipcode in its own headless browser"""
+    start = time.perf_counter()
+    scraper = ContractorScraper(
+        zipcode=zipcode,
+        extraction_mode=options['mode'],
+        wait_timeout=options['wait_timeout'],
+        distance=options['distance'],
+        headless=True,
+        backend=options['backend'],
+        browser_profile=options['profile'],
+        # Chrome locks its user-data dir, so each worker process reuses its own
+        user_data_dir=os.path.join(PROFILE_DIR, f"worker-{os.getpid()}")
+    )
+    contractors = scraper.scrape_contractors()
+    if not scraper.completed:
+        # scrape_with_browser reports timeouts and crashes and returns what it had; that is not this zipcode's result
+        raise RuntimeError(f"crawl stopped before the last page ({len(contractors)} contractors so far)")
+    return {
+        'zipcode': zipcode,
+        'contractors': contractors,
+        'seconds': time.perf_counter() - start,
+        'summary': scraper.run_summary
+    }
+
+
+class CrawlCoordinator:
+    def __init__(self, zipcodes, workers=None, distance=25, mode='js', wait_timeout=DEFAULT_TIMEOUT, verbose=False,
+                 backend='selenium', profile='lean', retries=1):
+        # Keep the caller's order but never crawl the same center twice
+        self.zipcodes = list(dict.fromkeys(zipcodes))
+        self.workers = workers or default_worker_count()
+        self.options = {'distance': distance, 'mode': mode, 'wait_timeout': wait_timeout, 'backend': backend,
+                        'profile': profile}
+        self.verbose = verbose
+        self.retries = retries
+        self.contractors = []
+        self.seen_ids = set()
+        self.zipcode_results = {}
+        self.keys_by_zipcode = {}
+        self.summary = {}
+
+    def merge(self, contractors):
+        """Add a worker's contractors, skipping ones already found from an overlapping radius"""
+        new_count = 0
+        for contractor in contractors:
+            unique_id = contractor_key(contractor)
+            if unique_id not in self.seen_ids:
+                self.seen_ids.add(unique_id)
+                self.contractors.append(contractor)
+                new_count += 1
+        return new_count
+
+    def contractors_by_zipcode(self):
+        """
+        zipcode -> every contractor its crawl found, including ones first merged from another zipcode.
+        Only zipcodes whose crawl completed are included; failed ones are left out entirely.
+        """
+        by_key = {contractor_key(contractor): contractor for contractor in self.contractors}
+        return {zipcode: [by_key[key] for key in keys] for zipcode, keys in self.keys_by_zipcode.items()}
+
+    def run(self):
+        print("\n" + "="*80)
+        print(f"TERRITORY CRAWL - {len(self.zipcodes)} zipcodes across {self.workers} workers")
+        print("="*80)
+
+        start = time.perf_counter()
+        failed = self.zipcodes
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.verbose,)) as pool:
+            # Zipcodes that failed or did not finish are crawled again, up to retries more times
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    print(f"\n↻ Retrying {len(failed)} failed zipcodes (attempt {attempt + 1})")
+                futures = {pool.submit(crawl_zipcode, zipcode, self.options): zipcode for zipcode in failed}
+                failed = []
+
+                for done, future in enumerate(as_completed(futures), 1):
+                    zipcode = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"[{done}/{len(futures)}] ✗ {zipcode}: {e}")
+                        failed.append(zipcode)
+                        continue
+
+                    found = len(result['contractors'])
+                    new_count = self.merge(result['contractors'])
+                    self.keys_by_zipcode[zipcode] = [contractor_key(contractor) for contractor in result['contractors']]
+                    self.zipcode_results[zipcode] = {
+                        'found': found,
+                        'new': new_count,
+                        'seconds': round(result['seconds'], 2),
+                        'timings': result['summary'].get('timings')
+                    }
+                    print(f"[{done}/{len(futures)}] ✓ {zipcode}: {found} found, {new_count} new "
+                          f"({result['seconds']:.1f}s) - total {len(self.contractors)}")
+                if not failed:
+                    break
+
+        elapsed = time.perf_counter() - start
+        minutes = elapsed / 60 if elapsed > 0 else 0
+        self.summary = {
+            'zipcodes': len(self.zipcodes),
+            'failed_zipcodes': failed,
+            'workers': self.workers,
+            'contractors': len(self.contractors),
+            'seconds': round(elapsed, 2),
+            'zipcodes_per_min': round(len(self.zipcode_results) / minutes, 2) if minutes else 0,
+            'contractors_per_min': round(len(self.contractors) / minutes, 2) if minutes else 0,
+            'by_zipcode': self.zipcode_results
+        }
+
+        print("\n" + "="*80)
+        print("🎉 CRAWL COMPLETE!")
+        print("="*80)
+        print(f"Unique contractors: {len(self.contractors)}")
+        print(f"Elapsed: {elapsed:.1f}s")
+        print(f"Throughput: {self.summary['zipcodes_per_min']:.1f} zipcodes/min, "
+              f"{self.summary['contractors_per_min']:.1f} contractors/min")
+        if failed:
+            print(f"⚠️  Failed zipcodes: {', '.join(failed)}")
+
+        return self.contractors
+
+    def save(self, filename='contractors_raw.json', summary_filename='crawl_summary.json'):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.contractors, f, indent=2, ensure_ascii=False)
+        with open(summary_filename, 'w', encoding='utf-8') as f:
+            json.dump(self.summary, f, indent=2)
+        print(f"\n✓ Data saved to {filename}")
+        print(f"✓ Crawl summary saved to {summary_filename}")
+
+
+def record_yields(tracker, contractors_by_zipcode, state_file=TILE_STATE_FILE):
+    """
+    Record each completed tile's yield as the contractors it found that no earlier crawl of the same
+    tile had, so the result does not depend on which overlapping tile finished first in this run
+    """
+    index = FingerprintIndex(state_file)
+    for zipcode, contractors in contractors_by_zipcode.items():
+        known = index.areas.get(zipcode, {})
+        new = len({contractor_key(contractor) for contractor in contractors} - known.keys())
+        tracker.record(zipcode, len(contractors), new)
+    _, crawled = index.diff(contractors_by_zipcode)
+    index.save(crawled)
+
+
+def read_zipcodes(filename):
+    """One zipcode per line; blank lines and # comments are ignored"""
+    with open(filename, 'r') as f:
+        return [line.split('#')[0].strip() for line in f if line.split('#')[0].strip()]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crawl many zipcodes in parallel")
+    parser.add_argument('zipcodes', nargs='*', help="Zipcodes to crawl")
+    parser.add_argument('--zipcodes-file', help="File with one zipcode per line")
+    parser.add_argument('--states', nargs='*', default=[],
+                        help="Crawl a whole territory: plan covering tiles and crawl the ones due (see tiling.py)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f"Browser processes (default: cores, capped at free memory / {MEMORY_PER_BROWSER_MB}MB)")
+    parser.add_argument('--distance', type=int, default=25)
+    parser.add_argument('--mode', choices=EXTRACTION_MODES, default='js')
+    parser.add_argument('--backend', choices=BACKENDS, default='selenium')
+    parser.add_argument('--profile', choices=PROFILES, default='lean')
+    parser.add_argument('--wait-timeout', type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument('--retries', type=int, default=1, help="Times to re-crawl a zipcode that failed or did not finish")
+    parser.add_argument('--verbose', action='store_true', help="Show each worker's per-page output")
+    parser.add_argument('--output', default='contractors_raw.json')
+    parser.add_argument('--delta', action='store_true',
+                        help="Also write contractors_delta.json with only new/changed/disappeared contractors")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    zipcodes = list(args.zipcodes)
+    if args.zipcodes_file:
+        zipcodes.extend(read_zipcodes(args.zipcodes_file))
+    
+    scheduler = None
+    if args.states:
+        scheduler = TileScheduler(territory_zips(load_centroids(), states=args.states), radius=args.distance)
+        due = scheduler.due_tiles()
+        scheduler.print_plan(due)
+        zipcodes.extend(tile['zip'] for tile in due)
+
+    if not zipcodes:
+        print("✗ No zipcodes given. Pass them as arguments or with --zipcodes-file")
+        sys.exit(1)
+
+    coordinator = CrawlCoordinator(
+        zipcodes,
+        workers=args.workers,
+        distance=args.distance,
+        mode=args.mode,
+        wait_timeout=args.wait_timeout,
+        verbose=args.verbose,
+        backend=args.backend,
+        profile=args.profile,
+        retries=args.retries
+    )
+    coordinator.run()
+    coordinator.save(filename=args.output)
+    if scheduler:
+        # Failed and unfinished tiles are not recorded, so they stay due
+        record_yields(scheduler.tracker, coordinator.contractors_by_zipcode())
+        scheduler.tracker.save()
+        print(f"✓ Tile yields saved to {scheduler.tracker.filename}")
+    if args.delta:
+        # Only zipcodes crawled to their last page are diffed; failed or unfinished ones (and the rest of
+        # the territory) keep their previous fingerprints
+        write_delta(coordinator.contractors_by_zipcode())
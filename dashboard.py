@@ -3,11 +3,18 @@ Instalily Sales Intelligence Dashboard - Enhanced Version
 With powerful features for sales teams
 """
 from flask import Flask, render_template_string, jsonify, request, send_file
-import sqlite3
 import json
 from datetime import datetime
 import csv
+import html
 import io
+import os
+import re
+import tempfile
+from functools import lru_cache
+from db import DB_FILE, connection
+from database import ContractorDatabase, RATING_BUCKETS
+from snapshot import export_snapshot_archive, require_pyarrow
 
 app = Flask(__name__)
 
@@ -449,6 +456,22 @@ HTML_TEMPLATE = """
             font-size: 1.2rem;
         }
         
+        .search-snippet {
+            color: #555;
+            font-size: 0.9rem;
+            margin-bottom: 10px;
+        }
+        
+        .search-snippet mark {
+            background: #fff3b0;
+            padding: 0 2px;
+        }
+        
+        .load-more {
+            grid-column: 1 / -1;
+            text-align: center;
+        }
+        
         .modal {
             display: none;
             position: fixed;
@@ -572,6 +595,9 @@ HTML_TEMPLATE = """
             <button class="action-btn" onclick="generateReport()">
                 📄 Generate Report
             </button>
+            <button class="action-btn secondary" onclick="exportSnapshot()">
+                🗄️ Analytics Snapshot
+            </button>
         </div>
         
         <div class="stats">
@@ -600,7 +626,7 @@ HTML_TEMPLATE = """
         <div class="filters">
             <div class="filter-group">
                 <label for="search">🔍 Search Contractors</label>
-                <input type="text" id="search" placeholder="Search by name or location...">
+                <input type="text" id="search" placeholder="Search names, locations, certifications, insights...">
             </div>
             <div class="filter-group">
                 <label for="min-rating">⭐ Minimum Rating</label>
@@ -628,6 +654,7 @@ HTML_TEMPLATE = """
                     <option value="rating_asc">Rating (Low to High)</option>
                     <option value="name_asc">Name (A-Z)</option>
                     <option value="name_desc">Name (Z-A)</option>
+                    <option value="momentum_desc">Momentum (30 days)</option>
                 </select>
             </div>
         </div>
@@ -653,6 +680,11 @@ HTML_TEMPLATE = """
     
     <script>
         let allContractors = [];
+        let searchResults = [];
+        let searchPage = 1;
+        let searchHasMore = false;
+        let searchSeq = 0;
+        let searchTimer = null;
         let priorityList = new Set(JSON.parse(localStorage.getItem('priorityList') || '[]'));
         let contactedList = new Set(JSON.parse(localStorage.getItem('contactedList') || '[]'));
         let contractorNotes = JSON.parse(localStorage.getItem('contractorNotes') || '{}');
@@ -662,7 +694,10 @@ HTML_TEMPLATE = """
             updatePriorityCount();
             
             // Auto-filter on input
-            document.getElementById('search').addEventListener('input', applyFilters);
+            document.getElementById('search').addEventListener('input', () => {
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(() => runSearch(1), 150);
+            });
             document.getElementById('min-rating').addEventListener('change', applyFilters);
             document.getElementById('status-filter').addEventListener('change', applyFilters);
             document.getElementById('sort').addEventListener('change', applyFilters);
@@ -679,16 +714,38 @@ HTML_TEMPLATE = """
             }
         }
         
+        async function runSearch(page) {
+            const search = document.getElementById('search').value.trim();
+            const seq = ++searchSeq;
+            if (!search) {
+                searchResults = [];
+                searchHasMore = false;
+                applyFilters();
+                return;
+            }
+            
+            try {
+                const response = await fetch(`/api/search?q=${encodeURIComponent(search)}&page=${page}&per_page=50`);
+                const data = await response.json();
+                if (seq !== searchSeq) return;  // a newer search has started
+                searchResults = page === 1 ? data.results : searchResults.concat(data.results);
+                searchPage = page;
+                searchHasMore = data.has_more;
+                applyFilters();
+            } catch (error) {
+                document.getElementById('contractors-list').innerHTML = 
+                    '<div class="no-results">Search failed</div>';
+            }
+        }
+        
         function applyFilters() {
-            const search = document.getElementById('search').value.toLowerCase();
+            const search = document.getElementById('search').value.trim();
             const minRating = parseFloat(document.getElementById('min-rating').value);
             const statusFilter = document.getElementById('status-filter').value;
             const sort = document.getElementById('sort').value;
             
-            let filtered = allContractors.filter(c => {
-                const matchesSearch = !search || 
-                    c.name.toLowerCase().includes(search) || 
-                    (c.address && c.address.toLowerCase().includes(search));
+            // Matching happens server-side (/api/search); results arrive in relevance order
+            let filtered = (search ? searchResults : allContractors).filter(c => {
                 const matchesRating = c.rating >= minRating;
                 
                 let matchesStatus = true;
@@ -696,32 +753,57 @@ HTML_TEMPLATE = """
                 if (statusFilter === 'contacted') matchesStatus = contactedList.has(c.id);
                 if (statusFilter === 'not-contacted') matchesStatus = !contactedList.has(c.id);
                 
-                return matchesSearch && matchesRating && matchesStatus;
+                return matchesRating && matchesStatus;
             });
             
-            filtered.sort((a, b) => {
+            if (!search) filtered.sort((a, b) => {
                 if (sort === 'rating_desc') return b.rating - a.rating;
                 if (sort === 'rating_asc') return a.rating - b.rating;
                 if (sort === 'name_asc') return a.name.localeCompare(b.name);
                 if (sort === 'name_desc') return b.name.localeCompare(a.name);
+                if (sort === 'momentum_desc') return (b.momentum.reviews - a.momentum.reviews) || (b.momentum.rating - a.momentum.rating);
                 return 0;
             });
             
-            displayContractors(filtered);
+            displayContractors(filtered, search && searchHasMore);
+        }
+        
+        // Phones are stored as E.164 (+18625295991); show US numbers the familiar way
+        function formatPhone(phone) {
+            if (phone && phone.length === 12 && phone.startsWith('+1')) {
+                return `(${phone.slice(2, 5)}) ${phone.slice(5, 8)}-${phone.slice(8)}`;
+            }
+            return phone || 'N/A';
         }
         
-        function displayContractors(contractors) {
+        // Reviews gained and rating change over the last 30 days, or '' if neither moved
+        function formatMomentum(m) {
+            if (!m || (!m.reviews && !m.rating)) return '';
+            const parts = [];
+            if (m.reviews) parts.push(`${m.reviews > 0 ? '+' : ''}${m.reviews} reviews`);
+            if (m.rating) parts.push(`${m.rating > 0 ? '+' : ''}${m.rating.toFixed(2)}★`);
+            return parts.join(', ');
+        }
+        
+        function displayContractors(contractors, hasMore = false) {
             const container = document.getElementById('contractors-list');
             
-            if (contractors.length === 0) {
+            if (contractors.length === 0 && !hasMore) {
                 container.innerHTML = '<div class="no-results">No contractors found</div>';
                 return;
             }
             
+            const more = hasMore ? `
+                <div class="load-more">
+                    <button class="btn-small btn-primary" onclick="runSearch(searchPage + 1)">More results</button>
+                </div>
+            ` : '';
+            
             container.innerHTML = contractors.map(c => {
                 const isPriority = priorityList.has(c.id);
                 const isContacted = contactedList.has(c.id);
                 const notes = contractorNotes[c.id] || '';
+                const momentum = formatMomentum(c.momentum);
                 
                 return `
                 <div class="contractor-card ${isPriority ? 'priority' : ''} ${isContacted ? 'contacted' : ''}" data-id="${c.id}">
@@ -735,10 +817,14 @@ HTML_TEMPLATE = """
                         <div class="rating">⭐ ${c.rating.toFixed(1)}</div>
                     </div>
                     
+                    ${c.snippet ? `<div class="search-snippet">🔎 ${c.snippet}</div>` : ''}
+                    
                     <div class="contractor-details">
                         <div class="detail-item">📍 <strong>Location:</strong> ${c.address || 'N/A'}</div>
-                        <div class="detail-item">📞 <strong>Phone:</strong> <a href="tel:${c.phone}">${c.phone || 'N/A'}</a></div>
+                        <div class="detail-item">📞 <strong>Phone:</strong> <a href="tel:${c.phone}">${formatPhone(c.phone)}</a></div>
                         ${c.website ? `<div class="detail-item">🌐 <strong>Website:</strong> <a href="${c.website}" target="_blank">Visit</a></div>` : ''}
+                        ${c.reviews_count != null ? `<div class="detail-item">💬 <strong>Reviews:</strong> ${c.reviews_count}</div>` : ''}
+                        ${momentum ? `<div class="detail-item">📈 <strong>30 days:</strong> ${momentum}</div>` : ''}
                     </div>
                     
                     ${c.certifications && c.certifications.length > 0 ? `
@@ -777,7 +863,7 @@ HTML_TEMPLATE = """
                         ${notes ? `<div class="saved-notes"><strong>Saved:</strong> ${notes}</div>` : ''}
                     </div>
                 </div>
-            `}).join('');
+            `}).join('') + more;
         }
         
         function togglePriority(id) {
@@ -841,7 +927,7 @@ HTML_TEMPLATE = """
                     <p>We'd love to discuss how our premium materials could support your continued success.</p>
                     <br>
                     <p><strong>Contact Information:</strong><br>
-                    Phone: ${contractor.phone}<br>
+                    Phone: ${formatPhone(contractor.phone)}<br>
                     ${contractor.website ? `Website: ${contractor.website}<br>` : ''}
                     Location: ${contractor.address}</p>
                     <br>
@@ -910,60 +996,168 @@ HTML_TEMPLATE = """
             window.location.href = '/export/report';
             showToast('Generating report...');
         }
+        
+        async function exportSnapshot() {
+            window.location.href = '/export/snapshot';
+            showToast('Building Parquet snapshot...');
+        }
     </script>
 </body>
 </html>
 """
 
 def get_db():
-    """Get database connection"""
-    return sqlite3.connect('contractors.db')
+    """Borrow a pooled database connection: `with get_db() as conn:`"""
+    return connection(DB_FILE)
+
+@lru_cache(maxsize=None)
+def contractor_database(db_name):
+    """ContractorDatabase for its query helpers; constructing one applies pending migrations, so once per file"""
+    return ContractorDatabase(db_name)
+
+def read_stats(conn):
+    """Headline numbers from the trigger-maintained stats row: one lookup however many contractors there are"""
+    cursor = conn.execute('SELECT * FROM stats WHERE id = 1')
+    row = dict(zip([column[0] for column in cursor.description], cursor.fetchone()))
+    row['avg_rating'] = row['rating_sum'] / row['rated'] if row['rated'] else 0
+    row['histogram'] = [(stars, row[f'stars_{stars}']) for stars in RATING_BUCKETS]
+    return row
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+# bm25 scores every match, so queries matching more than this are paged in index order instead
+SEARCH_RANK_LIMIT = 2000
+NEAR_RADIUS = 15  # miles
+NEAR_MAX_RADIUS = 250
+NEAR_LIMIT = 100
+NEAR_MAX_LIMIT = 1000
+# Control characters can't occur in scraped text, so they mark matches safely through html.escape
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'
+
+def fts_query(text):
+    """
+    Free text as an FTS5 query for search-as-you-type: every word must match, and the word still
+    being typed matches as a prefix ("gaf mast" finds "GAF Master Elite"). Finished words match
+    exactly, because a prefix longer than the indexed lengths has to merge every matching term.
+    """
+    terms = [f'"{term}"' for term in re.findall(r'\w+', text.lower())]
+    if terms and not text[-1:].isspace():
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+def highlight(snippet):
+    return html.escape(snippet or '').replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
 
 @app.route('/')
 def index():
     """Main dashboard page"""
-    conn = get_db()
-    cursor = conn.cursor()
+    with get_db() as conn:
+        row = read_stats(conn)
     
     stats = {
-        'total': cursor.execute('SELECT COUNT(*) FROM contractors').fetchone()[0],
-        'avg_rating': cursor.execute('SELECT AVG(rating) FROM contractors WHERE rating > 0').fetchone()[0] or 0,
-        'insights': cursor.execute('SELECT COUNT(*) FROM insights').fetchone()[0],
-        'high_value': cursor.execute('SELECT COUNT(*) FROM contractors WHERE rating >= 4.5').fetchone()[0]
+        'total': row['total'],
+        'avg_rating': row['avg_rating'],
+        'insights': row['insights'],
+        'high_value': row['high_rated']
     }
     
-    conn.close()
-    
     return render_template_string(HTML_TEMPLATE, stats=stats)
 
 @app.route('/api/contractors')
 def api_contractors():
     """API endpoint to get all contractors with insights"""
-    conn = get_db()
-    cursor = conn.cursor()
+    # Only the last MOMENTUM_DAYS of history are read; contractors without changes have none
+    momentum = contractor_database(DB_FILE).momentum()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT 
+                c.id,
+                c.name,
+                c.rating,
+                c.reviews_count,
+                c.address,
+                c.phone,
+                c.website,
+                i.insight_text
+            FROM contractors c
+            LEFT JOIN insights i ON c.id = i.contractor_id
+            ORDER BY c.rating DESC, c.name
+        ''')
+        
+        contractors = []
+        for row in cursor.fetchall():
+            contractor_id, name, rating, reviews_count, address, phone, website, insight = row
+            reviews_gained, rating_change = momentum.get(contractor_id, (0, 0.0))
+            
+            cursor.execute('SELECT certification_name FROM certifications WHERE contractor_id = ?', (contractor_id,))
+            certs = [r[0] for r in cursor.fetchall()]
+            
+            contractors.append({
+                'id': contractor_id,
+                'name': name,
+                'rating': rating or 0,
+                'reviews_count': reviews_count,
+                'momentum': {'reviews': reviews_gained, 'rating': rating_change},
+                'address': address,
+                'phone': phone,
+                'website': website,
+                'insight': insight,
+                'certifications': certs
+            })
     
-    cursor.execute('''
-        SELECT 
-            c.id,
-            c.name,
-            c.rating,
-            c.address,
-            c.phone,
-            c.website,
-            i.insight_text
-        FROM contractors c
-        LEFT JOIN insights i ON c.id = i.contractor_id
-        ORDER BY c.rating DESC, c.name
-    ''')
+    return jsonify(contractors)
+
+@app.route('/api/search')
+def api_search():
+    """Ranked, paginated full-text search over names, addresses, descriptions, certifications and insights"""
+    query = fts_query(request.args.get('q', ''))
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', SEARCH_PAGE_SIZE, type=int), 1), SEARCH_MAX_PAGE_SIZE)
+    response = {'query': request.args.get('q', ''), 'page': page, 'per_page': per_page,
+                'ranked': False, 'has_more': False, 'results': []}
+    if not query:
+        return jsonify(response)
     
-    contractors = []
-    for row in cursor.fetchall():
-        contractor_id, name, rating, address, phone, website, insight = row
-        
-        cursor.execute('SELECT certification_name FROM certifications WHERE contractor_id = ?', (contractor_id,))
-        certs = [r[0] for r in cursor.fetchall()]
-        
-        contractors.append({
+    with get_db() as conn:
+        matches = conn.execute('''
+            SELECT COUNT(*) FROM (SELECT rowid FROM contractor_search WHERE contractor_search MATCH ? LIMIT ?)
+        ''', (query, SEARCH_RANK_LIMIT + 1)).fetchone()[0]
+        response['ranked'] = matches <= SEARCH_RANK_LIMIT
+        order = 'contractor_search.rank' if response['ranked'] else 'contractor_search.rowid'
+        
+        # One row past the page tells us whether there is another page, without counting every match
+        rows = conn.execute(f'''
+            SELECT 
+                c.id,
+                c.name,
+                c.rating,
+                c.address,
+                c.phone,
+                c.website,
+                (SELECT insight_text FROM insights WHERE contractor_id = c.id ORDER BY id LIMIT 1),
+                snippet(contractor_search, -1, ?, ?, '…', 16)
+            FROM contractor_search
+            JOIN contractors c ON c.id = contractor_search.rowid
+            WHERE contractor_search MATCH ?
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        ''', (HIGHLIGHT_START, HIGHLIGHT_END, query, per_page + 1, (page - 1) * per_page)).fetchall()
+        
+        response['has_more'] = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        certs = {}
+        ids = [row[0] for row in rows]
+        if ids:
+            placeholders = ','.join('?' * len(ids))
+            for contractor_id, name in conn.execute(
+                    f'SELECT contractor_id, certification_name FROM certifications WHERE contractor_id IN ({placeholders})', ids):
+                certs.setdefault(contractor_id, []).append(name)
+    
+    for contractor_id, name, rating, address, phone, website, insight, snippet in rows:
+        response['results'].append({
             'id': contractor_id,
             'name': name,
             'rating': rating or 0,
@@ -971,56 +1165,80 @@ def api_contractors():
             'phone': phone,
             'website': website,
             'insight': insight,
-            'certifications': certs
+            'certifications': certs.get(contractor_id, []),
+            'snippet': highlight(snippet)
         })
     
-    conn.close()
+    return jsonify(response)
+
+@app.route('/api/contractors/near')
+def api_contractors_near():
+    """
+    Contractors within a radius of a point, nearest first: ?lat=..&lng=.. or ?zip=.. (or ?city=..&state=..),
+    with optional radius (miles) and limit. Locations are zip or city centroids, see the precision field.
+    """
+    radius = min(max(request.args.get('radius', NEAR_RADIUS, type=float), 0), NEAR_MAX_RADIUS)
+    limit = min(max(request.args.get('limit', NEAR_LIMIT, type=int), 1), NEAR_MAX_LIMIT)
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    db = contractor_database(DB_FILE)
     
-    return jsonify(contractors)
+    if lat is None or lng is None:
+        zip_code, city, state = request.args.get('zip'), request.args.get('city'), request.args.get('state')
+        if not zip_code and not (city and state):
+            return jsonify({'error': 'Give lat and lng, a zip, or a city and state'}), 400
+        location = db.locate(zip_code, city, state)
+        if not location:
+            return jsonify({'error': 'Unknown location'}), 404
+        lat, lng = location
+    elif not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({'error': 'lat/lng out of range'}), 400
+    
+    results = db.contractors_near(lat, lng, radius, limit)
+    return jsonify({'center': {'lat': lat, 'lng': lng}, 'radius': radius, 'limit': limit,
+                    'count': len(results), 'results': results})
 
 @app.route('/export/csv')
 def export_csv():
     """Export all contractors to CSV"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT 
-            c.name,
-            c.rating,
-            c.address,
-            c.phone,
-            c.website,
-            i.insight_text
-        FROM contractors c
-        LEFT JOIN insights i ON c.id = i.contractor_id
-        ORDER BY c.rating DESC
-    ''')
-    
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Contractor Name', 'Rating', 'Location', 'Phone', 'Website', 'AI Insight', 'Certifications'])
-    
-    # Write data
-    for row in cursor.fetchall():
-        contractor_id = cursor.execute('SELECT id FROM contractors WHERE name = ?', (row[0],)).fetchone()[0]
-        cursor.execute('SELECT certification_name FROM certifications WHERE contractor_id = ?', (contractor_id,))
-        certs = ', '.join([r[0] for r in cursor.fetchall()])
-        
-        writer.writerow([
-            row[0],  # name
-            row[1],  # rating
-            row[2],  # address
-            row[3],  # phone
-            row[4],  # website
-            row[5],  # insight
-            certs    # certifications
-        ])
-    
-    conn.close()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT 
+                c.name,
+                c.rating,
+                c.address,
+                c.phone,
+                c.website,
+                i.insight_text
+            FROM contractors c
+            LEFT JOIN insights i ON c.id = i.contractor_id
+            ORDER BY c.rating DESC
+        ''')
+        
+        # Create CSV in memory
+        output = io.StringIO()
+        writer = csv.writer(output)
+        
+        # Write header
+        writer.writerow(['Contractor Name', 'Rating', 'Location', 'Phone', 'Website', 'AI Insight', 'Certifications'])
+        
+        # Write data
+        for row in cursor.fetchall():
+            contractor_id = cursor.execute('SELECT id FROM contractors WHERE name = ?', (row[0],)).fetchone()[0]
+            cursor.execute('SELECT certification_name FROM certifications WHERE contractor_id = ?', (contractor_id,))
+            certs = ', '.join([r[0] for r in cursor.fetchall()])
+            
+            writer.writerow([
+                row[0],  # name
+                row[1],  # rating
+                row[2],  # address
+                row[3],  # phone
+                row[4],  # website
+                row[5],  # insight
+                certs    # certifications
+            ])
     
     # Prepare response
     output.seek(0)
@@ -1040,38 +1258,36 @@ def export_priorities():
     
     id_list = [int(i) for i in ids.split(',') if i]
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    placeholders = ','.join(['?' for _ in id_list])
-    cursor.execute(f'''
-        SELECT 
-            c.name,
-            c.rating,
-            c.address,
-            c.phone,
-            c.website,
-            i.insight_text
-        FROM contractors c
-        LEFT JOIN insights i ON c.id = i.contractor_id
-        WHERE c.id IN ({placeholders})
-        ORDER BY c.rating DESC
-    ''', id_list)
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow(['Contractor Name', 'Rating', 'Location', 'Phone', 'Website', 'AI Insight', 'Certifications'])
-    
-    for row in cursor.fetchall():
-        contractor_id = cursor.execute('SELECT id FROM contractors WHERE name = ?', (row[0],)).fetchone()[0]
-        cursor.execute('SELECT certification_name FROM certifications WHERE contractor_id = ?', (contractor_id,))
-        certs = ', '.join([r[0] for r in cursor.fetchall()])
-        
-        writer.writerow([row[0], row[1], row[2], row[3], row[4], row[5], certs])
-    
-    conn.close()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        
+        placeholders = ','.join(['?' for _ in id_list])
+        cursor.execute(f'''
+            SELECT 
+                c.name,
+                c.rating,
+                c.address,
+                c.phone,
+                c.website,
+                i.insight_text
+            FROM contractors c
+            LEFT JOIN insights i ON c.id = i.contractor_id
+            WHERE c.id IN ({placeholders})
+            ORDER BY c.rating DESC
+        ''', id_list)
+        
+        # Create CSV
+        output = io.StringIO()
+        writer = csv.writer(output)
+        
+        writer.writerow(['Contractor Name', 'Rating', 'Location', 'Phone', 'Website', 'AI Insight', 'Certifications'])
+        
+        for row in cursor.fetchall():
+            contractor_id = cursor.execute('SELECT id FROM contractors WHERE name = ?', (row[0],)).fetchone()[0]
+            cursor.execute('SELECT certification_name FROM certifications WHERE contractor_id = ?', (contractor_id,))
+            certs = ', '.join([r[0] for r in cursor.fetchall()])
+            
+            writer.writerow([row[0], row[1], row[2], row[3], row[4], row[5], certs])
     
     output.seek(0)
     return send_file(
@@ -1084,29 +1300,29 @@ def export_priorities():
 @app.route('/export/report')
 def export_report():
     """Generate a summary report"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Get statistics
-    stats = {
-        'total': cursor.execute('SELECT COUNT(*) FROM contractors').fetchone()[0],
-        'avg_rating': cursor.execute('SELECT AVG(rating) FROM contractors WHERE rating > 0').fetchone()[0],
-        'high_rated': cursor.execute('SELECT COUNT(*) FROM contractors WHERE rating >= 4.5').fetchone()[0],
-        'with_insights': cursor.execute('SELECT COUNT(*) FROM insights').fetchone()[0],
-    }
-    
-    # Get top contractors
-    cursor.execute('''
-        SELECT c.name, c.rating, c.address, i.insight_text
-        FROM contractors c
-        LEFT JOIN insights i ON c.id = i.contractor_id
-        WHERE c.rating >= 4.5
-        ORDER BY c.rating DESC
-        LIMIT 10
-    ''')
-    top_contractors = cursor.fetchall()
-    
-    conn.close()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        
+        # Get statistics
+        row = read_stats(conn)
+        stats = {
+            'total': row['total'],
+            'avg_rating': row['avg_rating'],
+            'high_rated': row['high_rated'],
+            'with_insights': row['insights'],
+            'histogram': row['histogram'],
+        }
+        
+        # Get top contractors
+        cursor.execute('''
+            SELECT c.name, c.rating, c.address, i.insight_text
+            FROM contractors c
+            LEFT JOIN insights i ON c.id = i.contractor_id
+            WHERE c.rating >= 4.5
+            ORDER BY c.rating DESC
+            LIMIT 10
+        ''')
+        top_contractors = cursor.fetchall()
     
     # Generate report
     report = f"""
@@ -1121,6 +1337,16 @@ Average Rating: {stats['avg_rating']:.2f}/5.0
 High-Rated Contractors (≥4.5): {stats['high_rated']}
 AI Insights Generated: {stats['with_insights']}
 
+RATING DISTRIBUTION:
+--------------------
+"""
+    
+    for stars, count in reversed(stats['histogram']):
+        label = f"{stars}★" if stars else "<1★ / unrated"
+        share = count / stats['total'] if stats['total'] else 0
+        report += f"{label:>14}: {count:>7} {'█' * round(share * 40)}\n"
+    
+    report += """
 TOP 10 HIGH-VALUE LEADS:
 -------------------------
 """
@@ -1143,6 +1369,35 @@ TOP 10 HIGH-VALUE LEADS:
         download_name=f'sales_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
     )
 
+@app.route('/export/snapshot')
+def export_snapshot():
+    """Point-in-time Parquet snapshot of contractors, certifications, services, insights and scores, zipped"""
+    try:
+        require_pyarrow()
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+    
+    # Built on disk and streamed from there, so a large export is never held in worker memory;
+    # the temporary file is removed once the response has been sent
+    handle, path = tempfile.mkstemp(suffix='.zip')
+    os.close(handle)
+    try:
+        export_snapshot_archive(path, DB_FILE)
+        response = send_file(
+            path,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=f'contractors_snapshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+        )
+    except Exception:
+        os.remove(path)
+        raise
+    # A passthrough file response goes straight to the server's file wrapper, which never calls the
+    # close callbacks; iterating it through Werkzeug still streams it in chunks and runs them
+    response.direct_passthrough = False
+    response.call_on_close(lambda: os.remove(path))
+    return response
+
 if __name__ == '__main__':
     print("\n" + "="*80)
     print("🏠 INSTALILY SALES INTELLIGENCE DASHBOARD - ENHANCED")
@@ -1152,6 +1407,8 @@ if __name__ == '__main__':
     print("  • Track contacted contractors")
     print("  • Add private notes")
     print("  • Export to CSV")
+    print("  • Download a Parquet snapshot for analytics")
+    print("  • Find contractors near a zip (/api/contractors/near)")
     print("  • Generate email templates")
     print("  • Download reports")
     print("\nStarting server...")
@@ -1159,4 +1416,6 @@ if __name__ == '__main__':
     print("\nPress Ctrl+C to stop the server")
     print("="*80 + "\n")
     
+    # Search, stats and locations live in tables added by migrations, so bring older databases up to date first
+    contractor_database(DB_FILE)
     app.run(debug=True, host='0.0.0.0', port=8080)
\ No newline at end of file
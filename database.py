@@ -1,149 +1,1137 @@
 """
 Database Setup and ETL Pipeline
 """
-import sqlite3
+import argparse
+import csv
+import heapq
 import json
-from datetime import datetime
+import os
 import re
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from itertools import islice
+from db import DB_FILE, connection
+from checkpoint import STREAM_FILE, follow_jsonl, iter_records
+from normalize import normalize_batches, normalize_record
+from resolve import MAX_BLOCK_SIZE, RESOLVE_COLUMNS, find_duplicates
+from tiling import CENTROIDS_FILE, bounding_box, haversine_miles
 
-class ContractorDatabase:
-    def __init__(self, db_name='contractors.db'):
-        self.db_name = db_name
-        self.create_tables()
+DEFAULT_BATCH_SIZE = 5000
+SQLITE_MAX_PARAMS = 900
+
+# Keeps the existing id on a (name, address) conflict, so child rows and insights stay attached
+UPSERT_CONTRACTOR_SQL = '''
+    INSERT INTO contractors (name, rating, reviews_count, address, phone, website, description, city, state, zip,
+                             source_id, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(name, address) DO UPDATE SET
+        rating = excluded.rating,
+        reviews_count = COALESCE(excluded.reviews_count, contractors.reviews_count),
+        phone = excluded.phone,
+        website = excluded.website,
+        description = excluded.description,
+        city = excluded.city,
+        state = excluded.state,
+        zip = excluded.zip,
+        source_id = COALESCE(excluded.source_id, contractors.source_id),
+        updated_at = excluded.updated_at
+'''
+
+# Contractor columns merge_duplicates() fills from the freshest duplicate that has a value
+MERGE_FIELDS = ('rating', 'reviews_count', 'phone', 'website', 'description', 'city', 'state', 'zip', 'source_id')
+
+# (contractor dict field and legacy view, name column, vocabulary table, link table, vocabulary id column)
+CHILD_TABLES = [
+    ('certifications', 'certification_name', 'certification_names', 'contractor_certifications', 'certification_id'),
+    ('services', 'service_name', 'service_names', 'contractor_services', 'service_id'),
+]
+
+# Ordered schema migrations; each runs once, in its own transaction, and is recorded in schema_version.
+# Append new ones to the end - never edit or reorder a migration that has shipped.
+def _migration_base_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contractors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            rating REAL,
+            address TEXT,
+            phone TEXT,
+            website TEXT,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(name, address)
+        )
+    ''')
     
-    def create_tables(self):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS contractors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                rating REAL,
-                address TEXT,
-                phone TEXT,
-                website TEXT,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(name, address)
-            )
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS certifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contractor_id INTEGER,
+            certification_name TEXT,
+            FOREIGN KEY (contractor_id) REFERENCES contractors(id)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS services (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contractor_id INTEGER,
+            service_name TEXT,
+            FOREIGN KEY (contractor_id) REFERENCES contractors(id)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS insights (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contractor_id INTEGER,
+            insight_text TEXT,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (contractor_id) REFERENCES contractors(id)
+        )
+    ''')
+
+def _migration_lookup_indexes(cursor):
+    # (contractor_id, name) covers both the per-contractor name lookups and the ETL's child diff
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_certifications_contractor ON certifications (contractor_id, certification_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_services_contractor ON services (contractor_id, service_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_insights_contractor ON insights (contractor_id)')
+    # Matches the dashboard's ORDER BY rating DESC, name and the rating >= 4.5 counts
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_contractors_rating ON contractors (rating DESC, name)')
+    cursor.execute('ANALYZE')
+
+# Text of a contractor's child rows as stored in contractor_search
+_SEARCH_CHILD_TEXT = {
+    'certifications': "(SELECT group_concat(certification_name, ' ') FROM certifications WHERE contractor_id = {id})",
+    'insights': "(SELECT group_concat(insight_text, ' ') FROM insights WHERE contractor_id = {id})",
+}
+SEARCH_INSERT_SQL = 'INSERT INTO contractor_search (rowid, name, address, description, certifications, insights)'
+SEARCH_DOCUMENT_SQL = f'''
+    SELECT c.id, c.name, c.address, c.description,
+           {_SEARCH_CHILD_TEXT['certifications'].format(id='c.id')},
+           {_SEARCH_CHILD_TEXT['insights'].format(id='c.id')}
+    FROM contractors c
+'''
+# Triggers are skipped while a writer has set this inside its own transaction (see load_batches)
+_SEARCH_TRIGGERS_ON = 'WHEN (SELECT deferred FROM search_sync) = 0'
+
+def _migration_search_index(cursor):
+    # One document per contractor (rowid = contractors.id); triggers keep it in step with every table it draws on
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS contractor_search USING fts5(
+            name, address, description, certifications, insights,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4'
+        )
+    ''')
+    # Name matches outrank certification, address and insight matches
+    cursor.execute("INSERT INTO contractor_search (contractor_search, rank) VALUES ('rank', 'bm25(10.0, 2.0, 1.0, 3.0, 1.0)')")
+    cursor.execute(SEARCH_INSERT_SQL + SEARCH_DOCUMENT_SQL)
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_sync (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            deferred INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO search_sync (id, deferred) VALUES (1, 0)')
+    
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contractors_search_insert AFTER INSERT ON contractors {_SEARCH_TRIGGERS_ON} BEGIN
+            INSERT INTO contractor_search (rowid, name, address, description)
+            VALUES (new.id, new.name, new.address, new.description);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contractors_search_update AFTER UPDATE OF name, address, description ON contractors
+        {_SEARCH_TRIGGERS_ON} BEGIN
+            UPDATE contractor_search SET name = new.name, address = new.address, description = new.description
+            WHERE rowid = new.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contractors_search_delete AFTER DELETE ON contractors {_SEARCH_TRIGGERS_ON} BEGIN
+            DELETE FROM contractor_search WHERE rowid = old.id;
+        END
+    ''')
+    
+    for column in _SEARCH_CHILD_TEXT:
+        _create_search_child_triggers(cursor, column, column)
+
+def _create_search_child_triggers(cursor, table, search_column):
+    """Keep contractor_search.<search_column> in step with a table of (contractor_id, ...) rows"""
+    text = _SEARCH_CHILD_TEXT[search_column]
+    for event, row in (('INSERT', 'new'), ('DELETE', 'old')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_search_{event.lower()} AFTER {event} ON {table}
+            {_SEARCH_TRIGGERS_ON} BEGIN
+                UPDATE contractor_search SET {search_column} = {text.format(id=f'{row}.contractor_id')}
+                WHERE rowid = {row}.contractor_id;
+            END
         ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS certifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                contractor_id INTEGER,
-                certification_name TEXT,
-                FOREIGN KEY (contractor_id) REFERENCES contractors(id)
-            )
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON {table} {_SEARCH_TRIGGERS_ON} BEGIN
+            UPDATE contractor_search SET {search_column} = {text.format(id='old.contractor_id')}
+            WHERE rowid = old.contractor_id;
+            UPDATE contractor_search SET {search_column} = {text.format(id='new.contractor_id')}
+            WHERE rowid = new.contractor_id AND new.contractor_id IS NOT old.contractor_id;
+        END
+    ''')
+
+def _migration_vocabularies(cursor):
+    # Each distinct certification/service name is stored once and contractors link to it by id.
+    # The old tables become views with the same name and columns, so existing readers keep working.
+    for field, column, names_table, link_table, id_column in CHILD_TABLES:
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {names_table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)')
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {link_table} (
+                contractor_id INTEGER NOT NULL REFERENCES contractors(id),
+                {id_column} INTEGER NOT NULL REFERENCES {names_table}(id),
+                PRIMARY KEY (contractor_id, {id_column})
+            ) WITHOUT ROWID
         ''')
+        # "Contractors with certification X" walks this instead of comparing strings row by row
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{link_table}_{id_column} ON {link_table} ({id_column}, contractor_id)')
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS services (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                contractor_id INTEGER,
-                service_name TEXT,
-                FOREIGN KEY (contractor_id) REFERENCES contractors(id)
-            )
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO {names_table} (name)
+            SELECT DISTINCT {column} FROM {field} WHERE {column} IS NOT NULL AND {column} != '' ORDER BY {column}
         ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS insights (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                contractor_id INTEGER,
-                insight_text TEXT,
-                generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (contractor_id) REFERENCES contractors(id)
-            )
+        # The primary key drops the duplicate rows earlier reloads left behind
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO {link_table} (contractor_id, {id_column})
+            SELECT t.contractor_id, n.id FROM {field} t
+            JOIN {names_table} n ON n.name = t.{column}
+            WHERE t.contractor_id IS NOT NULL
+        ''')
+        cursor.execute(f'DROP TABLE {field}')
+        cursor.execute(f'''
+            CREATE VIEW {field} AS
+            SELECT l.contractor_id, n.name AS {column}
+            FROM {link_table} l
+            JOIN {names_table} n ON n.id = l.{id_column}
         ''')
-        
-        conn.commit()
-        conn.close()
-        print("✓ Database tables created")
     
-    def insert_contractor(self, contractor_data):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        try:
+    # Dropping the certifications table dropped its search triggers
+    _create_search_child_triggers(cursor, 'contractor_certifications', 'certifications')
+
+HIGH_RATING = 4.5
+RATING_BUCKETS = range(6)  # whole stars; bucket 0 also holds unrated contractors
+
+def _stats_terms(row):
+    """stats column -> how much one contractors row (new/old/c) contributes to it"""
+    rating = f'IFNULL({row}.rating, 0)'
+    bucket = f'MAX(MIN(CAST({rating} AS INTEGER), 5), 0)'
+    terms = {
+        'rated': f'({rating} > 0)',
+        'rating_sum': f'MAX({rating}, 0)',
+        'high_rated': f'({rating} >= {HIGH_RATING})',
+    }
+    terms.update({f'stars_{bucket_id}': f'({bucket} = {bucket_id})' for bucket_id in RATING_BUCKETS})
+    return terms
+
+STATS_REFRESH_SQL = f'''
+    INSERT OR REPLACE INTO stats (id, total, {', '.join(_stats_terms('c'))}, insights)
+    SELECT 1, COUNT(*), {', '.join(f'IFNULL(SUM({term}), 0)' for term in _stats_terms('c').values())},
+           (SELECT COUNT(*) FROM insights)
+    FROM contractors c
+'''
+
+def _migration_stats(cursor):
+    # One row of running totals so the dashboard headline numbers are a single lookup, not full scans
+    columns = ',\n'.join(f'            {column} {"REAL" if column == "rating_sum" else "INTEGER"} NOT NULL DEFAULT 0'
+                         for column in _stats_terms('c'))
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL DEFAULT 0,
+{columns},
+            insights INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute(STATS_REFRESH_SQL)
+    
+    added = ', '.join(f'{column} = {column} + {term}' for column, term in _stats_terms('new').items())
+    removed = ', '.join(f'{column} = {column} - {term}' for column, term in _stats_terms('old').items())
+    changed = ', '.join(f'{column} = {column} - {old} + {new}' for (column, old), new
+                        in zip(_stats_terms('old').items(), _stats_terms('new').values()))
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contractors_stats_insert AFTER INSERT ON contractors BEGIN
+            UPDATE stats SET total = total + 1, {added} WHERE id = 1;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contractors_stats_delete AFTER DELETE ON contractors BEGIN
+            UPDATE stats SET total = total - 1, {removed} WHERE id = 1;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contractors_stats_update AFTER UPDATE OF rating ON contractors
+        WHEN old.rating IS NOT new.rating BEGIN
+            UPDATE stats SET {changed} WHERE id = 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS insights_stats_insert AFTER INSERT ON insights BEGIN
+            UPDATE stats SET insights = insights + 1 WHERE id = 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS insights_stats_delete AFTER DELETE ON insights BEGIN
+            UPDATE stats SET insights = insights - 1 WHERE id = 1;
+        END
+    ''')
+
+# Migrations keep their own copies of the cleaning and loading code they shipped with, so later
+# changes to normalize.py or tiling.py never change what an old migration writes on a new database.
+# These are normalize.clean_phone and normalize.parse_address as of migration 6.
+_V6_NON_DIGITS = re.compile(r'\D')
+_V6_DISTANCE_SUFFIX = re.compile(r'\s*-\s*[\d.]+\s*mi\s*$')
+_V6_STATE_ZIP = re.compile(r'(?P<state>[A-Za-z]{2})\.?(?:\s+(?P<zip>\d{5})(?:-?\d{4})?)?')
+_V6_COUNTRY_SUFFIXES = {'USA', 'US', 'United States'}
+
+def _clean_phone_v6(phone):
+    if not phone:
+        return None
+    digits = _V6_NON_DIGITS.sub('', str(phone))
+    if len(digits) == 10:
+        return '+1' + digits
+    if len(digits) == 11 and digits[0] == '1':
+        return '+' + digits
+    return str(phone).strip() or None
+
+def _parse_address_v6(address):
+    if not address:
+        return (None, None, None)
+    if address.endswith('mi'):
+        address = _V6_DISTANCE_SUFFIX.sub('', address)
+    parts = address.rsplit(',', 3)
+    if len(parts) > 2 and parts[-1].strip() in _V6_COUNTRY_SUFFIXES:
+        parts.pop()
+    if len(parts) < 2:
+        return (None, None, None)
+    city = parts[-2].strip()
+    match = _V6_STATE_ZIP.fullmatch(parts[-1].strip())
+    if not city or city.isdigit() or not match:
+        return (None, None, None)
+    return city, match.group('state').upper(), match.group('zip')
+
+def _migration_address_parts(cursor):
+    # Parsed address parts, and existing phones rewritten to the E.164 form new loads store
+    for column in ('city', 'state', 'zip'):
+        cursor.execute(f'ALTER TABLE contractors ADD COLUMN {column} TEXT')
+    rows = cursor.execute('SELECT id, phone, address FROM contractors').fetchall()
+    cursor.executemany('UPDATE contractors SET phone = ?, city = ?, state = ?, zip = ? WHERE id = ?',
+                       [(_clean_phone_v6(phone), *_parse_address_v6(address), contractor_id)
+                        for contractor_id, phone, address in rows])
+
+def _migration_source_id(cursor):
+    # The data-layer contractor_id: the strongest evidence entity resolution has that two rows are one contractor
+    cursor.execute('ALTER TABLE contractors ADD COLUMN source_id TEXT')
+
+# Places are zip centroids, plus one centroid per city (zip NULL). A contractor sits at its zip's place,
+# or at its city's when the zip is missing or not in the bundled table.
+PLACES_SQL = {
+    'zip': 'SELECT id, lat, lng FROM places WHERE zip = ?',
+    'city': 'SELECT id, lat, lng FROM places WHERE zip IS NULL AND state = ? AND city = ? COLLATE NOCASE',
+}
+# Places whose (32-bit, rounded outward) R*Tree bounds overlap a box; parameters are max_lat, min_lat, max_lng, min_lng
+PLACES_IN_BOX_SQL = '''
+    SELECT p.id, p.lat, p.lng FROM place_index r JOIN places p ON p.id = r.id
+    WHERE r.min_lat <= ? AND r.max_lat >= ? AND r.min_lng <= ? AND r.max_lng >= ?
+'''
+# (contractor id, place id) for the contractors at a list of places; {ids} is a placeholder list, bound twice
+CONTRACTORS_AT_PLACES_SQL = '''
+    SELECT c.id, p.id FROM places p JOIN contractors c ON c.zip = p.zip
+    WHERE p.id IN ({ids}) AND p.zip IS NOT NULL
+    UNION ALL
+    SELECT c.id, p.id FROM places p JOIN contractors c ON c.state = p.state AND c.city = p.city COLLATE NOCASE
+    WHERE p.id IN ({ids}) AND p.zip IS NULL AND NOT EXISTS (SELECT 1 FROM places z WHERE z.zip = c.zip)
+'''
+# Places contractors_near() looks up first; later chunks double in size
+NEAR_FIRST_CHUNK = 16
+# What contractors_near() and contractors_in_box() return per contractor
+LOCATED_COLUMNS = ('c.id', 'c.name', 'c.rating', 'c.address', 'c.phone', 'c.website', 'c.city', 'c.state', 'c.zip',
+                   'l.lat', 'l.lng', 'l.precision')
+
+def _load_centroids_v8(filename=CENTROIDS_FILE):
+    # tiling.load_centroids as of migration 8. The table itself is bundled data: a revised
+    # zip_centroids.csv reaches existing databases through a new migration, not this one.
+    with open(filename, 'r', encoding='utf-8') as f:
+        return {row['zip']: dict(row, lat=float(row['lat']), lng=float(row['lng'])) for row in csv.DictReader(f)}
+
+def _migration_locations(cursor):
+    # The bundled centroid table, so radius queries never geocode; contractors join it by their parsed zip/city
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS places (
+            id INTEGER PRIMARY KEY,
+            zip TEXT,
+            city TEXT,
+            state TEXT,
+            lat REAL NOT NULL,
+            lng REAL NOT NULL
+        )
+    ''')
+    centroids = _load_centroids_v8().values()
+    cities = {}
+    for c in centroids:
+        cities.setdefault((c['city'].casefold(), c['state']), []).append(c)
+    rows = [(c['zip'], c['city'], c['state'], c['lat'], c['lng']) for c in centroids]
+    # Most scraped cards only say "City, ST", so cities get a centroid too: the mean of their delivery
+    # zips, or of all their zips for places that only have PO boxes
+    for zips in cities.values():
+        points = [c for c in zips if c['type'] == 'STANDARD'] or zips
+        rows.append((None, zips[0]['city'], zips[0]['state'], sum(c['lat'] for c in points) / len(points),
+                     sum(c['lng'] for c in points) / len(points)))
+    cursor.executemany('INSERT INTO places (zip, city, state, lat, lng) VALUES (?, ?, ?, ?, ?)', rows)
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_places_zip ON places (zip)')
+    # zip last, so "zip IS NULL" narrows this index rather than steering lookups onto idx_places_zip
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_places_city ON places (state, city COLLATE NOCASE, zip)')
+    
+    # The R*Tree holds the ~70k static places rather than every contractor, so loads never write to it
+    cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS place_index USING rtree(id, min_lat, max_lat, min_lng, max_lng)')
+    cursor.execute('INSERT INTO place_index SELECT id, lat, lat, lng, lng FROM places')
+    # Most cards carry no zip, so only the ones that do are indexed
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_contractors_zip ON contractors (zip) WHERE zip IS NOT NULL')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_contractors_city ON contractors (state, city COLLATE NOCASE)')
+    
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS contractor_locations AS
+        SELECT c.id,
+               COALESCE(z.lat, g.lat) AS lat,
+               COALESCE(z.lng, g.lng) AS lng,
+               CASE WHEN z.id IS NOT NULL THEN 'zip' ELSE 'city' END AS precision
+        FROM contractors c
+        LEFT JOIN places z ON z.zip = c.zip
+        LEFT JOIN places g ON z.id IS NULL AND g.zip IS NULL AND g.state = c.state AND g.city = c.city COLLATE NOCASE
+        WHERE z.id IS NOT NULL OR g.id IS NOT NULL
+    ''')
+
+# Days since the epoch (UTC): the history key, compact and easy to window
+TODAY_SQL = "(CAST(strftime('%s', 'now') AS INTEGER) / 86400)"
+EPOCH = date(1970, 1, 1)
+MOMENTUM_DAYS = 30
+# (contractor id, reviews gained, rating change in hundredths of a star) over the days after ?. Reads only the
+# window's slice of idx_rating_history_day, however long the history is; left to itself the planner would
+# scan the whole primary key to get the GROUP BY order for free.
+MOMENTUM_SQL = '''
+    SELECT contractor_id, SUM(reviews_delta), SUM(rating_delta) FROM rating_history INDEXED BY idx_rating_history_day
+    WHERE day > ? GROUP BY contractor_id
+'''
+
+def _migration_rating_history(cursor):
+    # The data layer's review count, previously dropped by the ETL
+    cursor.execute('ALTER TABLE contractors ADD COLUMN reviews_count INTEGER')
+    # Append-only net change per contractor per day; days without a change have no row. Ratings are
+    # stored in hundredths of a star so the deltas stay small integers.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rating_history (
+            contractor_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            rating_delta INTEGER NOT NULL DEFAULT 0,
+            reviews_delta INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (contractor_id, day)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_rating_history_day ON rating_history (day, contractor_id, reviews_delta, rating_delta)
+    ''')
+    
+    # A missing rating (0) or review count (NULL) on either side is not a change
+    rating_delta = 'CASE WHEN old.rating > 0 AND new.rating > 0 THEN CAST(ROUND((new.rating - old.rating) * 100) AS INTEGER) ELSE 0 END'
+    reviews_delta = 'IFNULL(new.reviews_count - old.reviews_count, 0)'
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contractors_history_update AFTER UPDATE OF rating, reviews_count ON contractors
+        WHEN old.rating IS NOT new.rating OR old.reviews_count IS NOT new.reviews_count BEGIN
+            INSERT INTO rating_history (contractor_id, day, rating_delta, reviews_delta)
+            SELECT new.id, {TODAY_SQL}, {rating_delta}, {reviews_delta}
+            WHERE {rating_delta} != 0 OR {reviews_delta} != 0
+            ON CONFLICT (contractor_id, day) DO UPDATE SET
+                rating_delta = rating_delta + excluded.rating_delta,
+                reviews_delta = reviews_delta + excluded.reviews_delta;
+            DELETE FROM rating_history
+            WHERE contractor_id = new.id AND day = {TODAY_SQL} AND rating_delta = 0 AND reviews_delta = 0;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS contractors_history_delete AFTER DELETE ON contractors BEGIN
+            DELETE FROM rating_history WHERE contractor_id = old.id;
+        END
+    ''')
+
+def search_documents(cursor, contractor_ids):
+    """contractor id -> its search document as contractor_search should hold it"""
+    ids = list(contractor_ids)
+    documents = {}
+    for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+        chunk = ids[start:start + SQLITE_MAX_PARAMS]
+        placeholders = ','.join('?' * len(chunk))
+        documents.update((row[0], row) for row in cursor.execute(SEARCH_DOCUMENT_SQL + f' WHERE c.id IN ({placeholders})', chunk))
+    return documents
+
+def refresh_search(cursor, contractor_ids):
+    """Rebuild the search documents of these contractors"""
+    ids = list(contractor_ids)
+    for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+        chunk = ids[start:start + SQLITE_MAX_PARAMS]
+        # Selecting first and inserting plain values is several times faster than INSERT ... SELECT
+        # into the FTS table once per contractor
+        documents = search_documents(cursor, chunk)
+        cursor.executemany('DELETE FROM contractor_search WHERE rowid = ?', [(contractor_id,) for contractor_id in chunk])
+        cursor.executemany(SEARCH_INSERT_SQL + ' VALUES (?, ?, ?, ?, ?, ?)', documents.values())
+
+def fold_duplicates(cursor, merge_map):
+    """
+    The body of ContractorDatabase.merge_duplicates, for a [(duplicate_id, canonical_id)] map, inside
+    the caller's transaction (so migrations can use it too). Returns the number of canonical contractors.
+    """
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS merge_map (duplicate_id INTEGER PRIMARY KEY, canonical_id INTEGER NOT NULL)')
+    # Rebuild each canonical search document once instead of once per moved child row
+    cursor.execute('UPDATE search_sync SET deferred = 1')
+    cursor.execute('DELETE FROM merge_map')
+    cursor.executemany('INSERT INTO merge_map (duplicate_id, canonical_id) VALUES (?, ?)', merge_map)
+    
+    canonical_of = dict(merge_map)
+    canonicals = set(canonical_of.values())
+    # FTS deletes are the expensive part, so only documents the merge changes are rebuilt
+    documents_before = search_documents(cursor, canonicals)
+    members = {}
+    for row in cursor.execute(f'''
+        SELECT id, updated_at, {', '.join(MERGE_FIELDS)} FROM contractors
+        WHERE id IN (SELECT duplicate_id FROM merge_map) OR id IN (SELECT canonical_id FROM merge_map)
+    '''):
+        members.setdefault(canonical_of.get(row[0], row[0]), []).append(row)
+    
+    # Adopting a duplicate's rating is not a rating change, so today's history of the canonicals
+    # is put back the way it was after the update
+    cursor.execute('DROP TABLE IF EXISTS temp.merge_history')
+    cursor.execute(f'''
+        CREATE TEMP TABLE merge_history AS SELECT * FROM rating_history
+        WHERE day = {TODAY_SQL} AND contractor_id IN (SELECT canonical_id FROM merge_map)
+    ''')
+    
+    updates = []
+    for canonical, rows in members.items():
+        # Newest first; on a tie the canonical row's own values win
+        rows.sort(key=lambda row: (row[1] or '', row[0] == canonical), reverse=True)
+        merged = [next((row[position] for row in rows if row[position]), None)
+                  for position in range(2, 2 + len(MERGE_FIELDS))]
+        updates.append((*merged, rows[0][1], canonical))
+    cursor.executemany(f'''
+        UPDATE contractors SET {', '.join(f'{field} = ?' for field in MERGE_FIELDS)}, updated_at = ?
+        WHERE id = ?
+    ''', updates)
+    cursor.execute(f'''
+        DELETE FROM rating_history
+        WHERE day = {TODAY_SQL} AND contractor_id IN (SELECT canonical_id FROM merge_map)
+    ''')
+    cursor.execute('INSERT INTO rating_history SELECT * FROM temp.merge_history')
+    
+    for _, _, _, link_table, id_column in CHILD_TABLES:
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO {link_table} (contractor_id, {id_column})
+            SELECT m.canonical_id, l.{id_column} FROM {link_table} l
+            JOIN merge_map m ON m.duplicate_id = l.contractor_id
+        ''')
+        cursor.execute(f'DELETE FROM {link_table} WHERE contractor_id IN (SELECT duplicate_id FROM merge_map)')
+    
+    # One insight per contractor: the canonical keeps its own, or takes over the newest duplicate's
+    cursor.execute('''
+        UPDATE insights
+        SET contractor_id = (SELECT canonical_id FROM merge_map WHERE duplicate_id = insights.contractor_id)
+        WHERE id IN (
+            SELECT (SELECT i.id FROM insights i JOIN merge_map m ON m.duplicate_id = i.contractor_id
+                    WHERE m.canonical_id = c.canonical_id
+                    ORDER BY i.generated_at DESC, i.id DESC LIMIT 1)
+            FROM (SELECT DISTINCT canonical_id FROM merge_map) c
+            WHERE NOT EXISTS (SELECT 1 FROM insights WHERE contractor_id = c.canonical_id)
+        )
+    ''')
+    cursor.execute('DELETE FROM insights WHERE contractor_id IN (SELECT duplicate_id FROM merge_map)')
+    
+    cursor.execute('DELETE FROM contractors WHERE id IN (SELECT duplicate_id FROM merge_map)')
+    cursor.execute('DELETE FROM contractor_search WHERE rowid IN (SELECT duplicate_id FROM merge_map)')
+    documents_after = search_documents(cursor, canonicals)
+    refresh_search(cursor, [contractor_id for contractor_id in canonicals
+                            if documents_after.get(contractor_id) != documents_before.get(contractor_id)])
+    cursor.execute('UPDATE search_sync SET deferred = 0')
+    return len(members)
+
+# NULLs never conflict in UNIQUE(name, address), so every load of a contractor without an address
+# added another row. Missing addresses are stored as '' from now on; fold the rows certainly duplicated.
+def _migration_empty_addresses(cursor):
+    # Only copies of the same data-layer id are certainly one contractor; folding on the name alone
+    # would merge distinct contractors that share a common one
+    rows = cursor.execute('''
+        SELECT id, MIN(id) OVER (PARTITION BY name, source_id) FROM contractors
+        WHERE (address IS NULL OR address = '') AND source_id IS NOT NULL
+    ''').fetchall()
+    merge_map = [(contractor_id, canonical) for contractor_id, canonical in rows if contractor_id != canonical]
+    if merge_map:
+        fold_duplicates(cursor, merge_map)
+    # One address-less row per name can hold ''; any others stay NULL, as before, for
+    # database.py --resolve to match or keep apart
+    cursor.execute('''
+        UPDATE contractors SET address = ''
+        WHERE id IN (SELECT MIN(id) FROM contractors WHERE address IS NULL GROUP BY name)
+          AND NOT EXISTS (SELECT 1 FROM contractors c WHERE c.name = contractors.name AND c.address = '')
+    ''')
+
+MIGRATIONS = [
+    (1, 'base tables', _migration_base_tables),
+    (2, 'contractor lookup indexes', _migration_lookup_indexes),
+    (3, 'full-text search index', _migration_search_index),
+    (4, 'certification and service vocabularies', _migration_vocabularies),
+    (5, 'trigger-maintained stats', _migration_stats),
+    (6, 'address parts and E.164 phones', _migration_address_parts),
+    (7, 'data-layer contractor ids', _migration_source_id),
+    (8, 'zip centroids and location index', _migration_locations),
+    (9, 'review counts and rating history', _migration_rating_history),
+    (10, 'empty instead of NULL addresses', _migration_empty_addresses),
+]
+
+# (description, query, index it must use) - the hot lookups in dashboard.py, ai_insights.py and the ETL
+QUERY_PLAN_CHECKS = [
+    ('certifications by contractor',
+     'SELECT certification_name FROM certifications WHERE contractor_id = ?', 'PRIMARY KEY (contractor_id=?)'),
+    ('services by contractor',
+     'SELECT service_name FROM services WHERE contractor_id = ?', 'PRIMARY KEY (contractor_id=?)'),
+    ('child diff during ETL',
+     'SELECT contractor_id, service_id FROM contractor_services WHERE contractor_id IN (?, ?)',
+     'PRIMARY KEY (contractor_id=?)'),
+    ('contractors with a certification',
+     'SELECT contractor_id FROM certifications WHERE certification_name = ?',
+     'idx_contractor_certifications_certification_id'),
+    ('contractor by name (CSV exports)',
+     'SELECT id FROM contractors WHERE name = ?', 'sqlite_autoindex_contractors_1'),
+    ('contractors without insights',
+     'SELECT c.id FROM contractors c LEFT JOIN insights i ON c.id = i.contractor_id WHERE i.id IS NULL',
+     'idx_insights_contractor'),
+    ('dashboard listing',
+     'SELECT c.id, i.insight_text FROM contractors c LEFT JOIN insights i ON c.id = i.contractor_id '
+     'ORDER BY c.rating DESC, c.name', 'idx_contractors_rating'),
+    ('high-rated count',
+     'SELECT COUNT(*) FROM contractors WHERE rating >= 4.5', 'idx_contractors_rating'),
+    ('contractors at a zip (radius queries)',
+     CONTRACTORS_AT_PLACES_SQL.format(ids='?'), 'idx_contractors_zip'),
+    ('contractors in a city (radius queries)',
+     CONTRACTORS_AT_PLACES_SQL.format(ids='?'), 'idx_contractors_city'),
+    ('city centroid of a contractor',
+     'SELECT lat FROM contractor_locations WHERE id = ?', 'idx_places_city'),
+    ('30-day momentum',
+     MOMENTUM_SQL, 'idx_rating_history_day'),
+]
+
+def chunked(iterable, size):
+    """Yield lists of up to size items without materialising the whole iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class ContractorDatabase:
+    def __init__(self, db_name=DB_FILE):
+        self.db_name = db_name
+        self.vocabulary = {}
+        self.create_tables()
+    
+    def create_tables(self):
+        """Bring the schema up to date by applying any migrations this database has not seen yet"""
+        with connection(self.db_name) as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                INSERT OR REPLACE INTO contractors 
-                (name, rating, address, phone, website, description, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                contractor_data.get('name'),
-                self.clean_rating(contractor_data.get('rating')),
-                contractor_data.get('address'),
-                self.clean_phone(contractor_data.get('phone')),
-                contractor_data.get('website'),
-                contractor_data.get('description'),
-                datetime.now()
-            ))
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+            current = cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
             
-            contractor_id = cursor.lastrowid
+            for version, description, migrate in MIGRATIONS:
+                if version <= current:
+                    continue
+                with conn:
+                    # Explicit, so the DDL is inside the transaction too and a failed migration leaves nothing behind
+                    cursor.execute('BEGIN')
+                    migrate(cursor)
+                    cursor.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                                   (version, description))
+                print(f"✓ Applied migration {version}: {description}")
+        print(f"✓ Database schema at version {self.schema_version()}")
+    
+    def schema_version(self):
+        with connection(self.db_name) as conn:
+            return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+    
+    def check_query_plans(self):
+        """
+        Run EXPLAIN QUERY PLAN over QUERY_PLAN_CHECKS and return the ones that no longer use their
+        index, as (description, plan) pairs. An empty list means every hot lookup is indexed.
+        """
+        failures = []
+        with connection(self.db_name) as conn:
+            for description, query, index in QUERY_PLAN_CHECKS:
+                params = [None] * query.count('?')
+                plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + query, params)]
+                if not any(index in detail for detail in plan):
+                    failures.append((description, plan))
+        return failures
+    
+    def insert_contractor(self, contractor_data):
+        with connection(self.db_name) as conn:
+            cursor = conn.cursor()
+            try:
+                contractor_data = normalize_record(contractor_data)
+                contractor_id = cursor.execute(UPSERT_CONTRACTOR_SQL + ' RETURNING id',
+                                               self.contractor_row(contractor_data, datetime.now())).fetchone()[0]
+                
+                for field, _, names_table, link_table, id_column in CHILD_TABLES:
+                    self.sync_children(cursor, link_table, id_column, names_table,
+                                       {contractor_id: contractor_data.get(field)})
+                
+                conn.commit()
+                return contractor_id
             
-            for cert in contractor_data.get('certifications', []):
-                if cert:
-                    cursor.execute('''
-                        INSERT INTO certifications (contractor_id, certification_name)
-                        VALUES (?, ?)
-                    ''', (contractor_id, cert))
+            except Exception as e:
+                print(f"Error inserting contractor: {e}")
+                conn.rollback()
+                self.vocabulary.clear()
+                return None
+    
+    def contractor_row(self, contractor_data, updated_at):
+        """UPSERT_CONTRACTOR_SQL parameters for a record that has been through normalize.py"""
+        return (
+            contractor_data.get('name'),
+            contractor_data['rating'],
+            contractor_data['reviews_count'],
+            contractor_data.get('address'),
+            contractor_data['phone'],
+            contractor_data.get('website'),
+            contractor_data.get('description'),
+            contractor_data['city'],
+            contractor_data['state'],
+            contractor_data['zip'],
+            str(contractor_data['contractor_id']) if contractor_data.get('contractor_id') else None,
+            updated_at
+        )
+    
+    def resolve_names(self, cursor, names_table, names):
+        """
+        name -> id in a certification/service vocabulary, creating the names that are new.
+        Ids are cached per instance, so a long load only goes to the database for unseen names.
+        """
+        cache = self.vocabulary.setdefault(names_table, {})
+        missing = list({name for name in names if name not in cache})
+        if missing:
+            cursor.executemany(f'INSERT OR IGNORE INTO {names_table} (name) VALUES (?)', [(name,) for name in missing])
+            for start in range(0, len(missing), SQLITE_MAX_PARAMS):
+                chunk = missing[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ','.join('?' * len(chunk))
+                cache.update((name, name_id) for name_id, name in cursor.execute(
+                    f'SELECT id, name FROM {names_table} WHERE name IN ({placeholders})', chunk))
+        return {name: cache[name] for name in names}
+    
+    @contextmanager
+    def transaction(self, conn):
+        """`with conn:` that also forgets cached vocabulary ids, which a rollback may have undone"""
+        try:
+            with conn:
+                yield
+        except Exception:
+            self.vocabulary.clear()
+            raise
+    
+    def sync_children(self, cursor, link_table, id_column, names_table, desired_by_id, new_ids=()):
+        """
+        Make each contractor's links match the desired names: insert what is missing and
+        delete what is gone, leaving unchanged links alone.
+        Contractors in new_ids were just created, so there is nothing to look up for them.
+        Returns (inserted, deleted, ids of the contractors whose links changed).
+        """
+        existing = {}
+        ids = [contractor_id for contractor_id in desired_by_id if contractor_id not in new_ids]
+        for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+            chunk = ids[start:start + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            for contractor_id, name_id in cursor.execute(
+                    f'SELECT contractor_id, {id_column} FROM {link_table} WHERE contractor_id IN ({placeholders})', chunk):
+                existing.setdefault(contractor_id, set()).add(name_id)
+        
+        name_ids = self.resolve_names(cursor, names_table,
+                                      {name for names in desired_by_id.values() for name in names or [] if name})
+        to_insert = []
+        to_delete = []
+        changed = set()
+        for contractor_id, names in desired_by_id.items():
+            desired = {name_ids[name] for name in names or [] if name}
+            current = existing.get(contractor_id, set())
+            if desired != current:
+                changed.add(contractor_id)
+                to_insert.extend((contractor_id, name_id) for name_id in desired - current)
+                to_delete.extend((contractor_id, name_id) for name_id in current - desired)
+        
+        cursor.executemany(f'DELETE FROM {link_table} WHERE contractor_id = ? AND {id_column} = ?', to_delete)
+        cursor.executemany(f'INSERT INTO {link_table} (contractor_id, {id_column}) VALUES (?, ?)', to_insert)
+        return len(to_insert), len(to_delete), changed
+    
+    def contractors_with(self, field, name):
+        """Ids of the contractors with a given certification or service (field as in CHILD_TABLES)"""
+        _, _, names_table, link_table, id_column = next(t for t in CHILD_TABLES if t[0] == field)
+        with connection(self.db_name) as conn:
+            return [row[0] for row in conn.execute(f'''
+                SELECT l.contractor_id FROM {names_table} n
+                JOIN {link_table} l ON l.{id_column} = n.id
+                WHERE n.name = ?
+            ''', (name,))]
+    
+    def locate(self, zip_code=None, city=None, state=None):
+        """(lat, lng) of a zip, or else a city and state, from the bundled centroids; None if unknown"""
+        with connection(self.db_name) as conn:
+            place = conn.execute(PLACES_SQL['zip'], (zip_code,)).fetchone() if zip_code else None
+            if not place and city and state:
+                place = conn.execute(PLACES_SQL['city'], (state.upper(), city.strip())).fetchone()
+        return place[1:] if place else None
+    
+    def contractors_in_box(self, min_lat, max_lat, min_lng, max_lng, limit=None):
+        """Located contractors (LOCATED_COLUMNS dicts) inside a bounding box, by id"""
+        with connection(self.db_name) as conn:
+            cursor = conn.cursor()
+            places = [place_id for place_id, place_lat, place_lng
+                      in cursor.execute(PLACES_IN_BOX_SQL, (max_lat, min_lat, max_lng, min_lng))
+                      if min_lat <= place_lat <= max_lat and min_lng <= place_lng <= max_lng]
+            ids = sorted(contractor_id for contractor_id, _ in self.contractors_at(cursor, places))
+            ids = ids[:limit] if limit is not None else ids
+            rows = self.located_rows(cursor, ids)
+        return [rows[contractor_id] for contractor_id in ids]
+    
+    def contractors_near(self, lat, lng, radius_miles, limit=None):
+        """
+        Located contractors within radius_miles of (lat, lng), nearest first, each with distance_miles.
+        The R*Tree finds the places in the radius' bounding box, distances are computed once per place,
+        and full rows are only read for the contractors returned.
+        """
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_miles)
+        with connection(self.db_name) as conn:
+            cursor = conn.cursor()
+            distances = {}
+            for place_id, place_lat, place_lng in cursor.execute(PLACES_IN_BOX_SQL, (max_lat, min_lat, max_lng, min_lng)):
+                distance = haversine_miles(lat, lng, place_lat, place_lng)
+                if distance <= radius_miles:
+                    distances[place_id] = distance
             
-            for service in contractor_data.get('services', []):
-                if service:
-                    cursor.execute('''
-                        INSERT INTO services (contractor_id, service_name)
-                        VALUES (?, ?)
-                    ''', (contractor_id, service))
+            # Nearest places first, in growing chunks, so a limited query stops once it has enough contractors
+            places = sorted(distances, key=distances.get)
+            nearby = []
+            start, size = 0, NEAR_FIRST_CHUNK
+            while start < len(places) and (limit is None or len(nearby) < limit):
+                nearby.extend((distances[place_id], contractor_id)
+                              for contractor_id, place_id in self.contractors_at(cursor, places[start:start + size]))
+                start, size = start + size, size * 2
+            nearby = heapq.nsmallest(limit, nearby) if limit is not None else sorted(nearby)
+            rows = self.located_rows(cursor, [contractor_id for _, contractor_id in nearby])
+        return [dict(rows[contractor_id], distance_miles=round(distance, 2)) for distance, contractor_id in nearby]
+    
+    def contractors_at(self, cursor, place_ids):
+        """(contractor id, place id) for every contractor located at one of these places"""
+        ids = list(place_ids)
+        pairs = []
+        step = SQLITE_MAX_PARAMS // 2  # the id list is bound twice
+        for start in range(0, len(ids), step):
+            chunk = ids[start:start + step]
+            placeholders = ','.join('?' * len(chunk))
+            pairs.extend(cursor.execute(CONTRACTORS_AT_PLACES_SQL.format(ids=placeholders), chunk + chunk))
+        return pairs
+    
+    def located_rows(self, cursor, contractor_ids):
+        """contractor id -> LOCATED_COLUMNS dict"""
+        ids = list(contractor_ids)
+        names = [column.split('.')[1] for column in LOCATED_COLUMNS]
+        rows = {}
+        for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+            chunk = ids[start:start + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            for row in cursor.execute(f'''
+                SELECT {', '.join(LOCATED_COLUMNS)} FROM contractors c
+                JOIN contractor_locations l ON l.id = c.id
+                WHERE c.id IN ({placeholders})
+            ''', chunk):
+                rows[row[0]] = dict(zip(names, row))
+        return rows
+    
+    def momentum(self, days=MOMENTUM_DAYS):
+        """contractor id -> (reviews gained, rating change) over the last `days` days, for contractors that changed"""
+        since = int(time.time()) // 86400 - days
+        with connection(self.db_name) as conn:
+            return {contractor_id: (reviews, rating / 100)
+                    for contractor_id, reviews, rating in conn.execute(MOMENTUM_SQL, (since,))}
+    
+    def rating_history(self, contractor_id):
+        """
+        [(date, rating, reviews_count)] for one contractor, oldest first: the values it was first loaded
+        with, then its values at the end of each day they changed. Rebuilt backwards from the current row.
+        """
+        with connection(self.db_name) as conn:
+            row = conn.execute('SELECT rating, reviews_count, created_at FROM contractors WHERE id = ?',
+                               (contractor_id,)).fetchone()
+            if not row:
+                return []
+            changes = conn.execute('''
+                SELECT day, rating_delta, reviews_delta FROM rating_history
+                WHERE contractor_id = ? ORDER BY day DESC
+            ''', (contractor_id,)).fetchall()
+        
+        rating, reviews, created_at = round((row[0] or 0) * 100), row[1], row[2]
+        points = []
+        for day, rating_delta, reviews_delta in changes:
+            points.append((EPOCH + timedelta(days=day), rating / 100, reviews))
+            rating -= rating_delta
+            reviews = reviews - reviews_delta if reviews is not None else None
+        first_seen = datetime.fromisoformat(created_at).date() if created_at else None
+        points.append((first_seen, rating / 100, reviews))
+        return points[::-1]
+    
+    def bulk_load(self, contractors, batch_size=DEFAULT_BATCH_SIZE, workers=0):
+        """
+        Load many contractors over one connection, one transaction per batch, using executemany
+        for contractors, certifications and services. Returns the number of contractors loaded.
+        contractors can be any iterable; only one batch is held in memory at a time.
+        workers > 1 normalizes upcoming batches in that many processes while the current one is written.
+        """
+        return self.load_batches(chunked(contractors, batch_size), workers)
+    
+    def load_batches(self, batches, workers=0):
+        """
+        bulk_load for input that arrives already batched, e.g. records tailed from a running scraper.
+        Each batch is committed, and so visible to readers, as soon as it has been loaded.
+        """
+        loaded = 0
+        child_rows = 0
+        start = time.perf_counter()
+        
+        with connection(self.db_name) as conn:
+            cursor = conn.cursor()
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS load_keys (pos INTEGER PRIMARY KEY, name TEXT, address TEXT)')
             
-            conn.commit()
-            return contractor_id
+            for batch in normalize_batches(batches, workers):
+                # Later duplicates win, as they would with one upsert per row
+                batch = list({(c.get('name'), c.get('address')): c for c in batch if c.get('name')}.values())
+                if not batch:
+                    continue
+                now = datetime.now()
+                
+                with self.transaction(conn):
+                    # Rebuild each touched search document once at the end instead of once per child row.
+                    # The flag never commits as set, so other connections keep their triggers.
+                    cursor.execute('UPDATE search_sync SET deferred = 1')
+                    max_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM contractors').fetchone()[0]
+                    
+                    # Resolve the batch's ids with one join instead of a lastrowid per row
+                    cursor.execute('DELETE FROM load_keys')
+                    cursor.executemany('INSERT INTO load_keys (pos, name, address) VALUES (?, ?, ?)',
+                                       [(pos, c.get('name'), c.get('address')) for pos, c in enumerate(batch)])
+                    resolve_sql = '''
+                        SELECT k.pos, c.id, c.description FROM load_keys k
+                        JOIN contractors c ON c.name = k.name AND c.address = k.address
+                    '''
+                    old_descriptions = {pos: description for pos, _, description in cursor.execute(resolve_sql)}
+                    cursor.executemany(UPSERT_CONTRACTOR_SQL, [self.contractor_row(c, now) for c in batch])
+                    ids = {pos: contractor_id for pos, contractor_id, _ in cursor.execute(resolve_sql)}
+                    
+                    # AUTOINCREMENT ids only grow, so anything above the old maximum was inserted just now
+                    new_ids = {contractor_id for contractor_id in ids.values() if contractor_id > max_id}
+                    reindex = set(new_ids)
+                    reindex.update(ids[pos] for pos, description in old_descriptions.items()
+                                   if description != batch[pos].get('description'))
+                    for field, _, names_table, link_table, id_column in CHILD_TABLES:
+                        inserted, deleted, changed = self.sync_children(
+                            cursor, link_table, id_column, names_table,
+                            {ids[pos]: c.get(field) for pos, c in enumerate(batch) if pos in ids},
+                            new_ids
+                        )
+                        child_rows += inserted + deleted
+                        reindex |= changed
+                    
+                    self.refresh_search(cursor, reindex)
+                    cursor.execute('UPDATE search_sync SET deferred = 0')
+                
+                loaded += len(batch)
+        
+        elapsed = time.perf_counter() - start
+        rows = loaded + child_rows
+        rate = rows / elapsed if elapsed > 0 else 0
+        print(f"✓ Bulk loaded {loaded} contractors ({rows} rows written) in {elapsed:.2f}s - {rate:,.0f} rows/sec")
+        return loaded
+    
+    def refresh_search(self, cursor, contractor_ids):
+        """Rebuild the search documents of these contractors"""
+        refresh_search(cursor, contractor_ids)
+    
+    def search_documents(self, cursor, contractor_ids):
+        """contractor id -> its search document as contractor_search should hold it"""
+        return search_documents(cursor, contractor_ids)
+    
+    def refresh_stats(self):
+        """Recompute the stats row from scratch, e.g. to clear floating-point drift in rating_sum"""
+        with connection(self.db_name) as conn:
+            with conn:
+                conn.execute(STATS_REFRESH_SQL)
+    
+    def compact(self):
+        """
+        One-shot cleanup of the bloat left by INSERT OR REPLACE reloads: certification/service links
+        and insights whose contractor no longer exists (migration 4 already dropped duplicate rows),
+        then VACUUM to return the freed pages. Returns rows removed per table.
+        """
+        removed = {}
+        
+        with connection(self.db_name) as conn:
+            cursor = conn.cursor()
+            with conn:
+                for table in [link_table for _, _, _, link_table, _ in CHILD_TABLES] + ['insights']:
+                    cursor.execute(f'''
+                        DELETE FROM {table}
+                        WHERE contractor_id IS NULL OR contractor_id NOT IN (SELECT id FROM contractors)
+                    ''')
+                    removed[table] = cursor.rowcount
             
-        except Exception as e:
-            print(f"Error inserting contractor: {e}")
-            conn.rollback()
-            return None
-        finally:
-            conn.close()
-    
-    def clean_rating(self, rating):
-        try:
-            if rating:
-                return float(str(rating).replace('★', '').strip())
-        except:
-            pass
-        return 0.0
-    
-    def clean_phone(self, phone):
-        if not phone:
-            return None
-        digits = re.sub(r'\D', '', str(phone))
-        if len(digits) == 10:
-            return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
-        return phone
-
-def etl_process():
+            cursor.execute('VACUUM')
+        self.refresh_stats()
+        
+        for table, count in removed.items():
+            print(f"✓ {table}: removed {count} orphaned rows")
+        return removed
+    
+    def resolve_duplicates(self, dry_run=False):
+        """
+        Entity resolution over the contractors table (see resolve.py): find rows that are the same
+        contractor and, unless dry_run, merge each group into its canonical record.
+        Returns (clusters, stats) from find_duplicates().
+        """
+        start = time.perf_counter()
+        with connection(self.db_name) as conn:
+            clusters, stats = find_duplicates(conn.execute(f"SELECT {', '.join(RESOLVE_COLUMNS)} FROM contractors"))
+        
+        duplicates = sum(len(members) for _, members in clusters)
+        reasons = ', '.join(f"{count} by {reason}" for reason, count in sorted(stats['matches'].items())) or 'none'
+        print(f"✓ {stats['rows']} contractors: {duplicates} duplicates of {len(clusters)} contractors "
+              f"({reasons}) from {stats['comparisons']} comparisons in {time.perf_counter() - start:.2f}s")
+        if stats['skipped_blocks']:
+            print(f"  {stats['skipped_blocks']} blocks over {MAX_BLOCK_SIZE} rows were not compared")
+        if stats['conflicts']:
+            print(f"  {stats['conflicts']} matches left unmerged: they would join two different contractor ids")
+        
+        if clusters and not dry_run:
+            self.merge_duplicates(clusters)
+        return clusters, stats
+    
+    def merge_duplicates(self, clusters):
+        """
+        Fold each (canonical_id, [duplicate ids]) group into its canonical row: every field takes the
+        most recently scraped value (a rating of 0 counts as missing), certifications and services are
+        unioned, the canonical keeps its insight or inherits the newest one, and the duplicates are deleted.
+        """
+        merge_map = [(duplicate, canonical) for canonical, duplicates in clusters for duplicate in duplicates]
+        start = time.perf_counter()
+        
+        with connection(self.db_name) as conn:
+            with self.transaction(conn):
+                canonicals = fold_duplicates(conn.cursor(), merge_map)
+        
+        print(f"✓ Merged {len(merge_map)} duplicates into {canonicals} canonical contractors "
+              f"in {time.perf_counter() - start:.2f}s")
+        return len(merge_map)
+    
+
+def load_delta(delta_file):
+    """New and changed contractors from a scraper delta file; disappeared ones are only reported"""
+    with open(delta_file, 'r') as f:
+        delta = json.load(f)
+    print(f"✓ Delta: {len(delta['new'])} new, {len(delta['changed'])} changed, "
+          f"{len(delta['disappeared'])} disappeared, {delta['unchanged']} unchanged (skipped)")
+    return delta['new'] + delta['changed']
+
+def etl_process(filename='contractors_raw.json', delta_file=None, batch_size=DEFAULT_BATCH_SIZE,
+                follow=False, idle_timeout=None, workers=0):
+    """
+    Stream contractors into the database in batches of batch_size, so memory stays flat however large
+    the input is. follow tails a JSONL file that a scraper is still writing. workers spreads
+    normalization of file and delta loads over a process pool.
+    """
     print("\nStarting ETL Process...")
     
-    try:
-        with open('contractors_raw.json', 'r') as f:
-            raw_data = json.load(f)
-        print(f"✓ Loaded {len(raw_data)} raw records")
-    except FileNotFoundError:
-        print("✗ Error: contractors_raw.json not found!")
+    source = delta_file or filename
+    if not os.path.exists(source):
+        print(f"✗ Error: {source} not found!")
         return
     
-    db = ContractorDatabase()
-    success_count = 0
+    read = 0
     
-    for contractor in raw_data:
-        if contractor.get('name'):
-            contractor_id = db.insert_contractor(contractor)
-            if contractor_id:
-                success_count += 1
+    def counted(records):
+        nonlocal read
+        for record in records:
+            read += 1
+            yield record
     
-    print(f"✓ ETL completed: {success_count}/{len(raw_data)} contractors loaded")
+    db = ContractorDatabase()
+    if delta_file:
+        success_count = db.bulk_load(counted(load_delta(delta_file)), batch_size=batch_size, workers=workers)
+    elif follow:
+        print(f"✓ Following {filename} (Ctrl+C to stop)")
+        batches = follow_jsonl(filename, batch_size, idle_timeout=idle_timeout)
+        try:
+            success_count = db.load_batches(list(counted(batch)) for batch in batches)
+        except KeyboardInterrupt:
+            print("\n✓ Stopped following; every loaded batch is committed")
+            return
+    else:
+        success_count = db.bulk_load(counted(iter_records(filename)), batch_size=batch_size, workers=workers)
+    
+    print(f"✓ ETL completed: {success_count}/{read} contractors loaded")
 
 if __name__ == "__main__":
-    etl_process()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load scraped contractors into the database")
+    parser.add_argument('--input', help=f"Scraper output, JSON array or JSONL (default: contractors_raw.json, "
+                                        f"or {STREAM_FILE} with --follow)")
+    parser.add_argument('--delta', metavar='FILE', help="Only load new/changed contractors from a delta file")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Contractors per transaction")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Normalize batches in this many processes (worth it for large file loads)")
+    parser.add_argument('--follow', action='store_true',
+                        help="Tail a JSONL stream that a scraper is still writing, loading batches as they arrive")
+    parser.add_argument('--idle-timeout', type=float, metavar='SECONDS',
+                        help="With --follow, stop after this long without new records")
+    parser.add_argument('--compact', action='store_true',
+                        help="Remove orphaned and duplicate child rows left by earlier loads, then exit")
+    parser.add_argument('--resolve', action='store_true',
+                        help="Merge contractors stored more than once (entity resolution), then exit")
+    parser.add_argument('--dry-run', action='store_true', help="With --resolve, only report the duplicates")
+    parser.add_argument('--check-plans', action='store_true',
+                        help="Migrate, then verify the hot queries use their indexes (exits 1 if not)")
+    args = parser.parse_args()
+    
+    if args.check_plans:
+        failures = ContractorDatabase().check_query_plans()
+        for description, plan in failures:
+            print(f"✗ {description}: {' / '.join(plan)}")
+        if not failures:
+            print(f"✓ All {len(QUERY_PLAN_CHECKS)} query plans use their indexes")
+        raise SystemExit(1 if failures else 0)
+    
+    if args.compact:
+        ContractorDatabase().compact()
+        raise SystemExit(0)
+    
+    if args.resolve:
+        ContractorDatabase().resolve_duplicates(dry_run=args.dry_run)
+        raise SystemExit(0)
+    
+    input_file = args.input or (STREAM_FILE if args.follow else 'contractors_raw.json')
+    etl_process(filename=input_file, delta_file=args.delta, batch_size=args.batch_size,
+                follow=args.follow, idle_timeout=args.idle_timeout, workers=args.workers)
\ No newline at end of file
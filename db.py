@@ -0,0 +1,94 @@
+"""
+Shared SQLite access layer
+Bounded pool of long-lived connections in WAL mode with tuned pragmas, shared by the ETL,
+the insight generator, the evaluator and the dashboard
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_FILE = 'contractors.db'
+POOL_SIZE = 4
+BUSY_TIMEOUT = 10  # seconds a writer waits for another writer before giving up
+STATEMENT_CACHE_SIZE = 256  # compiled statements kept per connection
+
+# WAL lets readers keep reading while a writer commits; synchronous=NORMAL is durable in WAL
+# mode except for the last transactions before a power loss
+PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('temp_store', 'MEMORY'),
+    ('mmap_size', 256 * 1024 * 1024),
+    ('cache_size', -64 * 1024),  # negative means KiB, so 64 MiB
+]
+
+
+def connect(db_name=DB_FILE):
+    """A new tuned connection; prefer connection() so it comes from (and returns to) the pool"""
+    conn = sqlite3.connect(db_name, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
+    for pragma, value in PRAGMAS:
+        conn.execute(f'PRAGMA {pragma} = {value}')
+    return conn
+
+
+class ConnectionPool:
+    """
+    At most `size` connections to one database file. Connections are reused, so their pragmas and
+    prepared-statement caches survive across requests; callers block while all of them are in use.
+    """
+    def __init__(self, db_name=DB_FILE, size=POOL_SIZE):
+        self.db_name = db_name
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = connect(self.db_name)
+
+            try:
+                yield conn
+            finally:
+                # Never hand the next caller a half-finished transaction
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name=DB_FILE):
+    with _pools_lock:
+        if db_name not in _pools:
+            _pools[db_name] = ConnectionPool(db_name)
+        return _pools[db_name]
+
+
+def connection(db_name=DB_FILE):
+    """Borrow a pooled connection: `with connection() as conn: ...`"""
+    return get_pool(db_name).connection()
+
+
+def close_all():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,161 @@
+"""
+Incremental Re-scrape Support
+Fingerprints each contractor and diffs a run against the previous one, so downstream
+steps only touch new, changed and disappeared records
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from scraper import contractor_key, DISTANCE_SUFFIX
+
+STATE_FILE = 'contractors_fingerprints.json'
+DELTA_FILE = 'contractors_delta.json'
+UNKNOWN_AREA = ''  # entries from a state file written before areas were tracked
+
+# Fields that define a contractor's content; anything else (e.g. search distance) is ignored
+FINGERPRINT_FIELDS = (
+    'contractor_id', 'name', 'rating', 'address', 'phone', 'website', 'description',
+    'reviews_count', 'certificates_count', 'certificate_name', 'certifications', 'services'
+)
+
+
+def _normalize_text(value):
+    return ' '.join(str(value).split()).casefold() if value not in (None, '') else None
+
+
+def _normalize_number(value):
+    try:
+        return round(float(str(value).replace('★', '').strip()), 2)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_contractor(contractor):
+    """Canonical form of the fingerprinted fields, so formatting noise does not count as a change"""
+    address = DISTANCE_SUFFIX.sub('', contractor.get('address') or '')
+    phone = re.sub(r'\D', '', str(contractor.get('phone') or ''))
+    return {
+        'contractor_id': str(contractor['contractor_id']) if contractor.get('contractor_id') else None,
+        'name': _normalize_text(contractor.get('name')),
+        'rating': _normalize_number(contractor.get('rating')),
+        'address': _normalize_text(address),
+        'phone': phone[-10:] or None,
+        'website': _normalize_text((contractor.get('website') or '').rstrip('/')),
+        'description': _normalize_text(contractor.get('description')),
+        'reviews_count': _normalize_number(contractor.get('reviews_count')),
+        'certificates_count': _normalize_number(contractor.get('certificates_count')),
+        'certificate_name': _normalize_text(contractor.get('certificate_name')),
+        'certifications': sorted(filter(None, map(_normalize_text, contractor.get('certifications') or []))),
+        'services': sorted(filter(None, map(_normalize_text, contractor.get('services') or []))),
+    }
+
+
+def contractor_fingerprint(contractor):
+    normalized = normalize_contractor(contractor)
+    payload = json.dumps([normalized[field] for field in FINGERPRINT_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class FingerprintIndex:
+    """
+    Fingerprints from the last run of each area (a zipcode or crawl tile), keyed by area and then by
+    contractor_key(). A run only replaces the areas it crawled, so other areas' contractors are never
+    reported as disappeared.
+    """
+    def __init__(self, state_file=STATE_FILE):
+        self.state_file = state_file
+        self.areas = {}
+        if os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.areas = state.get('areas', {})
+            if 'contractors' in state:
+                # State from before fingerprints were kept per area: still used to tell new from
+                # changed, but never reported as disappeared, as its area is unknown
+                self.areas.setdefault(UNKNOWN_AREA, state['contractors'])
+
+    def diff(self, contractors_by_area):
+        """
+        Compare a run (area -> its contractors) against the index; returns the delta and the index
+        entries for the areas crawled
+        """
+        previous = {}
+        for area, entries in self.areas.items():
+            for key, entry in entries.items():
+                previous.setdefault(key, entry)
+        crawled = {}
+        current = set()
+        delta = {'new': [], 'changed': [], 'disappeared': [], 'unchanged': 0}
+
+        for area, contractors in contractors_by_area.items():
+            entries = crawled.setdefault(str(area), {})
+            for contractor in contractors:
+                key = contractor_key(contractor)
+                if key in entries:
+                    continue
+                fingerprint = contractor_fingerprint(contractor)
+                entries[key] = {
+                    'fingerprint': fingerprint,
+                    'name': contractor.get('name'),
+                    'address': contractor.get('address')
+                }
+                # Found from several areas' radii: report it once
+                if key in current:
+                    continue
+                current.add(key)
+
+                entry = previous.get(key)
+                if entry is None:
+                    delta['new'].append(contractor)
+                elif entry['fingerprint'] != fingerprint:
+                    delta['changed'].append(contractor)
+                else:
+                    delta['unchanged'] += 1
+
+        # Gone from the areas just crawled, and not still listed by an area this run did not cover
+        elsewhere = {key for area, entries in self.areas.items() if area not in crawled and area != UNKNOWN_AREA
+                     for key in entries}
+        reported = set()
+        for area in crawled:
+            for key, entry in self.areas.get(area, {}).items():
+                if key not in current and key not in elsewhere and key not in reported:
+                    reported.add(key)
+                    delta['disappeared'].append({'key': key, 'name': entry.get('name'), 'address': entry.get('address')})
+
+        return delta, crawled
+
+    def save(self, crawled):
+        """Replace the crawled areas' entries, keeping every other area's as they were"""
+        self.areas.update(crawled)
+        if UNKNOWN_AREA in self.areas:
+            located = {key for area, entries in self.areas.items() if area != UNKNOWN_AREA for key in entries}
+            unknown = {key: entry for key, entry in self.areas[UNKNOWN_AREA].items() if key not in located}
+            if unknown:
+                self.areas[UNKNOWN_AREA] = unknown
+            else:
+                del self.areas[UNKNOWN_AREA]
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': datetime.now().isoformat(), 'areas': self.areas}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+
+def write_delta(contractors_by_area, state_file=STATE_FILE, delta_file=DELTA_FILE):
+    """
+    Diff this run (area -> contractors found there, e.g. {zipcode: contractors}) against the last
+    run of the same areas, write the delta file and roll those areas' fingerprint state forward
+    """
+    index = FingerprintIndex(state_file)
+    delta, crawled = index.diff(contractors_by_area)
+    delta['areas'] = sorted(crawled)
+    delta['generated_at'] = datetime.now().isoformat()
+
+    with open(delta_file, 'w', encoding='utf-8') as f:
+        json.dump(delta, f, indent=2, ensure_ascii=False)
+    index.save(crawled)
+
+    print(f"\n✓ Delta saved to {delta_file} for {len(crawled)} area(s): {len(delta['new'])} new, "
+          f"{len(delta['changed'])} changed, {len(delta['disappeared'])} disappeared, {delta['unchanged']} unchanged")
+    return delta
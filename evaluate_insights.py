@@ -1,11 +1,11 @@
 """
 LLM Evaluation Framework
 """
-import sqlite3
 import json
+from db import DB_FILE, connection
 
 class InsightEvaluator:
-    def __init__(self, db_name='contractors.db'):
+    def __init__(self, db_name=DB_FILE):
         self.db_name = db_name
     
     def evaluate_insight(self, insight_text, contractor_data):
@@ -58,18 +58,16 @@ class InsightEvaluator:
         return 4
     
     def generate_report(self):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT c.id, c.name, c.rating, i.insight_text
-            FROM contractors c
-            JOIN insights i ON c.id = i.contractor_id
-        ''')
+        with connection(self.db_name) as conn:
+            rows = conn.execute('''
+                SELECT c.id, c.name, c.rating, i.insight_text
+                FROM contractors c
+                JOIN insights i ON c.id = i.contractor_id
+            ''').fetchall()
         
         results = []
         
-        for row in cursor.fetchall():
+        for row in rows:
             contractor_data = {'id': row[0], 'name': row[1], 'rating': row[2]}
             scores = self.evaluate_insight(row[3], contractor_data)
             results.append({
@@ -78,8 +76,6 @@ class InsightEvaluator:
                 'scores': scores
             })
         
-        conn.close()
-        
         if not results:
             print("\n✗ No insights found!")
             return
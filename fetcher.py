@@ -0,0 +1,82 @@
+"""
+Browser-free HTTP fetch backend
+Pulls results pages over a pooled keep-alive requests.Session with bounded concurrency
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/119.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class HttpFetcher:
+    def __init__(self, max_concurrency=4, timeout=20, retries=2, backoff=0.5):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.stats = {'requests': 0, 'bytes': 0, 'seconds': 0.0, 'errors': 0}
+        # fetch() runs on several executor threads at once
+        self.stats_lock = threading.Lock()
+
+        # One pooled connection per concurrent request, reused across pages (keep-alive)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=max_concurrency,
+            pool_maxsize=max_concurrency,
+            max_retries=Retry(total=retries, backoff_factor=backoff,
+                              status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=("GET",))
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def fetch(self, url):
+        """
+        GET one page; returns its text, or None if the page does not exist (404). Raises RuntimeError
+        when the request fails for any other reason, after the adapter's retries, so a temporary
+        failure is never mistaken for the end of the results.
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self._count(time.perf_counter() - start, errors=1)
+            raise RuntimeError(f"Fetch failed for {url}: {e}") from e
+
+        failed = response.status_code not in (200, 404)
+        self._count(time.perf_counter() - start, len(response.content), errors=int(failed))
+        if response.status_code == 404:
+            return None
+        if failed:
+            raise RuntimeError(f"HTTP {response.status_code} for {url}")
+        return response.text
+
+    def _count(self, seconds, size=0, errors=0):
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += size
+            self.stats['seconds'] += seconds
+            self.stats['errors'] += errors
+
+    def fetch_many(self, urls):
+        """Fetch several pages concurrently (at most max_concurrency in flight), preserving order; raises as fetch() does"""
+        return list(self.executor.map(self.fetch, urls))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,98 @@
+"""
+Local HTTP server for recorded results pages
+Serves page_source.html / page_source_debug.html (or any snapshots) so the scraper can run offline
+"""
+import argparse
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class FixtureServer:
+    """
+    Serves pages[N-1] for any path with ?page=N (page 1 when absent) and 404 past the last page,
+    after an optional per-request latency.
+    """
+    def __init__(self, pages, host='127.0.0.1', port=0, latency=0.0):
+        self.pages = [page.encode('utf-8') if isinstance(page, str) else page for page in pages]
+        self.latency = latency
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @classmethod
+    def from_files(cls, filenames, **kwargs):
+        pages = []
+        for filename in filenames:
+            with open(filename, 'rb') as f:
+                pages.append(f.read())
+        return cls(pages, **kwargs)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/results"
+
+    def _handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 so clients can keep connections alive between pages
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if fixture.latency:
+                    time.sleep(fixture.latency)
+                query = parse_qs(urlparse(self.path).query)
+                try:
+                    page = int(query.get('page', ['1'])[0])
+                except ValueError:
+                    page = 0
+
+                if 1 <= page <= len(fixture.pages):
+                    body, status = fixture.pages[page - 1], 200
+                else:
+                    body, status = b"Not found", 404
+
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded results pages locally")
+    parser.add_argument('files', nargs='*', default=['page_source.html', 'page_source_debug.html'])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds to delay each response")
+    args = parser.parse_args()
+
+    server = FixtureServer.from_files(args.files, port=args.port, latency=args.latency)
+    print(f"Serving {len(args.files)} pages at {server.url}?page=N")
+    print(f"Try: python3 scraper.py --backend http --base-url {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,149 @@
+"""
+Batch Normalization Stage
+Cleans ratings, review counts, phones and addresses for whole batches of scraped contractors
+before they are written, optionally spread across worker processes for large loads
+"""
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+NON_DIGITS = re.compile(r'\D')
+RATING_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+COUNT_NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?')
+DISTANCE_SUFFIX = re.compile(r'\s*-\s*[\d.]+\s*mi\s*$')
+# Last comma-separated part of "[street, ]City, ST[ 12345[-6789]][, USA]"
+STATE_ZIP = re.compile(r'(?P<state>[A-Za-z]{2})\.?(?:\s+(?P<zip>\d{5})(?:-?\d{4})?)?')
+COUNTRY_SUFFIXES = {'USA', 'US', 'United States'}
+NO_ADDRESS_PARTS = (None, None, None)
+
+# Batches handed to workers ahead of the one being written, per worker
+PREFETCH_PER_WORKER = 2
+
+
+def clean_rating(rating):
+    """'4.9', '4.9★', 4.9 -> 4.9; missing or unreadable -> 0.0"""
+    if isinstance(rating, (int, float)):
+        return float(rating)
+    match = RATING_NUMBER.search(rating) if rating else None
+    return float(match.group()) if match else 0.0
+
+
+def clean_count(count):
+    """
+    444, 444.0, '444', '444.0', '1,234 reviews' -> int; missing or unreadable -> None (unknown, not
+    zero). Decimals are read as numbers first, so stripping the point cannot turn 444.0 into 4440.
+    """
+    if count is None or isinstance(count, bool):
+        return None
+    if isinstance(count, int):
+        return count
+    try:
+        return int(float(str(count).replace(',', '')))
+    except (ValueError, OverflowError):
+        pass
+    match = COUNT_NUMBER.search(str(count))
+    return int(float(match.group().replace(',', ''))) if match else None
+
+
+def clean_phone(phone):
+    """
+    US numbers in E.164 ('+18625295991'). Anything else (extensions, foreign numbers) is kept as
+    scraped rather than dropped.
+    """
+    if not phone:
+        return None
+    digits = NON_DIGITS.sub('', str(phone))
+    if len(digits) == 10:
+        return '+1' + digits
+    if len(digits) == 11 and digits[0] == '1':
+        return '+' + digits
+    return str(phone).strip() or None
+
+
+def parse_address(address):
+    """(city, state, zip) of an address, or all None if it does not end in a city and state"""
+    if not address:
+        return NO_ADDRESS_PARTS
+    if address.endswith('mi'):
+        address = DISTANCE_SUFFIX.sub('', address)
+    return _parse_address_tail(address)
+
+
+@lru_cache(maxsize=65536)
+def _parse_address_tail(address):
+    # Cached: the scraper's "City, ST - 17.3 mi" cards repeat the same few cities once the distance is gone
+    parts = address.rsplit(',', 3)
+    if len(parts) > 2 and parts[-1].strip() in COUNTRY_SUFFIXES:
+        parts.pop()
+    if len(parts) < 2:
+        return NO_ADDRESS_PARTS
+    city = parts[-2].strip()
+    match = STATE_ZIP.fullmatch(parts[-1].strip())
+    if not city or city.isdigit() or not match:
+        return NO_ADDRESS_PARTS
+    return city, match.group('state').upper(), match.group('zip')
+
+
+def normalize_fields(rows):
+    """
+    [(rating, reviews_count, phone, address)] -> [(rating, reviews_count, phone, (city, state, zip))];
+    the unit of work for a worker
+    """
+    return [(clean_rating(rating), clean_count(reviews_count), clean_phone(phone), parse_address(address))
+            for rating, reviews_count, phone, address in rows]
+
+
+def _raw_fields(records):
+    # Only the fields being cleaned cross the process boundary, not whole records
+    return [(record.get('rating'), record.get('reviews_count'), record.get('phone'), record.get('address'))
+            for record in records]
+
+
+def _merge(records, fields):
+    # In place: copying every record costs more than all of the cleaning put together
+    for record, (rating, reviews_count, phone, (city, state, zip_code)) in zip(records, fields):
+        record['rating'] = rating
+        record['reviews_count'] = reviews_count
+        record['phone'] = phone
+        record['city'] = city
+        record['state'] = state
+        record['zip'] = zip_code
+        # Stored as '' rather than NULL: NULLs never conflict in UNIQUE(name, address), so reloads would duplicate
+        record['address'] = record.get('address') or ''
+    return records
+
+
+def normalize_batch(records):
+    """Normalize rating, review count, phone and address and add city/state/zip, in place; returns the records"""
+    return _merge(records, normalize_fields(_raw_fields(records)))
+
+
+def normalize_record(record):
+    """A normalized copy of one record, leaving the caller's dict alone"""
+    return normalize_batch([dict(record)])[0]
+
+
+def normalize_batches(batches, workers=0):
+    """
+    Normalize an iterable of record batches, in order. With workers > 1 the batches are cleaned in
+    a process pool a few batches ahead of the consumer, so cleaning overlaps with writing; the input
+    is still read lazily, so a streamed or followed source stays streamed.
+    """
+    if workers <= 1:
+        for batch in batches:
+            yield normalize_batch(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            batch = list(batch)
+            pending.append((batch, pool.submit(normalize_fields, _raw_fields(batch))))
+            # Hand back finished batches straight away, and block once enough are in flight
+            while pending and (len(pending) >= workers * PREFETCH_PER_WORKER or pending[0][1].done()):
+                records, future = pending.popleft()
+                yield _merge(records, future.result())
+        while pending:
+            records, future = pending.popleft()
+            yield _merge(records, future.result())
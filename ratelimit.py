@@ -0,0 +1,60 @@
+"""
+Request Rate Limiting
+Token buckets for the model deployment's requests-per-minute and tokens-per-minute quotas, shared
+by every thread calling the API, so concurrent callers stay under quota without fixed sleeps
+"""
+import threading
+import time
+
+BURST_WINDOWS = 6  # default bucket capacity is per_minute / BURST_WINDOWS
+
+
+class TokenBucket:
+    """
+    Holds up to capacity tokens, refilled continuously at per_minute / 60 a second. acquire() blocks
+    until enough have built up. Thread-safe; waiters are served in arrival order.
+    """
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        # Quotas are enforced over short windows too, so allow ten seconds' worth at once, not a minute's
+        self.capacity = float(capacity or per_minute / BURST_WINDOWS)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """Take amount tokens, waiting as long as needed. Returns seconds waited."""
+        start = time.monotonic()
+        # Reserve under the lock, sleep outside it: the balance may go negative, so each caller is
+        # charged in full (even beyond the capacity) and waits out its own share of the debt, and
+        # later callers queue behind it instead of overtaking
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return time.monotonic() - start
+
+
+class RateLimiter:
+    """A request bucket and a token bucket, sized to a deployment's RPM and TPM quotas"""
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.stats = {'requests': 0, 'tokens': 0, 'waited_seconds': 0.0}
+        self.stats_lock = threading.Lock()
+
+    def acquire(self, tokens):
+        """Block until one more request of about this many tokens fits both quotas"""
+        waited = self.requests.acquire(1) + self.tokens.acquire(tokens)
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats['tokens'] += tokens
+            self.stats['waited_seconds'] += waited
+        return waited
@@ -0,0 +1,165 @@
+"""
+Entity Resolution
+Finds contractors stored more than once (e.g. scraped from neighbouring zipcodes, where the card
+address carries a different search distance) by comparing only rows that share a blocking key,
+so the work grows with the number of rows rather than the number of pairs
+"""
+import re
+from collections import defaultdict
+from itertools import combinations
+
+NAME_TOKEN = re.compile(r'[a-z0-9]+')
+# Host of a website with or without a scheme; a fraction of the cost of urllib.parse
+WEBSITE_HOST = re.compile(r'(?:[a-z][a-z0-9+.-]*:)?(?://)?(?:[^@/]*@)?(?:www\.)?([^/:?#\s]+)', re.I)
+# Dropped before comparing names, so "Matute Roofing, LLC" and "Matute Roofing" agree
+NAME_STOPWORDS = {'llc', 'inc', 'co', 'corp', 'corporation', 'company', 'ltd', 'the', 'and', 'of'}
+# Shared by unrelated contractors (directory and profile pages), so useless as evidence
+GENERIC_DOMAINS = {
+    'gaf.com', 'facebook.com', 'instagram.com', 'linkedin.com', 'yelp.com', 'google.com',
+    'sites.google.com', 'business.site', 'houzz.com', 'angi.com', 'homeadvisor.com', 'nextdoor.com',
+}
+# Blocks bigger than this (a call centre's phone, a very common name) are skipped rather than compared pairwise
+MAX_BLOCK_SIZE = 50
+# Token overlap (Jaccard) two names need before a shared phone or website counts as the same contractor
+MIN_NAME_SIMILARITY = 0.5
+
+# Columns find_duplicates() expects, in this order
+RESOLVE_COLUMNS = ('id', 'name', 'phone', 'website', 'source_id', 'city', 'state')
+
+
+def name_tokens(name):
+    # "L.L.C." and "Bob's" become "llc" and "bobs" rather than single letters
+    name = (name or '').casefold().replace('.', '').replace("'", '')
+    return frozenset(token for token in NAME_TOKEN.findall(name) if token not in NAME_STOPWORDS)
+
+
+def website_domain(website):
+    match = WEBSITE_HOST.match(website) if website else None
+    host = match.group(1).lower() if match else None
+    return host if host and host not in GENERIC_DOMAINS else None
+
+
+class Candidate:
+    """One contractors row, reduced to what blocking and comparison look at"""
+    __slots__ = ('id', 'tokens', 'phone', 'domain', 'source_id', 'city', 'state')
+
+    def __init__(self, contractor_id, name, phone, website, source_id, city, state):
+        self.id = contractor_id
+        self.tokens = name_tokens(name)
+        # Only numbers normalize.py could read; anything else is too noisy to match on
+        self.phone = phone if phone and phone.startswith('+') else None
+        self.domain = website_domain(website)
+        self.source_id = source_id
+        self.city = city.casefold() if city else None
+        self.state = state
+
+    def blocking_keys(self):
+        if self.source_id:
+            yield ('source_id', self.source_id)
+        if self.phone:
+            yield ('phone', self.phone)
+        if self.domain:
+            yield ('domain', self.domain)
+        if self.tokens:
+            yield ('name', ' '.join(sorted(self.tokens)), self.state)
+
+
+def match_reason(a, b):
+    """Why a and b are the same contractor, or None if they are not"""
+    if a.source_id and b.source_id:
+        # The data-layer id is authoritative either way
+        return 'source_id' if a.source_id == b.source_id else None
+
+    union = len(a.tokens | b.tokens)
+    similarity = len(a.tokens & b.tokens) / union if union else 0.0
+    if a.phone and a.phone == b.phone and similarity >= MIN_NAME_SIMILARITY:
+        return 'phone'
+    if a.domain and a.domain == b.domain and similarity >= MIN_NAME_SIMILARITY:
+        return 'website'
+    # Same name in the same place, unless a phone or website says they are different businesses
+    conflicting = (a.phone and b.phone and a.phone != b.phone) or (a.domain and b.domain and a.domain != b.domain)
+    if (similarity == 1.0 and not conflicting and a.state == b.state
+            and (a.city == b.city or not a.city or not b.city)):
+        return 'name'
+    return None
+
+
+class DisjointSet:
+    """Union-find that never joins two sets holding different data-layer ids"""
+    def __init__(self):
+        self.parent = {}
+        self.source_ids = {}  # root -> the one source_id in its set, if any
+
+    def add(self, item, source_id=None):
+        self.parent.setdefault(item, item)
+        if source_id:
+            self.source_ids[item] = source_id
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        """Join the sets of a and b; False if they already were one, or if that would join two ids"""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        id_a, id_b = self.source_ids.get(a), self.source_ids.get(b)
+        if id_a and id_b and id_a != id_b:
+            # Each row may match an id-less row in between, but the ids say these are two contractors
+            return False
+        # The lower id becomes the root, so it ends up as the canonical record
+        root, child = min(a, b), max(a, b)
+        self.parent[child] = root
+        if id_a or id_b:
+            self.source_ids[root] = id_a or id_b
+        self.source_ids.pop(child, None)
+        return True
+
+
+def find_duplicates(rows):
+    """
+    Group rows of RESOLVE_COLUMNS into duplicate clusters. Returns ([(canonical_id, [duplicate ids])],
+    stats); the canonical record is the oldest (lowest id), so its insights and links stay put.
+    """
+    stats = {'rows': 0, 'blocks': 0, 'skipped_blocks': 0, 'comparisons': 0, 'conflicts': 0,
+             'matches': defaultdict(int)}
+    blocks = defaultdict(list)
+    groups = DisjointSet()
+    for row in rows:
+        candidate = Candidate(*row)
+        groups.add(candidate.id, candidate.source_id)
+        stats['rows'] += 1
+        for key in candidate.blocking_keys():
+            blocks[key].append(candidate)
+
+    for block in blocks.values():
+        if len(block) < 2:
+            continue
+        if len(block) > MAX_BLOCK_SIZE:
+            stats['skipped_blocks'] += 1
+            continue
+        stats['blocks'] += 1
+        for a, b in combinations(block, 2):
+            if groups.find(a.id) == groups.find(b.id):
+                continue
+            stats['comparisons'] += 1
+            reason = match_reason(a, b)
+            if not reason:
+                continue
+            if groups.union(a.id, b.id):
+                stats['matches'][reason] += 1
+            else:
+                stats['conflicts'] += 1
+
+    clusters = defaultdict(list)
+    for contractor_id in groups.parent:
+        root = groups.find(contractor_id)
+        if root != contractor_id:
+            clusters[root].append(contractor_id)
+    stats['matches'] = dict(stats['matches'])
+    return sorted((canonical, sorted(duplicates)) for canonical, duplicates in clusters.items()), stats
@@ -2,65 +2,410 @@
 GAF Contractor Scraper with Numbered Pagination
 Clicks through page numbers (1, 2, 3, ... 10) to get all contractors
 """
+import argparse
 import json
+import re
 import time
-from selenium import webdriver
+from bs4 import BeautifulSoup, SoupStrainer
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from waits import PageWaiter, PhaseTimer, DEFAULT_TIMEOUT
+from fetcher import HttpFetcher
+from browser import create_chrome, PROFILES
+from checkpoint import ContractorStream, STREAM_FILE, iter_jsonl
+
+CARD_SELECTOR = "article.certification-card"
+CARD_FALLBACK_SELECTOR = "div.certification-card__wrapper"
+CERT_KEYWORDS = ['award', 'elite', 'master', 'certified']
+EXTRACTION_MODES = ('js', 'html', 'webdriver')
+BACKENDS = ('selenium', 'http')
+MAX_PAGES = 15  # Safety limit
+
+# Walks every card in the page (or just arguments[0] when given a card element)
+# and returns plain records, so a whole page costs a single WebDriver round trip
+EXTRACT_CARDS_JS = """
+var cardSelector = arguments[1], fallbackSelector = arguments[2];
+var cards = arguments[0] ? [arguments[0]] : document.querySelectorAll(cardSelector);
+if (!cards.length) { cards = document.querySelectorAll(fallbackSelector); }
+
+function text(el) {
+    if (!el) { return null; }
+    var parts = [];
+    var walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        var node = walker.currentNode;
+        if (!node.parentElement.closest('.sr-only')) { parts.push(node.nodeValue); }
+    }
+    return parts.join(' ').split(/\\s+/).filter(Boolean).join(' ');
+}
+
+function dataLayer(el) {
+    if (!el) { return null; }
+    try {
+        var data = JSON.parse(el.getAttribute('data-layer'));
+        if (Array.isArray(data)) { data = data.length ? data[0] : {}; }
+        return data.event_attributes || data;
+    } catch (e) {
+        return null;
+    }
+}
+
+return Array.prototype.map.call(cards, function (card) {
+    var name = card.querySelector('h2 a, h3 a') || card.querySelector('h2, h3');
+    var rating = card.querySelector("div.rating-stars, span[class*='rating']");
+    var address = card.querySelector("p[class*='city'], p[class*='location'], p[class*='address']");
+    var phone = card.querySelector("a[href*='tel:']");
+    var website = card.querySelector("a[target='_blank'][href*='http']");
+    return {
+        name: text(name),
+        rating: rating ? (rating.getAttribute('data-rating') || text(rating)) : null,
+        data_layer: dataLayer(card.querySelector('a[data-layer]')),
+        address: text(address),
+        phone: text(phone),
+        website: website ? website.href : null,
+        image_alts: Array.prototype.map.call(card.querySelectorAll('img[alt]'), function (img) {
+            return img.getAttribute('alt');
+        })
+    };
+});
+"""
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+
+def parse_data_layer(data_layer_json):
+    """
+    Return the contractor attributes from a card's data-layer JSON.
+    GAF wraps them as [{"event": ..., "event_attributes": {...}}]
+    """
+    data = json.loads(data_layer_json)
+    if isinstance(data, list):
+        data = data[0] if data else {}
+    return data.get('event_attributes', data)
+
+
+def apply_data_layer(contractor, data):
+    """Merge data-layer attributes into a contractor dict"""
+    contractor['contractor_id'] = data.get('contractor_id')
+    contractor['name'] = contractor.get('name') or data.get('contractor_name')
+    contractor['rating'] = contractor.get('rating') or str(data.get('contractor_rating', ''))
+    contractor['reviews_count'] = data.get('contractor_reviews_count')
+    contractor['certificates_count'] = data.get('contractor_certificates_count')
+    contractor['certificate_name'] = data.get('contractor_certificate_name')
+
+
+def contractor_from_record(record):
+    """Build a contractor dict from one EXTRACT_CARDS_JS record"""
+    contractor = {
+        'name': record.get('name') or None,
+        'rating': record.get('rating') or None,
+    }
+    
+    if record.get('data_layer'):
+        apply_data_layer(contractor, record['data_layer'])
+    
+    contractor['address'] = record.get('address') or None
+    contractor['phone'] = record.get('phone') or None
+    contractor['website'] = record.get('website') or None
+    contractor['certifications'] = [
+        alt for alt in record.get('image_alts') or []
+        if alt and any(word in alt.lower() for word in CERT_KEYWORDS)
+    ]
+    contractor['description'] = None
+    contractor['services'] = []
+    
+    return contractor
+
+
+DISTANCE_SUFFIX = re.compile(r'\s*-\s*[\d.]+\s*mi\s*$')
+
+def contractor_key(contractor):
+    """
+    Stable de-duplication key for a contractor.
+    Uses the GAF contractor_id when the data-layer provided one; otherwise name + address
+    with the "- 17.3 mi" distance suffix removed, since that changes with the search center.
+    """
+    if contractor.get('contractor_id'):
+        return f"id:{contractor['contractor_id']}"
+    address = DISTANCE_SUFFIX.sub('', contractor.get('address') or '')
+    return f"{contractor.get('name', '')}_{address}"
+
+
+def _text(element):
+    """Whitespace-normalised text of a BeautifulSoup element"""
+    return ' '.join(element.get_text(' ').split())
+
+
+def parse_card(card):
+    """Extract data from a single parsed certification-card (mirrors extract_contractor_data)"""
+    contractor = {}
+
+    name_elem = card.select_one("h2 a, h3 a") or card.select_one("h2, h3")
+    contractor['name'] = _text(name_elem) if name_elem else None
+
+    rating_elem = card.select_one("div.rating-stars, span[class*='rating']")
+    if rating_elem:
+        contractor['rating'] = rating_elem.get('data-rating') or _text(rating_elem)
+    else:
+        contractor['rating'] = None
+
+    link_elem = card.select_one("a[data-layer]")
+    if link_elem and link_elem.get('data-layer'):
+        try:
+            apply_data_layer(contractor, parse_data_layer(link_elem['data-layer']))
+        except (ValueError, AttributeError):
+            pass
+
+    address_elem = card.select_one("p[class*='city'], p[class*='location'], p[class*='address']")
+    contractor['address'] = _text(address_elem) if address_elem else None
+
+    phone_elem = card.select_one("a[href*='tel:']")
+    contractor['phone'] = _text(phone_elem) if phone_elem else None
+
+    website_elem = card.select_one("a[target='_blank'][href*='http']")
+    contractor['website'] = website_elem.get('href') if website_elem else None
+
+    certs = []
+    for img in card.select("img[alt]"):
+        alt = img.get('alt')
+        if alt and any(word in alt.lower() for word in CERT_KEYWORDS):
+            certs.append(alt)
+    contractor['certifications'] = certs
+
+    contractor['description'] = None
+    contractor['services'] = []
+
+    return contractor
+
+
+# Only the card articles are turned into a tree; the rest of the page is skipped by the parser
+CARD_STRAINER = SoupStrainer('article', class_='certification-card')
+
+
+def parse_cards_html(html):
+    """Parse every contractor card out of a results page's HTML in one pass"""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=CARD_STRAINER)
+    cards = soup.select(CARD_SELECTOR)
+    if not cards:
+        soup = BeautifulSoup(html, HTML_PARSER)
+        cards = soup.select(CARD_FALLBACK_SELECTOR)
+
+    # Screen-reader labels ("Phone Number:") are not rendered text
+    for hidden in soup.select(".sr-only"):
+        hidden.decompose()
+
+    return [parse_card(card) for card in cards]
+
 
 class ContractorScraper:
-    def __init__(self, zipcode="10013", country_code="us"):
+    def __init__(self, zipcode="10013", country_code="us", extraction_mode="js", wait_timeout=DEFAULT_TIMEOUT,
+                 distance=25, headless=False, backend="selenium", base_url=None, http_concurrency=4, stream=None,
+                 browser_profile="default", user_data_dir=None):
+        if extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode: {extraction_mode}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
         self.zipcode = zipcode
         self.country_code = country_code
-        self.base_url = "https://www.gaf.com/en-us/roofing-contractors/residential"
+        self.distance = distance
+        self.headless = headless
+        self.browser_profile = browser_profile
+        self.user_data_dir = user_data_dir
+        self.extraction_mode = extraction_mode
+        self.backend = backend
+        self.http_concurrency = http_concurrency
+        self.base_url = base_url or "https://www.gaf.com/en-us/roofing-contractors/residential"
         self.contractors = []
         self.seen_ids = set()
+        self.stream = stream
+        self.start_page = 1
+        self.completed = False
+        self.extraction_stats = {'pages': 0, 'cards': 0, 'seconds': 0.0}
+        self.wait_timeout = wait_timeout
+        self.waiter = None
+        self.timings = PhaseTimer()
+        self.run_summary = {}
+    
+    @property
+    def contractor_count(self):
+        """Contractors accepted so far, whether held in memory or streamed to disk"""
+        return self.stream.count if self.stream else len(self.contractors)
+    
+    def open_stream(self):
+        """Open the JSONL stream, restoring seen_ids and the start page from an unfinished run"""
+        checkpoint = self.stream.load_checkpoint(self.zipcode)
+        self.stream.open(checkpoint)
+        if checkpoint:
+            self.seen_ids = set(checkpoint['seen_ids'])
+            self.start_page = checkpoint['last_completed_page'] + 1
+            print(f"\n⏩ Resuming {self.zipcode} at page {self.start_page} "
+                  f"({checkpoint['count']} contractors already in {self.stream.filename})")
+    
+    def complete_page(self, page_number):
+        """Checkpoint after a page has been fully extracted"""
+        if self.stream:
+            self.stream.save_checkpoint(self.zipcode, page_number, self.seen_ids)
+    
+    def results_url(self, page=1):
+        url = f"{self.base_url}?distance={self.distance}&postalCode={self.zipcode}&countryCode={self.country_code}"
+        return url if page == 1 else f"{url}&page={page}"
     
     def scrape_contractors(self):
+        """Scrape all contractors with the configured backend, falling back to the browser"""
+        if self.stream:
+            self.open_stream()
+        
+        try:
+            if self.backend == 'http':
+                if self.scrape_with_http():
+                    return self.contractors
+                print("\n⚠️  HTTP backend found no contractors, falling back to Selenium")
+            
+            return self.scrape_with_browser()
+        finally:
+            if self.stream:
+                # A finished run is marked complete so the next one starts fresh; otherwise the
+                # last page checkpoint stands and anything written after it is dropped on resume
+                if self.completed:
+                    self.stream.save_checkpoint(self.zipcode, self.start_page - 1, self.seen_ids, complete=True)
+                self.stream.close()
+    
+    def scrape_with_http(self):
+        """
+        Fetch results pages over a pooled HTTP session and parse them in-process.
+        Pages after the first are requested http_concurrency at a time and processed in order;
+        the crawl stops at the first missing (404) page or page without new contractors. Any other
+        failed request raises RuntimeError and leaves the stream checkpoint incomplete, so a rerun resumes.
+        """
+        print("\n" + "="*80)
+        print("GAF CONTRACTOR SCRAPER - HTTP BACKEND")
+        print("="*80)
+        
+        self.timings = PhaseTimer()
+        
+        with HttpFetcher(max_concurrency=self.http_concurrency) as fetcher:
+            page_number = self.start_page
+            
+            if page_number == 1:
+                print(f"\n1. Fetching: {self.results_url()}\n")
+                try:
+                    with self.timings.phase('navigate'):
+                        html = fetcher.fetch(self.results_url())
+                except RuntimeError as e:
+                    print(f"✗ {e}")
+                    return 0
+                if not html:
+                    return 0
+                
+                with self.timings.phase('extract'):
+                    new_on_page = self.extract_from_html(html)
+                if new_on_page == 0:
+                    return 0
+                print(f"✓ Extracted {new_on_page} contractors from page 1")
+                self.complete_page(1)
+                self.start_page = page_number = 2
+            
+            done = False
+            while not done and page_number <= MAX_PAGES:
+                batch = list(range(page_number, min(page_number + self.http_concurrency, MAX_PAGES + 1)))
+                try:
+                    with self.timings.phase('paginate'):
+                        pages = fetcher.fetch_many([self.results_url(page) for page in batch])
+                except RuntimeError as e:
+                    print(f"✗ {e}. Stopping; the run is not complete (rerun with --stream to resume).")
+                    raise
+                
+                for page, html in zip(batch, pages):
+                    if html is None:
+                        print(f"✗ No page {page}. Stopping.")
+                        done = True
+                        break
+                    
+                    print(f"\n📄 PAGE {page}")
+                    with self.timings.phase('extract'):
+                        new_on_page = self.extract_from_html(html)
+                    if new_on_page == 0:
+                        print(f"✗ No new contractors on page {page}. Stopping.")
+                        done = True
+                        break
+                    print(f"✓ Extracted {new_on_page} contractors from page {page}")
+                    self.complete_page(page)
+                    self.start_page = page + 1
+                
+                page_number = batch[-1] + 1
+            
+            fetch_stats = dict(fetcher.stats)
+        
+        self.completed = True
+        print(f"\nTotal contractors scraped: {self.contractor_count}")
+        print(f"HTTP: {fetch_stats['requests']} requests, {fetch_stats['bytes'] / 1024:.0f} KB")
+        self.timings.print_summary()
+        
+        self.run_summary = {
+            'zipcode': self.zipcode,
+            'backend': 'http',
+            'contractors': self.contractor_count,
+            'extraction': dict(self.extraction_stats, mode='html'),
+            'http': fetch_stats,
+            'timings': self.timings.summary()
+        }
+        return self.contractor_count
+    
+    def scrape_with_browser(self):
         """Scrape all contractors by clicking through numbered pages"""
         print("\n" + "="*80)
         print("GAF CONTRACTOR SCRAPER - NUMBERED PAGINATION")
         print("="*80)
         
-        driver = webdriver.Chrome()
-        driver.maximize_window()
+        driver = self.create_driver()
+        self.waiter = PageWaiter(driver, CARD_SELECTOR, timeout=self.wait_timeout)
+        self.timings = PhaseTimer()
         
         try:
-            url = f"{self.base_url}?distance=25&postalCode={self.zipcode}&countryCode={self.country_code}"
+            url = self.results_url()
             print(f"\n1. Navigating to: {url}\n")
-            driver.get(url)
             
             print("2. Waiting for initial page load...")
-            time.sleep(8)
+            with self.timings.phase('navigate'):
+                driver.get(url)
+                card_count = self.waiter.wait_for_cards()
+                self.waiter.wait_for_network_idle()
+            print(f"   ✓ {card_count} cards rendered")
+            
+            # Resuming: click through already-completed pages without extracting them
+            first_page = self.start_page
+            for page in range(2, first_page + 1):
+                print(f"   ⏩ Skipping to page {page}...")
+                if not self.go_to_page(driver, page):
+                    raise RuntimeError(f"Could not reach page {page} to resume")
             
-            # Scrape page 1
+            # Scrape the first page
             print("\n" + "="*80)
-            print("📄 SCRAPING PAGE 1")
+            print(f"📄 SCRAPING PAGE {first_page}")
             print("="*80)
             new_on_page = self.extract_current_page(driver)
-            print(f"✓ Extracted {new_on_page} contractors from page 1")
-            print(f"   Running total: {len(self.contractors)}")
+            print(f"✓ Extracted {new_on_page} contractors from page {first_page}")
+            print(f"   Running total: {self.contractor_count}")
+            self.complete_page(first_page)
+            self.start_page = first_page + 1
             
-            # Now click through pages 2, 3, 4, etc.
-            page_number = 2
-            max_pages = 15  # Safety limit
+            # Now click through the following pages
+            page_number = first_page + 1
             
-            while page_number <= max_pages:
+            while page_number <= MAX_PAGES:
                 print("\n" + "="*80)
                 print(f"📄 GOING TO PAGE {page_number}")
                 print("="*80)
                 
-                # Try to click the page number
-                if not self.click_page_number(driver, page_number):
-                    print(f"✗ Could not find page {page_number} button. Stopping.")
+                if not self.go_to_page(driver, page_number):
                     break
                 
-                # Wait for page to load
-                print(f"   Waiting for page {page_number} to load...")
-                time.sleep(5)
-                
                 # Extract contractors from this page
                 new_on_page = self.extract_current_page(driver)
                 
@@ -69,16 +414,22 @@ class ContractorScraper:
                     break
                 
                 print(f"✓ Extracted {new_on_page} contractors from page {page_number}")
-                print(f"   Running total: {len(self.contractors)}")
+                print(f"   Running total: {self.contractor_count}")
+                self.complete_page(page_number)
+                self.start_page = page_number + 1
                 
                 page_number += 1
             
+            self.completed = True
             print("\n" + "="*80)
             print("🎉 SCRAPING COMPLETE!")
             print("="*80)
-            print(f"Total contractors scraped: {len(self.contractors)}")
+            print(f"Total contractors scraped: {self.contractor_count}")
+            print(f"Extraction ({self.extraction_mode}): {self.extraction_stats['cards']} cards, "
+                  f"{self.cards_per_second():.1f} cards/sec")
             print(f"Expected: ~93")
-            print(f"Difference: {abs(93 - len(self.contractors))}")
+            print(f"Difference: {abs(93 - self.contractor_count)}")
+            self.timings.print_summary()
             
         except Exception as e:
             print(f"\n✗ ERROR: {e}")
@@ -87,9 +438,41 @@ class ContractorScraper:
         finally:
             print("\n5. Closing browser...")
             driver.quit()
+            self.run_summary = {
+                'zipcode': self.zipcode,
+                'backend': 'selenium',
+                'contractors': self.contractor_count,
+                'extraction': dict(self.extraction_stats, mode=self.extraction_mode),
+                'timings': self.timings.summary()
+            }
         
         return self.contractors
     
+    def go_to_page(self, driver, page_number):
+        """Click to a results page and wait until its cards have replaced the previous ones"""
+        previous_first_card = self.waiter.first_card_identity()
+        
+        with self.timings.phase('paginate'):
+            # Try to click the page number
+            if not self.click_page_number(driver, page_number):
+                print(f"✗ Could not find page {page_number} button. Stopping.")
+                return False
+            
+            # Wait for the results to be swapped out
+            print(f"   Waiting for page {page_number} to load...")
+            try:
+                self.waiter.wait_for_page_change(previous_first_card)
+                self.waiter.wait_for_cards()
+            except TimeoutException:
+                print(f"✗ Page {page_number} did not load within {self.wait_timeout}s. Stopping.")
+                return False
+        
+        return True
+    
+    def create_driver(self):
+        """Launch Chrome; headless for pooled workers, maximized when watching a single run"""
+        return create_chrome(profile=self.browser_profile, headless=self.headless, user_data_dir=self.user_data_dir)
+    
     def click_page_number(self, driver, page_num):
         """
         Click on a specific page number in the pagination
@@ -99,7 +482,6 @@ class ContractorScraper:
         
         # Scroll to bottom where pagination is
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
         
         # Strategy 1: Direct page number link/button
         selectors = [
@@ -122,7 +504,7 @@ class ContractorScraper:
                         if elem.is_displayed():
                             # Scroll to element
                             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
-                            time.sleep(1)
+                            self.wait_until_clickable(elem)
                             
                             # Try regular click
                             try:
@@ -154,7 +536,7 @@ class ContractorScraper:
                 elem = driver.find_element(By.XPATH, selector)
                 if elem.is_displayed() and elem.is_enabled():
                     driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
-                    time.sleep(1)
+                    self.wait_until_clickable(elem)
                     
                     try:
                         elem.click()
@@ -170,34 +552,100 @@ class ContractorScraper:
         print(f"   ✗ Could not find page {page_num} button")
         return False
     
+    def wait_until_clickable(self, elem):
+        """Short bounded wait for a pagination control; the click itself handles failures"""
+        try:
+            self.waiter.wait_for_clickable(elem, timeout=2)
+        except TimeoutException:
+            pass
+    
     def extract_current_page(self, driver):
         """Extract all contractors from the currently loaded page"""
         # Scroll through page to ensure all content loads
-        self.scroll_page(driver)
+        with self.timings.phase('scroll'):
+            self.scroll_page(driver)
+        
+        with self.timings.phase('extract'):
+            return self.extract_loaded_page(driver)
+    
+    def extract_loaded_page(self, driver):
+        """Run the configured extraction strategy against the page as it is now"""
+        if self.extraction_mode == 'html':
+            # One round trip for the whole DOM, then parse in-process
+            return self.extract_from_html(driver.page_source)
+        
+        if self.extraction_mode == 'js':
+            return self.extract_with_script(driver)
         
-        # Wait a bit for any lazy loading
-        time.sleep(2)
+        start = time.perf_counter()
         
         # Find all contractor elements
-        contractor_elements = driver.find_elements(By.CSS_SELECTOR, "article.certification-card")
+        contractor_elements = driver.find_elements(By.CSS_SELECTOR, CARD_SELECTOR)
         
         if len(contractor_elements) == 0:
-            contractor_elements = driver.find_elements(By.CSS_SELECTOR, "div.certification-card__wrapper")
+            contractor_elements = driver.find_elements(By.CSS_SELECTOR, CARD_FALLBACK_SELECTOR)
         
         print(f"   Found {len(contractor_elements)} contractor elements on this page")
         
+        contractors = [self.extract_contractor_data(element) for element in contractor_elements]
+        self.record_extraction(len(contractors), time.perf_counter() - start)
+        
+        return self.add_contractors(contractors)
+    
+    def extract_with_script(self, driver):
+        """Extract all contractors on the page with a single execute_script call"""
+        start = time.perf_counter()
+        records = driver.execute_script(EXTRACT_CARDS_JS, None, CARD_SELECTOR, CARD_FALLBACK_SELECTOR) or []
+        contractors = [contractor_from_record(record) for record in records]
+        self.record_extraction(len(contractors), time.perf_counter() - start)
+        
+        print(f"   Found {len(contractors)} contractor elements on this page")
+        
+        return self.add_contractors(contractors)
+    
+    def extract_from_html(self, html):
+        """Extract all contractors from a page's HTML without touching the browser"""
+        start = time.perf_counter()
+        contractors = parse_cards_html(html)
+        self.record_extraction(len(contractors), time.perf_counter() - start)
+        
+        print(f"   Found {len(contractors)} contractor elements on this page")
+        
+        return self.add_contractors(contractors)
+    
+    def extract_from_file(self, filename):
+        """Extract contractors from a saved page snapshot (e.g. page_source.html)"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            return self.extract_from_html(f.read())
+    
+    def record_extraction(self, cards, seconds):
+        """Track extraction throughput for the run"""
+        self.extraction_stats['pages'] += 1
+        self.extraction_stats['cards'] += cards
+        self.extraction_stats['seconds'] += seconds
+        rate = cards / seconds if seconds > 0 else 0
+        print(f"   Extracted {cards} cards in {seconds:.3f}s ({rate:.1f} cards/sec)")
+    
+    def cards_per_second(self):
+        """Overall extraction throughput across all pages so far"""
+        seconds = self.extraction_stats['seconds']
+        return self.extraction_stats['cards'] / seconds if seconds > 0 else 0.0
+    
+    def add_contractors(self, contractors):
+        """De-duplicate extracted contractors into the run, returning how many were new"""
         new_count = 0
         
-        for idx, element in enumerate(contractor_elements, 1):
-            contractor = self.extract_contractor_data(element)
-            
+        for idx, contractor in enumerate(contractors, 1):
             if contractor and contractor.get('name'):
                 # Create unique ID to avoid duplicates
-                unique_id = f"{contractor.get('name', '')}_{contractor.get('address', '')}"
+                unique_id = contractor_key(contractor)
                 
                 if unique_id not in self.seen_ids:
                     self.seen_ids.add(unique_id)
-                    self.contractors.append(contractor)
+                    if self.stream:
+                        self.stream.append(contractor)
+                    else:
+                        self.contractors.append(contractor)
                     new_count += 1
                     print(f"      {idx}. ✓ {contractor.get('name', 'Unknown')}")
                 else:
@@ -208,102 +656,40 @@ class ContractorScraper:
         return new_count
     
     def scroll_page(self, driver):
-        """Scroll through the current page"""
-        # Scroll down gradually
+        """Scroll through the current page, then wait for lazy-loaded content to settle"""
+        # Step a viewport at a time so lazy loaders fire, without sleeping between steps
         scroll_height = driver.execute_script("return document.body.scrollHeight")
+        step = driver.execute_script("return window.innerHeight") or 300
         current_position = 0
         
         while current_position < scroll_height:
-            current_position += 300
+            current_position += step
             driver.execute_script(f"window.scrollTo(0, {current_position});")
-            time.sleep(0.3)
         
         # Scroll to bottom
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1)
+        
+        if self.waiter:
+            self.waiter.wait_for_network_idle()
+            try:
+                self.waiter.wait_for_cards()
+            except TimeoutException:
+                pass
     
     def extract_contractor_data(self, element):
-        """Extract data from a single contractor element"""
+        """Extract data from a single contractor element (one round trip per card)"""
         try:
-            contractor = {}
-            
-            # Name
-            try:
-                name_elem = element.find_element(By.CSS_SELECTOR, "h2 a, h3 a")
-                contractor['name'] = name_elem.text.strip()
-            except:
-                try:
-                    name_elem = element.find_element(By.CSS_SELECTOR, "h2, h3")
-                    contractor['name'] = name_elem.text.strip()
-                except:
-                    contractor['name'] = None
-            
-            # Rating
-            try:
-                rating_elem = element.find_element(By.CSS_SELECTOR, "div.rating-stars, span[class*='rating']")
-                rating = rating_elem.get_attribute("data-rating")
-                if not rating:
-                    rating = rating_elem.text.strip()
-                contractor['rating'] = rating
-            except:
-                contractor['rating'] = None
-            
-            # Data layer JSON (contains lots of info)
-            try:
-                link_elem = element.find_element(By.CSS_SELECTOR, "a[data-layer]")
-                data_layer_json = link_elem.get_attribute("data-layer")
-                if data_layer_json:
-                    data = json.loads(data_layer_json)
-                    contractor['contractor_id'] = data.get('contractor_id')
-                    contractor['name'] = contractor.get('name') or data.get('contractor_name')
-                    contractor['rating'] = contractor.get('rating') or str(data.get('contractor_rating', ''))
-                    contractor['reviews_count'] = data.get('contractor_reviews_count')
-                    contractor['certificates_count'] = data.get('contractor_certificates_count')
-                    contractor['certificate_name'] = data.get('contractor_certificate_name')
-            except:
-                pass
-            
-            # Address/Location
-            try:
-                address_elem = element.find_element(By.CSS_SELECTOR, "p[class*='city'], p[class*='location'], p[class*='address']")
-                contractor['address'] = address_elem.text.strip()
-            except:
-                contractor['address'] = None
-            
-            # Phone
-            try:
-                phone_elem = element.find_element(By.CSS_SELECTOR, "a[href*='tel:']")
-                contractor['phone'] = phone_elem.text.strip()
-            except:
-                contractor['phone'] = None
-            
-            # Website
-            try:
-                website_elem = element.find_element(By.CSS_SELECTOR, "a[target='_blank'][href*='http']")
-                contractor['website'] = website_elem.get_attribute('href')
-            except:
-                contractor['website'] = None
-            
-            # Certifications
-            try:
-                cert_elements = element.find_elements(By.CSS_SELECTOR, "img[alt]")
-                certs = []
-                for img in cert_elements:
-                    alt = img.get_attribute('alt')
-                    if alt and any(word in alt.lower() for word in ['award', 'elite', 'master', 'certified']):
-                        certs.append(alt)
-                contractor['certifications'] = certs
-            except:
-                contractor['certifications'] = []
-            
-            contractor['description'] = None
-            contractor['services'] = []
-            
-            return contractor
-            
+            records = element.parent.execute_script(EXTRACT_CARDS_JS, element, CARD_SELECTOR, CARD_FALLBACK_SELECTOR)
+            return contractor_from_record(records[0]) if records else None
         except Exception as e:
             return None
     
+    def save_run_summary(self, filename='scrape_summary.json'):
+        """Save per-phase timings and extraction throughput for the last run"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.run_summary, f, indent=2)
+        print(f"✓ Run summary saved to {filename}")
+    
     def save_to_json(self, filename='contractors_raw.json'):
         """Save scraped data to JSON file"""
         with open(filename, 'w', encoding='utf-8') as f:
@@ -319,7 +705,55 @@ class ContractorScraper:
                 print(f"\nContractor {i+1}:")
                 print(json.dumps(self.contractors[i], indent=2))
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="GAF contractor scraper")
+    parser.add_argument('--zipcode', default="10013")
+    parser.add_argument('--mode', choices=EXTRACTION_MODES, default='js',
+                        help="js: one execute_script per page; html: parse page_source once per page; "
+                             "webdriver: one call per card")
+    parser.add_argument('--backend', choices=BACKENDS, default='selenium',
+                        help="http: fetch pages without a browser (Selenium used as fallback)")
+    parser.add_argument('--base-url', help="Results page URL (e.g. a local fixture_server.py)")
+    parser.add_argument('--http-concurrency', type=int, default=4)
+    parser.add_argument('--headless', action='store_true', help="Run Chrome without a window")
+    parser.add_argument('--profile', choices=PROFILES, default='default',
+                        help="lean: headless, reused profile, images/fonts/media/trackers blocked")
+    parser.add_argument('--wait-timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help="Max seconds to wait for any page event before giving up")
+    parser.add_argument('--stream', nargs='?', const=STREAM_FILE, metavar='FILE',
+                        help=f"Append contractors to a JSONL file as they are found and checkpoint each page; "
+                             f"rerunning resumes an interrupted crawl (default: {STREAM_FILE})")
+    parser.add_argument('--delta', action='store_true',
+                        help="Also write contractors_delta.json with only new/changed/disappeared contractors")
+    parser.add_argument('--from-html', nargs='+', metavar='FILE',
+                        help="Parse saved page snapshots instead of launching a browser")
+    return parser.parse_args()
+
+def parse_snapshots(filenames, zipcode="10013"):
+    """Offline extraction from saved page_source snapshots"""
+    scraper = ContractorScraper(zipcode=zipcode, extraction_mode='html')
+    for filename in filenames:
+        print(f"\n📄 PARSING {filename}")
+        scraper.extract_from_file(filename)
+    
+    stats = scraper.extraction_stats
+    print(f"\n✓ Parsed {stats['pages']} pages, {stats['cards']} cards "
+          f"in {stats['seconds']:.3f}s ({scraper.cards_per_second():.1f} cards/sec)")
+    print(f"   Unique contractors: {len(scraper.contractors)}")
+    return scraper
+
 if __name__ == "__main__":
+    from delta import write_delta
+    
+    args = parse_args()
+    
+    if args.from_html:
+        scraper = parse_snapshots(args.from_html, zipcode=args.zipcode)
+        scraper.save_to_json()
+        if args.delta:
+            write_delta({args.zipcode: scraper.contractors})
+        raise SystemExit(0)
+    
     print("\n" + "="*80)
     print("GAF CONTRACTOR SCRAPER")
     print("Handles numbered pagination (1, 2, 3, ... 10)")
@@ -328,20 +762,38 @@ if __name__ == "__main__":
     print("Starting in 3 seconds...\n")
     time.sleep(3)
     
-    scraper = ContractorScraper(zipcode="10013")
+    stream = ContractorStream(args.stream) if args.stream else None
+    scraper = ContractorScraper(zipcode=args.zipcode, extraction_mode=args.mode, wait_timeout=args.wait_timeout,
+                                headless=args.headless, backend=args.backend, base_url=args.base_url,
+                                http_concurrency=args.http_concurrency, stream=stream,
+                                browser_profile=args.profile)
     contractors = scraper.scrape_contractors()
+    scraper.save_run_summary()
+    total = scraper.contractor_count
+    # A partial run would report every contractor it did not reach as disappeared, then as new next time
+    delta = args.delta and scraper.completed
+    if args.delta and not scraper.completed:
+        print(f"\n⚠️  Run did not finish; no delta written, fingerprints for {args.zipcode} left as they were")
     
-    if contractors:
-        scraper.save_to_json()
+    if total:
+        if stream:
+            output = stream.filename
+            if delta:
+                write_delta({args.zipcode: iter_jsonl(stream.filename)})
+        else:
+            output = 'contractors_raw.json'
+            scraper.save_to_json()
+            if delta:
+                write_delta({args.zipcode: contractors})
         print(f"\n{'='*80}")
         print("✅ SUCCESS!")
         print(f"{'='*80}")
-        print(f"Scraped {len(contractors)} contractors")
-        print(f"Data saved to: contractors_raw.json")
+        print(f"Scraped {total} contractors")
+        print(f"Data saved to: {output}")
         
-        if len(contractors) >= 90:
+        if total >= 90:
             print("\n🎉 Got all contractors!")
         else:
-            print(f"\n⚠️  Expected ~93, got {len(contractors)}")
+            print(f"\n⚠️  Expected ~93, got {total}")
     else:
         print("\n❌ FAILED! No contractors found.")
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Columnar Snapshot Export
+Writes a point-in-time Parquet snapshot of contractors, certifications, services, insights and
+insight evaluation scores for analytics. Rows are streamed out of SQLite in record batches, so
+memory stays bounded however large the database is.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from db import DB_FILE, connection
+from evaluate_insights import InsightEvaluator
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+SNAPSHOT_DIR = 'snapshots'
+BATCH_ROWS = 65536  # rows per record batch, and so per Parquet row group
+COMPRESSION = 'zstd'
+SCORE_METRICS = ('specificity', 'actionability', 'relevance', 'clarity', 'length', 'overall')
+
+# table -> (query, [(column, kind)]). 'category' columns are dictionary-encoded: few distinct values, many rows
+SNAPSHOT_TABLES = {
+    'contractors': ('''
+        SELECT id, name, rating, reviews_count, address, city, state, zip, phone, website, description, source_id,
+               created_at, updated_at
+        FROM contractors ORDER BY id
+    ''', [('id', 'int'), ('name', 'string'), ('rating', 'float'), ('reviews_count', 'int'), ('address', 'string'),
+          ('city', 'category'), ('state', 'category'), ('zip', 'category'), ('phone', 'string'),
+          ('website', 'string'), ('description', 'string'), ('source_id', 'string'), ('created_at', 'timestamp'),
+          ('updated_at', 'timestamp')]),
+    'certifications': ('''
+        SELECT contractor_id, certification_name FROM certifications ORDER BY contractor_id
+    ''', [('contractor_id', 'int'), ('certification_name', 'category')]),
+    'services': ('''
+        SELECT contractor_id, service_name FROM services ORDER BY contractor_id
+    ''', [('contractor_id', 'int'), ('service_name', 'category')]),
+    'insights': ('''
+        SELECT id, contractor_id, insight_text, generated_at FROM insights ORDER BY id
+    ''', [('id', 'int'), ('contractor_id', 'int'), ('insight_text', 'string'), ('generated_at', 'timestamp')]),
+    # Scores are computed while exporting, the same way evaluate_insights.py does
+    'evaluation_scores': ('''
+        SELECT i.id, i.contractor_id, c.name, c.rating, i.insight_text
+        FROM insights i JOIN contractors c ON c.id = i.contractor_id ORDER BY i.id
+    ''', [('insight_id', 'int'), ('contractor_id', 'int')] + [(metric, 'float') for metric in SCORE_METRICS]),
+}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Snapshot export needs pyarrow: pip install pyarrow")
+
+
+def _arrow_type(kind):
+    return {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'string': pa.string(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'timestamp': pa.timestamp('us'),
+    }[kind]
+
+
+def _timestamps(values):
+    # SQLite stores CURRENT_TIMESTAMP and Python datetimes as ISO text
+    try:
+        return pa.array(values, type=pa.string()).cast(pa.timestamp('us'))
+    except pa.ArrowInvalid:
+        parsed = []
+        for value in values:
+            try:
+                parsed.append(datetime.fromisoformat(value) if value else None)
+            except (TypeError, ValueError):
+                parsed.append(None)
+        return pa.array(parsed, type=pa.timestamp('us'))
+
+
+def _scored(rows, evaluator):
+    """(insight id, contractor id, name, rating, text) rows -> evaluation_scores rows"""
+    result = []
+    for insight_id, contractor_id, name, rating, text in rows:
+        scores = evaluator.evaluate_insight(text or '', {'name': name, 'rating': rating})
+        result.append((insight_id, contractor_id, *(scores[metric] for metric in SCORE_METRICS)))
+    return result
+
+
+def _write_table(cursor, table, path, batch_rows):
+    query, columns = SNAPSHOT_TABLES[table]
+    schema = pa.schema([(column, _arrow_type(kind)) for column, kind in columns])
+    evaluator = InsightEvaluator() if table == 'evaluation_scores' else None
+    written = 0
+
+    cursor.execute(query)
+    with pq.ParquetWriter(path, schema, compression=COMPRESSION) as writer:
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            if evaluator:
+                rows = _scored(rows, evaluator)
+            arrays = [_timestamps(values) if kind == 'timestamp' else pa.array(values, type=_arrow_type(kind))
+                      for values, (_, kind) in zip(zip(*rows), columns)]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            written += len(rows)
+    return written
+
+
+def export_snapshot(db_name=DB_FILE, output_dir=None, batch_rows=BATCH_ROWS):
+    """
+    Write one <table>.parquet per SNAPSHOT_TABLES entry into output_dir (default: a timestamped
+    directory under snapshots/). Every table is read inside one transaction, so the files agree
+    with each other even while the ETL or insight generator keeps writing.
+    Returns (output_dir, {table: rows}).
+    """
+    require_pyarrow()
+    output_dir = output_dir or os.path.join(SNAPSHOT_DIR, f"contractors_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    counts = {}
+    with connection(db_name) as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')  # WAL readers see the database as of their first read until the transaction ends
+        try:
+            for table in SNAPSHOT_TABLES:
+                counts[table] = _write_table(cursor, table, os.path.join(output_dir, f"{table}.parquet"), batch_rows)
+        finally:
+            conn.rollback()
+    return output_dir, counts
+
+
+def export_snapshot_archive(archive_path, db_name=DB_FILE, batch_rows=BATCH_ROWS):
+    """export_snapshot() packed into a single .zip (stored, not recompressed - Parquet already is)"""
+    workdir = tempfile.mkdtemp(prefix='snapshot_')
+    try:
+        snapshot_dir, counts = export_snapshot(db_name, workdir, batch_rows)
+        with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for table in SNAPSHOT_TABLES:
+                archive.write(os.path.join(snapshot_dir, f"{table}.parquet"), f"{table}.parquet")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a point-in-time Parquet snapshot of the contractors database")
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--output', help=f"Directory for the .parquet files (default: {SNAPSHOT_DIR}/contractors_<time>), "
+                                         "or a .zip path for a single archive")
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS, help="Rows per record batch / row group")
+    args = parser.parse_args()
+
+    if pa is None:
+        print("✗ Snapshot export needs pyarrow: pip install pyarrow")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if args.output and args.output.endswith('.zip'):
+        counts = export_snapshot_archive(args.output, args.db, args.batch_rows)
+        destination = args.output
+    else:
+        destination, counts = export_snapshot(args.db, args.output, args.batch_rows)
+
+    for table, rows in counts.items():
+        print(f"✓ {table}: {rows} rows")
+    print(f"✓ Snapshot written to {destination} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,227 @@
+"""
+Synthetic Contractors Data
+Generates realistic, seeded scraper output (names, ratings, review counts, phones, websites,
+certifications, services and real city/zip locations) and loads it into a contractors database
+with insights, so the storage layer, dashboard and exports can be measured well beyond one zipcode
+"""
+import argparse
+import json
+import os
+import random
+import time
+from db import DB_FILE, close_all, connection
+from database import ContractorDatabase
+from checkpoint import iter_records
+from tiling import load_centroids
+
+SIZES = {'10k': 10000, '100k': 100000, '1m': 1000000}
+
+# Contractor names and certifications, shared with benchmark_resolve.py
+SURNAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+            'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+            'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+            'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores', 'Green',
+            'Adams', 'Nelson', 'Baker', 'Hall', 'Rivera', 'Campbell', 'Mitchell', 'Carter', 'Roberts', 'Matute']
+# Syllables for made-up surnames, so names are about as varied as real ones (~17k surnames)
+SYLLABLES = ['ka', 'lo', 'mi', 'ter', 'son', 'ber', 'ri', 'van', 'del', 'ton', 'ma', 'ne', 'sha', 'gor', 'li',
+             'wen', 'da', 'ro', 'ki', 'fel', 'ham', 'ste', 'zel', 'or', 'bry']
+QUALIFIERS = ['', '', 'A1', 'Premier', 'Elite', 'Family', 'Brothers', 'Quality', 'Summit', 'Liberty', 'Atlantic',
+              'Superior', 'Reliable', 'Pro', 'Master', 'Heritage', 'Precision', 'Crown', 'Eagle', 'Pioneer', 'Apex']
+TRADES = ['Roofing', 'Exteriors', 'Construction', 'Home Improvement', 'Roofing & Siding', 'Contracting',
+          'Builders', 'Restoration', 'Renovations', 'Roof Systems']
+SUFFIXES = ['', '', '', ' LLC', ' Inc', ' Inc.', ' Co']
+# Weighted like the GAF directory: most contractors are plain Certified, few are Master Elite
+CERTIFICATIONS = [('Certified', 50), ('Certified Plus', 15), ('Master Elite', 10), ("President's Club Award", 3),
+                  ('Triple Excellence', 2), ('Consumer Protection Excellence', 5), ('Training Excellence', 5),
+                  ('Installation Master', 10)]
+SERVICES = ['Residential Roofing', 'Commercial Roofing', 'Roof Repair', 'Roof Replacement', 'Gutters', 'Siding',
+            'Windows', 'Skylights', 'Storm Damage', 'Insurance Claims', 'Solar Roofing', 'Attic Ventilation']
+DESCRIPTIONS = [
+    'Family owned and operated since {year}, serving {city} and surrounding areas.',
+    'Licensed and insured {trade} contractor specializing in {service}.',
+    'We offer free estimates on {service} and financing for qualified homeowners.',
+    None, None,
+]
+# Assembled from parts so evaluate_insights.py scores vary the way real generated insights do
+INSIGHT_OPENINGS = [
+    '{name} holds a {rating} rating across {reviews} reviews.',
+    'With a {rating} rating, {name} is a {tier} lead in {city}.',
+    '{name} focuses on {service} in the {city} area.',
+]
+INSIGHT_ACTIONS = [
+    'Approach them about premium shingle product lines.',
+    'Mention volume pricing on roofing material for their {service} jobs.',
+    'Highlight faster delivery to support their service quality.',
+    'Discuss an opportunity to bundle underlayment with their next orders.',
+    'Recommend a quarterly check-in before storm season.',
+    '',
+]
+STREET_ADDRESS_SHARE = 0.2  # cards with a street address and zip rather than "City, ST - x mi"
+WEBSITE_SHARE = 0.7
+DESCRIPTION_SHARE = 0.4
+INSIGHT_SHARE = 0.3
+BATCH_SIZE = 5000
+
+
+def surname(rng):
+    if rng.random() < 0.3:
+        return rng.choice(SURNAMES)
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def contractor_name(rng):
+    """(name without its legal suffix, trade), e.g. ('Premier Kaloson Roofing', 'Roofing')"""
+    qualifier = rng.choice(QUALIFIERS)
+    trade = rng.choice(TRADES)
+    return ' '.join(filter(None, [qualifier, surname(rng), trade])), trade
+
+
+def _places(centroids):
+    """Delivery zips to draw locations from; picking zips uniformly puts more contractors where zips are dense"""
+    return sorted((c['zip'], c['city'], c['state']) for c in centroids.values() if c['type'] == 'STANDARD')
+
+
+def synthesize_contractors(count, seed=0, centroids=None):
+    """
+    count scraper-shaped records (as scraper.py writes them), generated one at a time so memory stays
+    flat. The same seed always gives the same records. Addresses never repeat (the street number or
+    search distance comes from the record's position, as in benchmark_resolve.py), so every record
+    becomes its own contractor.
+    """
+    rng = random.Random(seed)
+    places = _places(centroids or load_centroids())
+    certifications, weights = zip(*CERTIFICATIONS)
+
+    for index in range(count):
+        name, trade = contractor_name(rng)
+        name += rng.choice(SUFFIXES)
+        zip_code, city, state = rng.choice(places)
+        if rng.random() < STREET_ADDRESS_SHARE:
+            address = f"{index + 1} {surname(rng)} {rng.choice(['St', 'Ave', 'Rd', 'Blvd'])}, {city}, {state} {zip_code}"
+        else:
+            address = f"{city}, {state} - {index / 100:.2f} mi"
+
+        slug = ''.join(ch for ch in name.lower() if ch.isalnum())
+        source_id = str(1000000 + index)
+        services = sorted(rng.sample(SERVICES, rng.randint(0, 4)))
+        certs = sorted(set(rng.choices(certifications, weights, k=rng.randint(1, 3))))
+        description = rng.choice(DESCRIPTIONS) if rng.random() < DESCRIPTION_SHARE else None
+        # Ratings cluster near the top like real review sites; counts are long-tailed
+        rating = round(min(5.0, max(1.0, rng.gauss(4.6, 0.4))), 1)
+        yield {
+            'name': name,
+            'rating': str(rating) if rng.random() < 0.97 else None,
+            'contractor_id': source_id,
+            'reviews_count': int(rng.lognormvariate(3.5, 1.2)),
+            'certificates_count': len(certs),
+            'certificate_name': certs[-1],
+            'address': address,
+            'phone': f"({rng.randint(201, 989)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}"
+                     if rng.random() < 0.95 else None,
+            'website': (f"https://www.{slug}.com" if rng.random() < 0.5 else
+                        f"https://www.gaf.com/en-us/roofing-contractors/residential/usa/{state.lower()}/"
+                        f"{city.lower().replace(' ', '-')}/{slug}-{source_id}") if rng.random() < WEBSITE_SHARE else None,
+            'certifications': certs,
+            'description': description.format(year=rng.randint(1960, 2020), city=city, trade=trade.lower(),
+                                              service=(services or SERVICES)[0].lower()) if description else None,
+            'services': services,
+        }
+
+
+def synthesize_insight(rng, name, rating, reviews_count, city, service):
+    tier = 'high-value' if (rating or 0) >= 4.5 else 'developing'
+    text = rng.choice(INSIGHT_OPENINGS) + ' ' + rng.choice(INSIGHT_ACTIONS)
+    return text.format(name=name, rating=rating, reviews=reviews_count, tier=tier, city=city or 'local',
+                       service=(service or 'roofing').lower()).strip()
+
+
+def write_records(filename, count, seed=0):
+    """synthesize_contractors() as a JSONL stream, the format scraper.py --stream writes"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        for record in synthesize_contractors(count, seed):
+            f.write(json.dumps(record) + '\n')
+    return filename
+
+
+def add_insights(db, seed=0, share=INSIGHT_SHARE):
+    """
+    Give about share of db's contractors an insight, as ai_insights.py would. Search documents are
+    rebuilt once per batch, the way load_batches() does it. Returns how many were added.
+    """
+    rng = random.Random(seed)
+    added = 0
+    with connection(db.db_name) as conn:
+        rows = conn.execute('''
+            SELECT c.id, c.name, c.rating, c.reviews_count, c.city,
+                   (SELECT service_name FROM services s WHERE s.contractor_id = c.id LIMIT 1)
+            FROM contractors c
+            WHERE NOT EXISTS (SELECT 1 FROM insights i WHERE i.contractor_id = c.id)
+            ORDER BY c.id
+        ''').fetchall()
+        insights = [(contractor_id, synthesize_insight(rng, name, rating, reviews_count, city, service))
+                    for contractor_id, name, rating, reviews_count, city, service in rows if rng.random() < share]
+        cursor = conn.cursor()
+        for start in range(0, len(insights), BATCH_SIZE):
+            batch = insights[start:start + BATCH_SIZE]
+            with db.transaction(conn):
+                cursor.execute('UPDATE search_sync SET deferred = 1')
+                cursor.executemany('INSERT INTO insights (contractor_id, insight_text) VALUES (?, ?)', batch)
+                db.refresh_search(cursor, [contractor_id for contractor_id, _ in batch])
+                cursor.execute('UPDATE search_sync SET deferred = 0')
+            added += len(batch)
+    return added
+
+
+def build_database(db_name, count, seed=0, records_file=None, insight_share=INSIGHT_SHARE):
+    """
+    A fresh contractors database with count synthetic contractors, loaded through the real ETL path
+    (ContractorDatabase.bulk_load), plus insights. Returns timings and row counts.
+    """
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_name + suffix):
+            os.remove(db_name + suffix)
+    records_file = records_file or os.path.splitext(db_name)[0] + '.jsonl'
+
+    start = time.perf_counter()
+    write_records(records_file, count, seed)
+    generate_seconds = time.perf_counter() - start
+
+    db = ContractorDatabase(db_name)
+    start = time.perf_counter()
+    loaded = db.bulk_load(iter_records(records_file), batch_size=BATCH_SIZE)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    insights = add_insights(db, seed, insight_share)
+    insight_seconds = time.perf_counter() - start
+
+    return {
+        'contractors': loaded,
+        'insights': insights,
+        'records_file': records_file,
+        'generate_seconds': generate_seconds,
+        'load_seconds': load_seconds,
+        'insight_seconds': insight_seconds,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic contractors database")
+    parser.add_argument('--size', default='10k', help=f"Contractor count, or one of {', '.join(SIZES)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Database file (default: contractors_<size>.db; never the live database)")
+    parser.add_argument('--insight-share', type=float, default=INSIGHT_SHARE, help="Share of contractors with an insight")
+    args = parser.parse_args()
+
+    count = SIZES.get(args.size.lower()) or int(args.size)
+    output = args.output or f"contractors_{args.size.lower()}.db"
+    if os.path.abspath(output) == os.path.abspath(DB_FILE):
+        print(f"✗ Refusing to overwrite {DB_FILE}; pass a different --output")
+        raise SystemExit(1)
+
+    result = build_database(output, count, args.seed, insight_share=args.insight_share)
+    close_all()
+    print(f"✓ {result['contractors']:,} contractors and {result['insights']:,} insights written to {output} "
+          f"(generate {result['generate_seconds']:.1f}s, load {result['load_seconds']:.1f}s, "
+          f"insights {result['insight_seconds']:.1f}s)")
+    print(f"✓ Scraper records kept in {result['records_file']} for ETL runs")
@@ -0,0 +1,230 @@
+"""
+Geographic Tiling Scheduler
+Picks a small set of search centers that covers a territory's zip centroids at a given radius,
+orders them for locality, and crawls low-yield tiles less often
+"""
+import argparse
+import csv
+import heapq
+import json
+import math
+import os
+from datetime import datetime
+
+# Bundled with the code rather than looked up in the working directory
+CENTROIDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zip_centroids.csv')
+YIELD_FILE = 'tile_yield.json'
+EARTH_RADIUS_MI = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+# A tile is due again after REFRESH_DAYS times this multiplier, by average new contractors per crawl
+YIELD_TIERS = [
+    (5, 1),     # >= 5 new per crawl: every refresh
+    (1, 2),     # >= 1 new: every other refresh
+    (0, 4),     # nothing new: every fourth refresh
+]
+REFRESH_DAYS = 7
+YIELD_SMOOTHING = 0.5
+
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MI * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, lng, radius):
+    """(min_lat, max_lat, min_lng, max_lng) containing every point within radius miles of (lat, lng)"""
+    lat_span = radius / MILES_PER_DEGREE_LAT
+    # Longitude degrees are shortest at the edge furthest from the equator, so size the box there
+    edge = min(abs(lat) + lat_span, 90.0)
+    cos_edge = math.cos(math.radians(edge))
+    lng_span = 180.0 if cos_edge < 1e-6 else min(lat_span / cos_edge, 180.0)
+    # Clamped rather than wrapped at the antimeridian; only the far Aleutians are near it
+    return (max(lat - lat_span, -90.0), min(lat + lat_span, 90.0),
+            max(lng - lng_span, -180.0), min(lng + lng_span, 180.0))
+
+
+def load_centroids(filename=CENTROIDS_FILE):
+    """zip -> {'zip', 'city', 'state', 'lat', 'lng', 'type'} from the bundled centroid table"""
+    centroids = {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            row['lat'] = float(row['lat'])
+            row['lng'] = float(row['lng'])
+            centroids[row['zip']] = row
+    return centroids
+
+
+def territory_zips(centroids, states=None, zips=None, include_po_boxes=False):
+    """Zip centroids making up a territory: explicit zips, or every delivery zip in the given states"""
+    if zips:
+        missing = [z for z in zips if z not in centroids]
+        if missing:
+            print(f"⚠️  {len(missing)} zipcodes not in the centroid table: {', '.join(missing[:10])}")
+        return [centroids[z] for z in zips if z in centroids]
+
+    states = {s.upper() for s in states or []}
+    types = {'STANDARD', 'PO BOX'} if include_po_boxes else {'STANDARD'}
+    return [c for c in centroids.values() if c['state'] in states and c['type'] in types]
+
+
+class GridIndex:
+    """Buckets points into cells one radius wide so neighbour lookups only scan nearby cells"""
+    def __init__(self, points, radius):
+        self.radius = radius
+        self.cell = radius / MILES_PER_DEGREE_LAT
+        self.cells = {}
+        for index, point in enumerate(points):
+            self.cells.setdefault(self._key(point['lat'], point['lng']), []).append(index)
+        self.points = points
+
+    def _key(self, lat, lng):
+        return int(math.floor(lat / self.cell)), int(math.floor(lng / self.cell))
+
+    def within(self, lat, lng):
+        # Longitude degrees shrink with latitude, so widen the column span accordingly
+        row, col = self._key(lat, lng)
+        span = int(math.ceil(1 / max(math.cos(math.radians(lat)), 0.2)))
+        result = []
+        for r in (row - 1, row, row + 1):
+            for c in range(col - span, col + span + 1):
+                for index in self.cells.get((r, c), ()):
+                    point = self.points[index]
+                    if haversine_miles(lat, lng, point['lat'], point['lng']) <= self.radius:
+                        result.append(index)
+        return result
+
+
+def covering_centers(points, radius):
+    """
+    Greedy set cover: repeatedly take the centroid whose circle covers the most still-uncovered
+    centroids. Lazy evaluation via a max-heap keeps this fast, since coverage only ever shrinks.
+    """
+    index = GridIndex(points, radius)
+    coverage = [set(index.within(p['lat'], p['lng'])) for p in points]
+    uncovered = set(range(len(points)))
+    heap = [(-len(cover), i) for i, cover in enumerate(coverage)]
+    heapq.heapify(heap)
+    centers = []
+
+    while uncovered and heap:
+        negative_count, i = heapq.heappop(heap)
+        gain = len(coverage[i] & uncovered)
+        if gain == 0:
+            continue
+        if gain < -negative_count:
+            heapq.heappush(heap, (-gain, i))
+            continue
+        centers.append(points[i])
+        uncovered -= coverage[i]
+
+    return centers
+
+
+def locality_order(centers):
+    """Nearest-neighbour tour from the north-westernmost center, so consecutive crawls are neighbours"""
+    if not centers:
+        return []
+    remaining = list(centers)
+    current = max(remaining, key=lambda c: (c['lat'] - c['lng']))
+    remaining.remove(current)
+    ordered = [current]
+    while remaining:
+        current = min(remaining, key=lambda c: haversine_miles(current['lat'], current['lng'], c['lat'], c['lng']))
+        remaining.remove(current)
+        ordered.append(current)
+    return ordered
+
+
+class YieldTracker:
+    """Per-tile crawl history used to crawl low-yield tiles less often"""
+    def __init__(self, filename=YIELD_FILE):
+        self.filename = filename
+        self.tiles = {}
+        if os.path.exists(filename):
+            with open(filename, 'r') as f:
+                self.tiles = json.load(f)
+
+    def interval_days(self, zipcode):
+        tile = self.tiles.get(zipcode)
+        if not tile:
+            return 0
+        for threshold, multiplier in YIELD_TIERS:
+            if tile['avg_new'] >= threshold:
+                return REFRESH_DAYS * multiplier
+        return REFRESH_DAYS * YIELD_TIERS[-1][1]
+
+    def is_due(self, zipcode, now=None):
+        tile = self.tiles.get(zipcode)
+        if not tile:
+            return True
+        now = now or datetime.now()
+        elapsed = (now - datetime.fromisoformat(tile['last_crawled'])).total_seconds() / 86400
+        return elapsed >= self.interval_days(zipcode)
+
+    def record(self, zipcode, found, new, now=None):
+        tile = self.tiles.setdefault(zipcode, {'crawls': 0, 'avg_new': float(new)})
+        tile['crawls'] += 1
+        tile['last_crawled'] = (now or datetime.now()).isoformat()
+        tile['last_found'] = found
+        tile['last_new'] = new
+        tile['avg_new'] = round(YIELD_SMOOTHING * new + (1 - YIELD_SMOOTHING) * tile['avg_new'], 2)
+
+    def save(self):
+        with open(self.filename, 'w') as f:
+            json.dump(self.tiles, f, indent=2)
+
+
+class TileScheduler:
+    def __init__(self, points, radius=25, margin=2.0, tracker=None):
+        """
+        margin shrinks the covering radius so the edges of each zip area, not just its centroid,
+        fall inside some search circle
+        """
+        self.points = points
+        self.radius = radius
+        self.cover_radius = max(radius - margin, 1.0)
+        self.tracker = tracker or YieldTracker()
+        self.tiles = locality_order(covering_centers(points, self.cover_radius))
+
+    def due_tiles(self, now=None):
+        return [tile for tile in self.tiles if self.tracker.is_due(tile['zip'], now)]
+
+    def print_plan(self, due):
+        print(f"Territory: {len(self.points)} zip centroids")
+        print(f"Search radius: {self.radius} mi (covering at {self.cover_radius} mi)")
+        print(f"Tiles: {len(self.tiles)} ({len(self.points) / max(len(self.tiles), 1):.1f} zips per tile)")
+        print(f"Due now: {len(due)} (skipping {len(self.tiles) - len(due)} low-yield or recently crawled)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Plan a territory crawl as a minimal set of search centers")
+    parser.add_argument('--states', nargs='*', default=[], help="Territory as two-letter state codes")
+    parser.add_argument('--zips', nargs='*', default=[], help="Territory as explicit zipcodes")
+    parser.add_argument('--radius', type=int, default=25)
+    parser.add_argument('--margin', type=float, default=2.0)
+    parser.add_argument('--all', action='store_true', help="List every tile, not just those due")
+    parser.add_argument('--output', help="Write the planned zipcodes here, one per line (for crawler.py)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    points = territory_zips(load_centroids(), states=args.states, zips=args.zips)
+    if not points:
+        print("✗ Empty territory. Pass --states or --zips")
+        raise SystemExit(1)
+
+    scheduler = TileScheduler(points, radius=args.radius, margin=args.margin)
+    due = scheduler.due_tiles()
+    scheduler.print_plan(due)
+
+    planned = scheduler.tiles if args.all else due
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.writelines(f"{tile['zip']}  # {tile['city']}, {tile['state']}\n" for tile in planned)
+        print(f"\n✓ {len(planned)} zipcodes written to {args.output}")
+    else:
+        for tile in planned:
+            print(f"   {tile['zip']}  {tile['city']}, {tile['state']}")
@@ -0,0 +1,163 @@
+"""
+Event-driven waits and phase timing for the scraper
+Replaces fixed sleeps with WebDriverWait conditions so a crawl only waits as long as the page needs
+"""
+import time
+from contextlib import contextmanager
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+DEFAULT_TIMEOUT = 15
+POLL_INTERVAL = 0.2
+
+# Identity of the first card: its data-layer contractor_id, falling back to the heading text
+FIRST_CARD_IDENTITY_JS = """
+var card = document.querySelector(arguments[0]);
+if (!card) { return null; }
+var link = card.querySelector('a[data-layer]');
+if (link) {
+    try {
+        var data = JSON.parse(link.getAttribute('data-layer'));
+        if (Array.isArray(data)) { data = data[0] || {}; }
+        var attrs = data.event_attributes || data;
+        if (attrs.contractor_id) { return String(attrs.contractor_id); }
+    } catch (e) {}
+}
+var heading = card.querySelector('h2, h3');
+return heading ? heading.textContent.trim() : card.textContent.trim().slice(0, 200);
+"""
+
+NETWORK_STATE_JS = """
+return [document.readyState, performance.getEntriesByType('resource').length];
+"""
+
+
+class card_count_stable:
+    """Wait until at least one card is present and the count has not changed for `settle` seconds"""
+    def __init__(self, selector, settle=0.5):
+        self.selector = selector
+        self.settle = settle
+        self.last_count = None
+        self.last_change = None
+
+    def __call__(self, driver):
+        count = driver.execute_script("return document.querySelectorAll(arguments[0]).length;", self.selector)
+        now = time.monotonic()
+        if count != self.last_count:
+            self.last_count = count
+            self.last_change = now
+            return False
+        if count > 0 and now - self.last_change >= self.settle:
+            return count
+        return False
+
+
+class first_card_changed:
+    """Wait until the first card on the page is a different contractor than before the click"""
+    def __init__(self, selector, previous_identity):
+        self.selector = selector
+        self.previous_identity = previous_identity
+
+    def __call__(self, driver):
+        identity = driver.execute_script(FIRST_CARD_IDENTITY_JS, self.selector)
+        if identity and identity != self.previous_identity:
+            return identity
+        return False
+
+
+class network_idle:
+    """Wait until the document is complete and no new resources have loaded for `quiet` seconds"""
+    def __init__(self, quiet=0.5):
+        self.quiet = quiet
+        self.last_resources = None
+        self.last_change = None
+
+    def __call__(self, driver):
+        ready_state, resources = driver.execute_script(NETWORK_STATE_JS)
+        now = time.monotonic()
+        if ready_state != 'complete' or resources != self.last_resources:
+            self.last_resources = resources
+            self.last_change = now
+            return False
+        return now - self.last_change >= self.quiet
+
+
+class PageWaiter:
+    """WebDriverWait helpers bounded by a single configurable max timeout"""
+    def __init__(self, driver, card_selector, timeout=DEFAULT_TIMEOUT, poll=POLL_INTERVAL):
+        self.driver = driver
+        self.card_selector = card_selector
+        self.timeout = timeout
+        self.poll = poll
+
+    def until(self, condition, timeout=None):
+        wait = WebDriverWait(
+            self.driver,
+            timeout or self.timeout,
+            poll_frequency=self.poll,
+            ignored_exceptions=(WebDriverException,)
+        )
+        return wait.until(condition)
+
+    def wait_for_cards(self, settle=0.5):
+        """Block until the card list has rendered and stopped growing; returns the card count"""
+        return self.until(card_count_stable(self.card_selector, settle))
+
+    def wait_for_network_idle(self, quiet=0.5):
+        """Best effort: a page that never goes quiet is not an error, so timeouts return False"""
+        try:
+            return self.until(network_idle(quiet))
+        except TimeoutException:
+            return False
+
+    def first_card_identity(self):
+        try:
+            return self.driver.execute_script(FIRST_CARD_IDENTITY_JS, self.card_selector)
+        except WebDriverException:
+            return None
+
+    def wait_for_page_change(self, previous_identity):
+        """Block until pagination has swapped the results; returns the new first-card identity"""
+        return self.until(first_card_changed(self.card_selector, previous_identity))
+
+    def wait_for_clickable(self, element, timeout=None):
+        return self.until(EC.element_to_be_clickable(element), timeout)
+
+
+class PhaseTimer:
+    """Accumulates wall time per crawl phase (navigate/scroll/paginate/extract)"""
+    def __init__(self):
+        self.seconds = {}
+        self.counts = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def summary(self):
+        total = time.perf_counter() - self.started
+        return {
+            'total_seconds': round(total, 3),
+            'phases': {
+                name: {
+                    'seconds': round(seconds, 3),
+                    'calls': self.counts[name],
+                    'share': round(seconds / total, 3) if total > 0 else 0.0
+                }
+                for name, seconds in self.seconds.items()
+            }
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"\nRun time: {summary['total_seconds']:.1f}s")
+        for name, phase in summary['phases'].items():
+            print(f"   {name:10s}: {phase['seconds']:7.2f}s over {phase['calls']:3d} calls "
+                  f"({phase['share'] * 100:.0f}%)")